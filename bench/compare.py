@@ -0,0 +1,70 @@
+"""
+Compara dos resultados de `bench.run` y marca las regresiones.
+
+Ejemplo:
+    python -m bench.compare base.json new.json --threshold 0.10
+
+Devuelve código de salida 1 si hay alguna regresión.
+"""
+import argparse
+import json
+import sys
+from typing import List, Tuple
+
+# Métricas comparadas: (nombre, True si "más alto es mejor")
+METRICS = [("throughput_rps", True), ("p50_ms", False), ("p95_ms", False), ("p99_ms", False), ("peak_rss_mb", False),
+           ("import_to_ready_ms", False), ("first_request_ms", False), ("first_login_ms", False)]
+
+
+def compare(base: dict, new: dict, threshold: float, min_latency_ms: float) -> Tuple[List[str], List[str]]:
+    """
+    Devuelve `(filas del informe, regresiones)`.
+    Una latencia solo cuenta como regresión si además empeora al menos
+    `min_latency_ms`, para no marcar ruido en endpoints muy rápidos.
+    """
+    lines, regressions = [], []
+    for target, phases in new.get("results", {}).items():
+        for phase, endpoints in phases.items():
+            for endpoint, stats in endpoints.items():
+                base_stats = base.get("results", {}).get(target, {}).get(phase, {}).get(endpoint)
+                if base_stats is None:
+                    lines.append(f"{target:9} {phase:16} {endpoint:16} (new)")
+                    continue
+                for metric, higher_is_better in METRICS:
+                    old_value, new_value = base_stats.get(metric), stats.get(metric)
+                    if not old_value or new_value is None:
+                        continue
+                    change = (new_value - old_value) / old_value
+                    worse = -change if higher_is_better else change
+                    flag = ""
+                    if worse > threshold and (metric == "peak_rss_mb" or higher_is_better
+                                              or new_value - old_value >= min_latency_ms):
+                        flag = "  << REGRESSION"
+                        regressions.append(f"{target}/{phase}/{endpoint} {metric}: {old_value} -> {new_value}")
+                    lines.append(f"{target:9} {phase:16} {endpoint:16} {metric:15} "
+                                 f"{old_value:>10} -> {new_value:>10} ({change:+.1%}){flag}")
+    return lines, regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare two Gela API benchmark runs")
+    parser.add_argument("base")
+    parser.add_argument("new")
+    parser.add_argument("--threshold", type=float, default=0.10, help="Relative change considered a regression")
+    parser.add_argument("--min-latency-ms", type=float, default=1.0)
+    args = parser.parse_args(argv)
+
+    with open(args.base) as base_file, open(args.new) as new_file:
+        base, new = json.load(base_file), json.load(new_file)
+    lines, regressions = compare(base, new, args.threshold, args.min_latency_ms)
+    print("\n".join(lines))
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) above {args.threshold:.0%}:")
+        print("\n".join(f"  {line}" for line in regressions))
+        return 1
+    print("\nNo regressions.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
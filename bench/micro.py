@@ -0,0 +1,108 @@
+"""
+Micro-benchmarks de componentes concretos, sin HTTP ni base de datos:
+
+- auth: coste por petición de `get_current_user` con y sin caché de tokens.
+- search: latencia de consulta del índice invertido según crece el catálogo.
+
+Ejemplo:
+    python -m bench.micro auth search --output micro.json
+"""
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+
+def bench_auth(iterations: int) -> dict:
+    from utils import auth
+
+    token = auth.create_access_token({"sub": "bench@example.com"})
+
+    async def measure() -> float:
+        start = time.perf_counter()
+        for _ in range(iterations):
+            await auth.get_current_user(token)
+        return (time.perf_counter() - start) / iterations
+
+    original_size = auth.token_cache.max_size
+    try:
+        auth.token_cache.clear()
+        auth.token_cache.max_size = 0
+        uncached = asyncio.run(measure())
+        auth.token_cache.max_size = original_size
+        auth.token_cache.clear()
+        cached = asyncio.run(measure())
+    finally:
+        auth.token_cache.max_size = original_size
+        auth.token_cache.clear()
+    return {
+        "iterations": iterations,
+        "uncached_us": round(uncached * 1e6, 2),
+        "cached_us": round(cached * 1e6, 2),
+        "speedup": round(uncached / cached, 1) if cached else None,
+    }
+
+
+def bench_search(sizes, queries: int, seed: int) -> dict:
+    from bench.seed import ARTICLE_TYPES, WORDS
+    from utils.search import InvertedIndex
+
+    rng = random.Random(seed)
+    results = {}
+    for size in sizes:
+        index = InvertedIndex()
+        start = time.perf_counter()
+        for article_id in range(1, size + 1):
+            index.upsert(article_id, " ".join(rng.sample(WORDS, 3)), rng.choice(ARTICLE_TYPES),
+                         " ".join(rng.sample(WORDS, 6)), rng.uniform(1, 500))
+        build_seconds = time.perf_counter() - start
+
+        latencies = []
+        for _ in range(queries):
+            query = " ".join(rng.sample(WORDS, 2))
+            start = time.perf_counter()
+            index.search(query)[:20]
+            latencies.append(time.perf_counter() - start)
+        latencies.sort()
+        results[str(size)] = {
+            "build_s": round(build_seconds, 3),
+            "p50_ms": round(latencies[len(latencies) // 2] * 1000, 3),
+            "p95_ms": round(latencies[int(len(latencies) * 0.95) - 1] * 1000, 3),
+        }
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Gela API micro-benchmarks")
+    parser.add_argument("benchmarks", nargs="*", metavar="{auth,search}", help="Default: all")
+    parser.add_argument("--iterations", type=int, default=20000)
+    parser.add_argument("--sizes", default="1000,10000,50000")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output")
+    args = parser.parse_args(argv)
+    args.benchmarks = args.benchmarks or ["auth", "search"]
+    unknown = set(args.benchmarks) - {"auth", "search"}
+    if unknown:
+        parser.error(f"unknown benchmarks: {', '.join(sorted(unknown))}")
+
+    report = {}
+    if "auth" in args.benchmarks:
+        report["auth"] = bench_auth(args.iterations)
+    if "search" in args.benchmarks:
+        report["search"] = bench_search([int(size) for size in args.sizes.split(",")], args.queries, args.seed)
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, "w") as output:
+            json.dump(report, output, indent=2)
+
+
+if __name__ == "__main__":
+    main()
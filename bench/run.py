@@ -0,0 +1,439 @@
+"""
+Benchmark de carga reproducible para la Gela API.
+
+Arranca `main.app` contra un SQLite local sembrado con datos sintéticos y
+lanza cargas por endpoint y mixtas, tanto con un cliente ASGI en proceso
+como contra un proceso real de uvicorn, y mide el arranque en frío (hasta
+`/health/ready` y la primera petición). Guarda los resultados en JSON para
+compararlos después con `python -m bench.compare`.
+
+Ejemplo:
+    python -m bench.run --articles 20000 --users 200 --concurrency 64 --duration 15 --output base.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import httpx
+
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from bench.seed import BENCH_PASSWORD, bench_email, seed_database  # noqa: E402
+from bench.workloads import READ_SCENARIOS, SCENARIOS, BenchContext, login_flood  # noqa: E402
+
+# Cada cuánto se muestrea la memoria residente del proceso medido
+RSS_SAMPLE_INTERVAL = 0.05
+
+
+def read_rss_bytes(pid: int) -> int:
+    """
+    Memoria residente actual de un proceso (Linux). En otros sistemas se
+    usa el pico del propio proceso como aproximación.
+    """
+    try:
+        with open(f"/proc/{pid}/status") as status_file:
+            for line in status_file:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+class RssSampler:
+    """
+    Muestrea la RSS de un proceso en segundo plano y guarda el máximo.
+    """
+
+    def __init__(self, pid: int):
+        self.pid = pid
+        self.peak = 0
+        self._task: Optional[asyncio.Task] = None
+
+    async def _run(self):
+        while True:
+            self.peak = max(self.peak, read_rss_bytes(self.pid))
+            await asyncio.sleep(RSS_SAMPLE_INTERVAL)
+
+    def __enter__(self):
+        self.peak = read_rss_bytes(self.pid)
+        self._task = asyncio.get_running_loop().create_task(self._run())
+        return self
+
+    def __exit__(self, *exc):
+        self._task.cancel()
+
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(q / 100 * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+def summarize(latencies: Dict[str, List[float]], statuses: Dict[str, Dict[int, int]], elapsed: float,
+              peak_rss: int) -> Dict[str, dict]:
+    summary = {}
+    for name, values in latencies.items():
+        values.sort()
+        codes = statuses[name]
+        errors = sum(count for code, count in codes.items() if code >= 400)
+        summary[name] = {
+            "requests": len(values),
+            "errors": errors,
+            "throughput_rps": round(len(values) / elapsed, 2),
+            "p50_ms": round(percentile(values, 50) * 1000, 3),
+            "p95_ms": round(percentile(values, 95) * 1000, 3),
+            "p99_ms": round(percentile(values, 99) * 1000, 3),
+            "mean_ms": round(sum(values) / len(values) * 1000, 3) if values else 0.0,
+            "status_counts": {str(code): count for code, count in sorted(codes.items())},
+            "peak_rss_mb": round(peak_rss / 1024 / 1024, 2),
+        }
+    return summary
+
+
+async def run_phase(client, scenarios: Dict[str, tuple], ctx: BenchContext, concurrency: int,
+                    duration: float, warmup: float, pid: int, seed: int) -> Dict[str, dict]:
+    """
+    Lanza `concurrency` trabajadores que eligen escenarios según su peso
+    durante `warmup + duration` segundos; solo se mide el tramo `duration`.
+    """
+    names = list(scenarios)
+    weights = [scenarios[name][1] for name in names]
+    latencies: Dict[str, List[float]] = {name: [] for name in names}
+    statuses: Dict[str, Dict[int, int]] = {name: {} for name in names}
+    start = time.perf_counter()
+    measure_from = start + warmup
+    deadline = measure_from + duration
+
+    async def worker(worker_id: int):
+        rng = random.Random(seed * 1000 + worker_id)
+        while True:
+            now = time.perf_counter()
+            if now >= deadline:
+                return
+            name = rng.choices(names, weights)[0]
+            try:
+                response = await scenarios[name][0](client, rng, ctx)
+                code = response.status_code
+            except httpx.HTTPError:
+                code = 599
+            finished = time.perf_counter()
+            if now >= measure_from:
+                latencies[name].append(finished - now)
+                statuses[name][code] = statuses[name].get(code, 0) + 1
+
+    with RssSampler(pid) as sampler:
+        await asyncio.gather(*(worker(i) for i in range(concurrency)))
+    return summarize(latencies, statuses, duration, sampler.peak)
+
+
+async def run_open_loop(client, name: str, scenario, ctx: BenchContext, rate: float, duration: float,
+                        warmup: float, seed: int) -> Dict[str, dict]:
+    """
+    Lanza `scenario` a `rate` peticiones por segundo durante `warmup + duration`
+    segundos sin esperar a las respuestas (bucle abierto): un atacante no
+    frena porque el servidor tarde. La latencia se cuenta desde el instante
+    previsto de envío, no desde el real.
+    """
+    rng = random.Random(seed)
+    latencies: List[float] = []
+    statuses: Dict[int, int] = {}
+    start = time.perf_counter()
+    measure_from = start + warmup
+    deadline = measure_from + duration
+
+    async def fire(scheduled: float):
+        try:
+            code = (await scenario(client, rng, ctx)).status_code
+        except httpx.HTTPError:
+            code = 599
+        if scheduled >= measure_from:
+            latencies.append(time.perf_counter() - scheduled)
+            statuses[code] = statuses.get(code, 0) + 1
+
+    tasks = []
+    sent = 0
+    while True:
+        scheduled = start + sent / rate
+        if scheduled >= deadline:
+            break
+        delay = scheduled - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        tasks.append(asyncio.create_task(fire(scheduled)))
+        sent += 1
+    await asyncio.gather(*tasks)
+    return summarize({name: latencies}, {name: statuses}, duration, 0)
+
+
+async def run_login_flood(client, flood_client, pid: int, args, ctx: BenchContext) -> Dict[str, dict]:
+    """
+    Lecturas solas y lecturas con una inundación de logins en bucle abierto
+    (`--flood-rate` por segundo, por encima del cubo por IP del limitador).
+    Devuelve las fases y una comparación del p95 de cada lectura.
+    """
+    print("  phase reads ...", flush=True)
+    baseline = await run_phase(client, READ_SCENARIOS, ctx, args.concurrency, args.duration, args.warmup,
+                               pid, args.seed)
+    print(f"  phase reads+login_flood ({args.flood_rate:g} req/s) ...", flush=True)
+    flooded, flood = await asyncio.gather(
+        run_phase(client, READ_SCENARIOS, ctx, args.concurrency, args.duration, args.warmup, pid, args.seed),
+        run_open_loop(flood_client, "users.login_flood", login_flood, ctx, args.flood_rate, args.duration,
+                      args.warmup, args.seed),
+    )
+    flood_stats = flood["users.login_flood"]
+    comparison = {
+        name: {
+            "p95_ms": baseline[name]["p95_ms"],
+            "p95_ms_under_flood": flooded[name]["p95_ms"],
+            "p95_ratio": round(flooded[name]["p95_ms"] / baseline[name]["p95_ms"], 3) if baseline[name]["p95_ms"] else None,
+        }
+        for name in READ_SCENARIOS
+    }
+    return {
+        "reads": baseline,
+        "reads+login_flood": dict(flooded, **flood),
+        "login_flood": {
+            "rate_rps": args.flood_rate,
+            "rate_limited": int(flood_stats["status_counts"].get("429", 0)),
+            "requests": flood_stats["requests"],
+            "reads": comparison,
+        },
+    }
+
+
+def check_login_flood(results: Dict[str, dict]) -> List[str]:
+    """
+    Comprueba que en la fase de inundación el limitador rechazó peticiones.
+    """
+    failures = []
+    for target, phases in results.items():
+        flood = phases.get("login_flood") if isinstance(phases, dict) else None
+        if flood is None:
+            continue
+        ratios = ", ".join(f"{name} x{stats['p95_ratio']}" for name, stats in flood["reads"].items())
+        print(f"{target}: login flood {flood['rate_limited']}/{flood['requests']} rejected with 429; "
+              f"read p95 under flood: {ratios}")
+        if flood["rate_limited"] == 0:
+            failures.append(f"{target}: the login flood got no 429 responses, the rate limiter did not engage")
+    return failures
+
+
+async def run_target(client, pid: int, args, ctx: BenchContext, flood_client=None) -> Dict[str, dict]:
+    phases = {}
+    selected = {name: SCENARIOS[name] for name in args.scenarios}
+    if not args.mixed_only:
+        for name, scenario in selected.items():
+            print(f"  phase {name} ...", flush=True)
+            phases[name] = await run_phase(client, {name: scenario}, ctx, args.concurrency,
+                                           args.duration, args.warmup, pid, args.seed)
+    if len(selected) > 1:
+        print("  phase mixed ...", flush=True)
+        phases["mixed"] = await run_phase(client, selected, ctx, args.concurrency,
+                                          args.duration, args.warmup, pid, args.seed)
+    if args.login_flood:
+        # La latencia de las lecturas debe mantenerse plana con el ataque en curso
+        phases.update(await run_login_flood(client, flood_client or client, pid, args, ctx))
+    return phases
+
+
+async def get_token(client) -> str:
+    response = await client.post("/users/login", data={"username": bench_email(1), "password": BENCH_PASSWORD},
+                                 headers={"X-Forwarded-For": "10.0.0.1"})
+    response.raise_for_status()
+    return response.json()["access_token"]
+
+
+async def bench_inprocess(args) -> Dict[str, dict]:
+    import main
+
+    async with main.app.router.lifespan_context(main.app):
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            ctx = BenchContext(args.articles, args.users, args.roles, await get_token(client))
+            return await run_target(client, os.getpid(), args, ctx)
+
+
+async def wait_until_ready(client, process: subprocess.Popen, timeout: float = 30, interval: float = 0.1):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"uvicorn exited with code {process.returncode}")
+        try:
+            if (await client.get("/health/ready")).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        await asyncio.sleep(interval)
+    raise RuntimeError("uvicorn did not become ready in time")
+
+
+def uvicorn_command(port: int) -> List[str]:
+    return [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1",
+            "--port", str(port), "--log-level", "warning", "--no-access-log"]
+
+
+def stop_process(process: subprocess.Popen):
+    process.terminate()
+    try:
+        process.wait(timeout=10)
+    except subprocess.TimeoutExpired:
+        process.kill()
+
+
+async def timed_request(client, method: str, url: str, **kwargs) -> float:
+    start = time.perf_counter()
+    response = await client.request(method, url, **kwargs)
+    elapsed = time.perf_counter() - start
+    response.raise_for_status()
+    return round(elapsed * 1000, 3)
+
+
+async def bench_startup(args, env: Dict[str, str]) -> Dict[str, dict]:
+    """
+    Arranque en frío con uvicorn, `--startup-runs` veces (mediana):
+    - import_to_ready_ms: desde lanzar el proceso hasta que `/health/ready` responde 200.
+    - first_request_ms / first_login_ms: primera lectura del listado y
+      primer login, que sin calentamiento pagan conexiones, compilación de
+      consultas y creación de los procesos de bcrypt.
+    """
+    samples: Dict[str, List[float]] = {"import_to_ready_ms": [], "first_request_ms": [], "first_login_ms": []}
+    for run in range(args.startup_runs):
+        start = time.perf_counter()
+        process = subprocess.Popen(uvicorn_command(args.port), cwd=str(ROOT), env=env)
+        try:
+            async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{args.port}", timeout=30) as client:
+                await wait_until_ready(client, process, interval=0.01)
+                samples["import_to_ready_ms"].append(round((time.perf_counter() - start) * 1000, 3))
+                samples["first_request_ms"].append(await timed_request(client, "GET", "/articles/?limit=20"))
+                samples["first_login_ms"].append(await timed_request(
+                    client, "POST", "/users/login", data={"username": bench_email(1), "password": BENCH_PASSWORD},
+                    headers={"X-Forwarded-For": f"10.1.0.{run + 1}"}))
+        finally:
+            stop_process(process)
+    return {"cold_start": {"uvicorn": {name: round(statistics.median(values), 3) for name, values in samples.items()}}}
+
+
+async def bench_uvicorn(args, env: Dict[str, str]) -> Dict[str, dict]:
+    process = subprocess.Popen(uvicorn_command(args.port), cwd=str(ROOT), env=env)
+    try:
+        limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+        # El ataque usa su propio cliente, sin límite de conexiones: no debe
+        # esperar a que las lecturas liberen una ni quitársela a ellas
+        flood_limits = httpx.Limits(max_connections=None, max_keepalive_connections=None)
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{args.port}", limits=limits, timeout=30) as client, \
+                httpx.AsyncClient(base_url=f"http://127.0.0.1:{args.port}", limits=flood_limits,
+                                  timeout=30) as flood_client:
+            await wait_until_ready(client, process)
+            ctx = BenchContext(args.articles, args.users, args.roles, await get_token(client))
+            return await run_target(client, process.pid, args, ctx, flood_client)
+    finally:
+        stop_process(process)
+
+
+def git_revision() -> Optional[str]:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=str(ROOT),
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Gela API load benchmark")
+    parser.add_argument("--target", choices=["inprocess", "uvicorn", "both"], default="both")
+    parser.add_argument("--db-path", help="SQLite file to use (default: temporary file)")
+    parser.add_argument("--articles", type=int, default=10000)
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--roles", type=int, default=3)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=10.0, help="Measured seconds per phase")
+    parser.add_argument("--warmup", type=float, default=1.0, help="Unmeasured seconds per phase")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS),
+                        help=f"Comma-separated subset of: {', '.join(SCENARIOS)}")
+    parser.add_argument("--mixed-only", action="store_true", help="Skip the per-endpoint phases")
+    parser.add_argument("--login-flood", action="store_true",
+                        help="Add read-only phases with and without a single-origin login flood")
+    parser.add_argument("--flood-rate", type=float, default=100.0,
+                        help="Login flood requests per second (open loop; must exceed RATE_LIMIT_LOGIN_IP)")
+    parser.add_argument("--startup-runs", type=int, default=3,
+                        help="Cold starts measured with uvicorn (0 = skip the startup phase)")
+    parser.add_argument("--bcrypt-rounds", type=int, default=10)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default="bench_results.json")
+    args = parser.parse_args(argv)
+    args.scenarios = [name.strip() for name in args.scenarios.split(",") if name.strip()]
+    unknown = set(args.scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    db_path = Path(args.db_path or Path(tempfile.mkdtemp(prefix="gela-bench-")) / "bench.db").resolve()
+
+    # Las URLs se leen al importar db.database, así que se fijan antes de cualquier import de la app.
+    # El limitador toma la IP de X-Forwarded-For para simular clientes distintos; el
+    # límite por email se relaja para que la fase de login mida bcrypt y no el limitador.
+    env = dict(os.environ,
+               DATABASE_URL=f"sqlite:///{db_path}",
+               ASYNC_DATABASE_URL=f"sqlite+aiosqlite:///{db_path}",
+               BCRYPT_ROUNDS=str(args.bcrypt_rounds),
+               RATE_LIMIT_TRUST_FORWARDED="true")
+    env.setdefault("RATE_LIMIT_LOGIN_EMAIL", "1000000/1")
+    os.environ.update(env)
+
+    from db.database import engine
+
+    print(f"Seeding {db_path} ({args.articles} articles, {args.users} users) ...", flush=True)
+    seed_database(engine, args.articles, args.users, args.roles, args.bcrypt_rounds, args.seed)
+
+    results = {}
+    if args.startup_runs > 0:
+        print(f"Startup: {args.startup_runs} cold start(s) with uvicorn", flush=True)
+        results["startup"] = asyncio.run(bench_startup(args, env))
+    if args.target in ("inprocess", "both"):
+        print("Target: in-process ASGI", flush=True)
+        results["inprocess"] = asyncio.run(bench_inprocess(args))
+    if args.target in ("uvicorn", "both"):
+        print("Target: uvicorn", flush=True)
+        results["uvicorn"] = asyncio.run(bench_uvicorn(args, env))
+
+    report = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "git_revision": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "config": {key: value for key, value in vars(args).items() if key != "output"},
+        },
+        "results": results,
+    }
+    with open(args.output, "w") as output:
+        json.dump(report, output, indent=2)
+    print(f"Results written to {args.output}")
+
+    failures = check_login_flood(results)
+    if failures:
+        sys.exit("\n".join(failures))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""
+Crea el esquema y carga datos sintéticos reproducibles para los benchmarks.
+"""
+import random
+
+from passlib.hash import bcrypt
+from sqlalchemy import insert
+
+BENCH_PASSWORD = "benchpass123"
+# Dominio que pasa la validación de EmailStr (".local" es un nombre reservado
+# y las respuestas de /users/ fallarían al validar)
+BENCH_EMAIL_DOMAIN = "example.com"
+ARTICLE_TYPES = ["ropa", "hogar", "electrónica", "deporte", "juguetes", "libros", "jardín", "cocina"]
+WORDS = ["rojo", "azul", "verde", "algodón", "madera", "metal", "grande", "pequeño", "clásico",
+         "moderno", "ligero", "resistente", "premium", "básico", "infantil", "eco", "portátil"]
+
+
+def bench_email(index: int) -> str:
+    return f"user{index}@{BENCH_EMAIL_DOMAIN}"
+
+
+def seed_database(engine, articles: int, users: int, roles: int = 3, bcrypt_rounds: int = 12, seed: int = 42):
+    """
+    Borra y vuelve a crear las tablas y las llena con datos deterministas.
+    Todos los usuarios comparten la contraseña `BENCH_PASSWORD`.
+    """
+    from db import models
+    from db.article_model import Article
+    from db.article_stats_model import ArticleStats
+    from db.rol_model import Rol
+    from db.user_model import User
+    from utils.article_stats import aggregate_query
+
+    rng = random.Random(seed)
+    models.Base.metadata.drop_all(engine)
+    models.Base.metadata.create_all(engine)
+
+    password_hash = bcrypt.using(rounds=bcrypt_rounds).hash(BENCH_PASSWORD)
+    with engine.begin() as conn:
+        conn.execute(insert(Rol), [{"rol": f"rol{i}"} for i in range(1, roles + 1)])
+        conn.execute(insert(User), [
+            {"name": f"Usuario {i}", "email": bench_email(i), "password": password_hash,
+             "roleId": rng.randint(1, roles)}
+            for i in range(1, users + 1)
+        ])
+        batch = []
+        for i in range(1, articles + 1):
+            words = rng.sample(WORDS, 3)
+            batch.append({
+                "name": f"{words[0].capitalize()} {words[1]} {i}",
+                "type": rng.choice(ARTICLE_TYPES),
+                "description": " ".join(rng.sample(WORDS, 6)),
+                "price": round(rng.uniform(1, 500), 2),
+                "available_quantity": rng.randint(0, 100),
+            })
+            if len(batch) == 5000:
+                conn.execute(insert(Article), batch)
+                batch = []
+        if batch:
+            conn.execute(insert(Article), batch)
+        # Resumen de /articles/stats a partir de los artículos insertados
+        conn.execute(insert(ArticleStats).from_select(
+            ["type", "article_count", "total_stock", "inventory_value"], aggregate_query()))
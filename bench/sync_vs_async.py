@@ -0,0 +1,149 @@
+"""
+Comparación de los dos modelos de ejecución de las rutas con base de datos:
+
+- sync: `def` con la sesión bloqueante (`SessionLocal`); Starlette la
+  ejecuta en su threadpool (40 hilos por defecto).
+- async: `async def` con `AsyncSession` (aiosqlite), como las rutas actuales.
+
+Las dos rutas hacen la misma consulta (una página de artículos) sobre el
+mismo SQLite sembrado. SQLite está en el mismo proceso, sin la latencia de
+red de MySQL; `--db-latency-ms` la simula con una espera por consulta que
+bloquea el hilo en la versión síncrona (como un driver bloqueante) y cede
+el bucle de eventos en la asíncrona.
+
+Ejemplo:
+    python -m bench.sync_vs_async --concurrency 1,16,64,256 --db-latency-ms 2 --output sync_vs_async.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List
+
+import httpx
+
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from bench.run import percentile  # noqa: E402
+from bench.seed import seed_database  # noqa: E402
+
+PAGE_SIZE = 20
+
+
+def build_app(latency: float):
+    """
+    Aplicación mínima con la misma consulta en una ruta síncrona y otra asíncrona.
+    """
+    from fastapi import Depends, FastAPI
+    from sqlalchemy import select
+    from sqlalchemy.ext.asyncio import AsyncSession
+    from sqlalchemy.orm import Session
+
+    from db.article_model import Article as DBArticle
+    from db.database import get_async_db, get_db
+    from schemas.article import Article as ArticleSchema
+
+    app = FastAPI()
+    query = select(DBArticle).order_by(DBArticle.id).limit(PAGE_SIZE)
+
+    @app.get("/sync")
+    def list_sync(db: Session = Depends(get_db)):
+        if latency:
+            time.sleep(latency)
+        return [ArticleSchema.model_validate(row, from_attributes=True) for row in db.scalars(query).all()]
+
+    @app.get("/async")
+    async def list_async(db: AsyncSession = Depends(get_async_db)):
+        if latency:
+            await asyncio.sleep(latency)
+        return [ArticleSchema.model_validate(row, from_attributes=True) for row in (await db.scalars(query)).all()]
+
+    return app
+
+
+async def run_level(client, path: str, concurrency: int, duration: float, warmup: float) -> Dict[str, float]:
+    latencies: List[float] = []
+    errors = 0
+    start = time.perf_counter()
+    measure_from = start + warmup
+    deadline = measure_from + duration
+
+    async def worker():
+        nonlocal errors
+        while True:
+            now = time.perf_counter()
+            if now >= deadline:
+                return
+            response = await client.get(path)
+            if now >= measure_from:
+                latencies.append(time.perf_counter() - now)
+                errors += response.status_code != 200
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "throughput_rps": round(len(latencies) / duration, 2),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+    }
+
+
+async def compare(args) -> Dict[str, Dict[str, dict]]:
+    from db.database import async_engine
+
+    app = build_app(args.db_latency_ms / 1000)
+    results: Dict[str, Dict[str, dict]] = {}
+    transport = httpx.ASGITransport(app=app)
+    limits = httpx.Limits(max_connections=None, max_keepalive_connections=None)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", limits=limits) as client:
+        for concurrency in args.concurrency:
+            for mode in ("sync", "async"):
+                print(f"  {mode} concurrency={concurrency} ...", flush=True)
+                results.setdefault(f"c{concurrency}", {})[mode] = await run_level(
+                    client, f"/{mode}", concurrency, args.duration, args.warmup)
+    await async_engine.dispose()
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Sync vs async route throughput")
+    parser.add_argument("--articles", type=int, default=2000)
+    parser.add_argument("--concurrency", default="1,16,64,256")
+    parser.add_argument("--duration", type=float, default=5.0)
+    parser.add_argument("--warmup", type=float, default=0.5)
+    parser.add_argument("--db-latency-ms", type=float, default=2.0,
+                        help="Simulated network round trip per query (0 = local SQLite only)")
+    parser.add_argument("--output")
+    args = parser.parse_args(argv)
+    args.concurrency = [int(level) for level in args.concurrency.split(",")]
+
+    db_path = Path(tempfile.mkdtemp(prefix="gela-bench-")) / "bench.db"
+    # Pools con sitio para la concurrencia más alta: se mide el modelo de
+    # ejecución, no la espera por una conexión libre
+    os.environ.update(DATABASE_URL=f"sqlite:///{db_path}", ASYNC_DATABASE_URL=f"sqlite+aiosqlite:///{db_path}",
+                      DB_POOL_SIZE=str(max(args.concurrency)), DB_MAX_OVERFLOW="0")
+    from db.database import engine
+
+    seed_database(engine, args.articles, users=1, bcrypt_rounds=4)
+    results = asyncio.run(compare(args))
+
+    print(f"{'level':8} {'mode':6} {'rps':>10} {'p50 ms':>9} {'p99 ms':>9} {'errors':>7}")
+    for level, modes in results.items():
+        for mode, stats in modes.items():
+            print(f"{level:8} {mode:6} {stats['throughput_rps']:>10} {stats['p50_ms']:>9} "
+                  f"{stats['p99_ms']:>9} {stats['errors']:>7}")
+    if args.output:
+        with open(args.output, "w") as output:
+            json.dump({"db_latency_ms": args.db_latency_ms, "results": results}, output, indent=2)
+
+
+if __name__ == "__main__":
+    main()
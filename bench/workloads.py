@@ -0,0 +1,105 @@
+"""
+Escenarios de carga. Cada escenario es una corrutina que recibe el cliente
+HTTP, un generador aleatorio y el contexto compartido, y devuelve la
+respuesta de una petición.
+"""
+import random
+
+from bench.seed import ARTICLE_TYPES, BENCH_PASSWORD, WORDS, bench_email
+
+
+class BenchContext:
+    def __init__(self, articles: int, users: int, roles: int, token: str):
+        self.articles = articles
+        self.users = users
+        self.roles = roles
+        self.auth_headers = {"Authorization": f"Bearer {token}"}
+
+
+async def list_articles(client, rng: random.Random, ctx: BenchContext):
+    params = {"limit": 50}
+    if rng.random() < 0.3:
+        params["type"] = rng.choice(ARTICLE_TYPES)
+    return await client.get("/articles/", params=params)
+
+
+async def get_article(client, rng: random.Random, ctx: BenchContext):
+    return await client.get(f"/articles/{rng.randint(1, ctx.articles)}")
+
+
+async def search_articles(client, rng: random.Random, ctx: BenchContext):
+    return await client.get("/articles/search", params={"q": " ".join(rng.sample(WORDS, 2)), "limit": 20})
+
+
+def random_client_ip(rng: random.Random) -> dict:
+    """
+    Cabecera X-Forwarded-For con una IP aleatoria, para que los logins
+    legítimos no compartan el cubo por IP del limitador.
+    """
+    return {"X-Forwarded-For": f"10.{rng.randint(0, 255)}.{rng.randint(0, 255)}.{rng.randint(1, 254)}"}
+
+
+async def login(client, rng: random.Random, ctx: BenchContext):
+    email = bench_email(rng.randint(1, ctx.users))
+    return await client.post("/users/login", data={"username": email, "password": BENCH_PASSWORD},
+                             headers=random_client_ip(rng))
+
+
+async def login_flood(client, rng: random.Random, ctx: BenchContext):
+    """
+    Ataque de fuerza bruta: un único origen probando contraseñas.
+    """
+    email = bench_email(rng.randint(1, ctx.users))
+    return await client.post("/users/login", data={"username": email, "password": f"wrong{rng.random()}"},
+                             headers={"X-Forwarded-For": "203.0.113.66"})
+
+
+async def update_article(client, rng: random.Random, ctx: BenchContext):
+    article_id = rng.randint(1, ctx.articles)
+    body = {
+        "name": f"Artículo {article_id}",
+        "type": rng.choice(ARTICLE_TYPES),
+        "description": " ".join(rng.sample(WORDS, 6)),
+        "price": round(rng.uniform(1, 500), 2),
+        "available_quantity": rng.randint(0, 100),
+    }
+    return await client.put(f"/articles/{article_id}", json=body, headers=ctx.auth_headers)
+
+
+async def patch_article(client, rng: random.Random, ctx: BenchContext):
+    body = {"price": round(rng.uniform(1, 500), 2), "available_quantity": rng.randint(0, 100)}
+    return await client.patch(f"/articles/{rng.randint(1, ctx.articles)}", json=body, headers=ctx.auth_headers)
+
+
+async def list_users(client, rng: random.Random, ctx: BenchContext):
+    params = {"limit": 50}
+    if rng.random() < 0.5:
+        params["expand"] = "role"
+    return await client.get("/users/", params=params, headers=ctx.auth_headers)
+
+
+async def list_roles(client, rng: random.Random, ctx: BenchContext):
+    return await client.get("/roles/")
+
+
+async def get_role(client, rng: random.Random, ctx: BenchContext):
+    return await client.get(f"/roles/{rng.randint(1, ctx.roles)}")
+
+
+# Nombre del escenario -> (función, peso en la carga mixta)
+SCENARIOS = {
+    "articles.list": (list_articles, 30),
+    "articles.get": (get_article, 30),
+    "articles.search": (search_articles, 10),
+    "users.login": (login, 2),
+    "articles.update": (update_article, 4),
+    "articles.patch": (patch_article, 4),
+    "users.list": (list_users, 4),
+    "roles.list": (list_roles, 10),
+    "roles.get": (get_role, 10),
+}
+
+# Fase de inundación de logins (--login-flood): las lecturas se miden solas y
+# luego mientras `login_flood` se lanza a ritmo fijo (bucle abierto, ver
+# `bench.run.run_open_loop`), sin esperar a que respondan los anteriores
+READ_SCENARIOS = {name: SCENARIOS[name] for name in ("articles.list", "articles.get", "roles.get")}
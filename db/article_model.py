@@ -1,6 +1,7 @@
-from sqlalchemy import Integer, String,DateTime, Time, Boolean, Column, Text, DECIMAL  
+from sqlalchemy import Integer, String,DateTime, Time, Boolean, Column, Text, DECIMAL, Index
+from sqlalchemy.dialects import mysql
 from sqlalchemy.sql import func
-from .models import Base
+from .models import Base, server_timestamp, utcnow
 
 class Article(Base):
    
@@ -12,6 +13,22 @@ class Article(Base):
     description = Column(Text, nullable=False)
     price = Column(DECIMAL(10,2), nullable=False)
     available_quantity = Column(Integer, nullable=False)
-    create_at = Column(DateTime(timezone=True),server_default=func.now())
+    create_at = Column(server_timestamp(), server_default=func.now())
+    # Fecha de la última modificación, con microsegundos en MySQL para que
+    # dos escrituras seguidas generen ETags distintos
+    updated_at = Column(DateTime(timezone=True).with_variant(mysql.DATETIME(fsp=6), "mysql"),
+                        default=utcnow, onupdate=utcnow)
+    # Versión de la fila: cada escritura la incrementa. Es el ETag del
+    # artículo y permite actualizaciones condicionales con If-Match
+    version = Column(Integer, nullable=False, default=1, server_default="1")
 
-    
\ No newline at end of file
+    # Índices para el listado paginado: cada combinación de filtro y orden
+    # del keyset se resuelve con un único rango sobre el índice.
+    __table_args__ = (
+        Index("ix_articles_type_id", "type", "id"),
+        Index("ix_articles_type_price_id", "type", "price", "id"),
+        Index("ix_articles_price_id", "price", "id"),
+        Index("ix_articles_create_at_id", "create_at", "id"),
+        # Índice de texto completo para /articles/search (solo MySQL)
+        Index("ft_articles_text", "name", "type", "description", mysql_prefix="FULLTEXT").ddl_if(dialect="mysql"),
+    )
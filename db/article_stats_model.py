@@ -0,0 +1,19 @@
+from sqlalchemy import BigInteger, Column, DateTime, DECIMAL, Integer, String
+from sqlalchemy.dialects import mysql
+from .models import Base
+
+class ArticleStats(Base):
+    """
+    Resumen del inventario por tipo de artículo.
+
+    Las escrituras de artículos le aplican sus diferencias en la misma
+    transacción (`utils.article_stats`), de modo que `/articles/stats` no
+    recorre la tabla `articles`. La reconciliación lo recalcula desde cero.
+    """
+    __tablename__ = "article_stats"
+
+    type = Column(String(255), primary_key=True)
+    article_count = Column(Integer, nullable=False, default=0)
+    total_stock = Column(BigInteger, nullable=False, default=0)
+    inventory_value = Column(DECIMAL(20, 2), nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True).with_variant(mysql.DATETIME(fsp=6), "mysql"), nullable=True)
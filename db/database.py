@@ -1,22 +1,104 @@
+import os
+
 from sqlalchemy import create_engine
-from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool, QueuePool
+
+from utils.db_pool import register_engine, timed_pool_class
+from utils.metrics import instrument_engine
+from utils.slow_queries import slow_query_log
 
 # Configuración de la base de datos
-# Configuración de la base de datos
-SQLALCHEMY_DATABASE_URL = "mysql+pymysql://root:@localhost/gela"
+# Las URLs se pueden sobrescribir con variables de entorno (por ejemplo para
+# apuntar a un SQLite local con `sqlite:///gela.db` y `sqlite+aiosqlite:///gela.db`).
+SQLALCHEMY_DATABASE_URL = os.getenv("DATABASE_URL", "mysql+pymysql://root:@localhost/gela")
+ASYNC_SQLALCHEMY_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL", "mysql+aiomysql://root:@localhost/gela")
+
+# Réplica de solo lectura opcional para las rutas GET. Si no se define, las
+# lecturas van a la base de datos principal.
+ASYNC_READ_DATABASE_URL = os.getenv("ASYNC_READ_DATABASE_URL", "")
+# URL síncrona de la misma réplica, solo para los EXPLAIN de sus consultas
+# lentas. Sin ella esas consultas se registran sin plan.
+READ_DATABASE_URL = os.getenv("READ_DATABASE_URL", "")
+
+# Configuración del pool de conexiones (por motor)
+# - DB_POOL_SIZE: conexiones que se mantienen abiertas.
+# - DB_MAX_OVERFLOW: conexiones extra permitidas en picos.
+# - DB_POOL_TIMEOUT: segundos de espera por una conexión libre antes de fallar.
+# - DB_POOL_RECYCLE: segundos tras los que una conexión se renueva (debe ser
+#   menor que el `wait_timeout` de MySQL; -1 desactiva).
+# - DB_POOL_PRE_PING: comprobar la conexión en cada checkout. Cuesta un viaje
+#   de ida y vuelta por petición; con DB_POOL_RECYCLE bien ajustado se puede
+#   desactivar.
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes")
+
+
+def _engine_options(url: str, name: str, pool_base) -> dict:
+    """
+    Opciones de `create_engine` a partir de la configuración del pool.
+    SQLite en memoria usa un pool propio sin tamaño, así que solo recibe el pre-ping.
+    """
+    options = {"pool_pre_ping": DB_POOL_PRE_PING}
+    parsed = make_url(url)
+    if parsed.get_backend_name() == "sqlite" and parsed.database in (None, "", ":memory:"):
+        return options
+    options.update(
+        poolclass=timed_pool_class(pool_base, name),
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT,
+        pool_recycle=DB_POOL_RECYCLE,
+    )
+    return options
+
 
 # Crea el motor de la base de datos. Esto es lo que se conecta a la base de datos.
-# El 'pool_pre_ping=True' ayuda a evitar problemas con conexiones inactivas.
-engine = create_engine(SQLALCHEMY_DATABASE_URL, pool_pre_ping=True)
+# Este motor síncrono se mantiene para scripts y tareas fuera de la API.
+engine = create_engine(SQLALCHEMY_DATABASE_URL, **_engine_options(SQLALCHEMY_DATABASE_URL, "sync", QueuePool))
 
 # Crea una clase SessionLocal para crear sesiones de base de datos.
 # Cada sesión es una "conversación" con la base de datos.
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
-# `Base` es una clase que los modelos de la base de datos heredarán.
-# Les dice a SQLAlchemy que estas son las clases que corresponden a las tablas.
-Base = declarative_base()
+# Motor y sesiones asíncronas que usan las rutas de la API.
+# `expire_on_commit=False` evita recargas implícitas (no permitidas en modo
+# asíncrono) al leer atributos después de un commit.
+async_engine = create_async_engine(ASYNC_SQLALCHEMY_DATABASE_URL,
+                                   **_engine_options(ASYNC_SQLALCHEMY_DATABASE_URL, "primary", AsyncAdaptedQueuePool))
+AsyncSessionLocal = async_sessionmaker(bind=async_engine, class_=AsyncSession,
+                                       autoflush=False, expire_on_commit=False)
+
+# Motor de lectura: la réplica si está configurada, si no el principal
+if ASYNC_READ_DATABASE_URL:
+    async_read_engine = create_async_engine(ASYNC_READ_DATABASE_URL,
+                                            **_engine_options(ASYNC_READ_DATABASE_URL, "replica", AsyncAdaptedQueuePool))
+    AsyncReadSessionLocal = async_sessionmaker(bind=async_read_engine, class_=AsyncSession,
+                                               autoflush=False, expire_on_commit=False)
+else:
+    async_read_engine = async_engine
+    AsyncReadSessionLocal = AsyncSessionLocal
+
+# Cuenta y mide las consultas de todos los motores (ver /metrics) y registra
+# las lentas. Cada consulta se pasa por EXPLAIN en el mismo servidor que la
+# ejecutó: las de la réplica, con un motor síncrono de la réplica (sin pool,
+# los EXPLAIN son esporádicos) o sin plan si no hay `READ_DATABASE_URL`.
+register_engine("sync", engine)
+register_engine("primary", async_engine)
+explain_engines = {engine: engine, async_engine.sync_engine: engine}
+if async_read_engine is not async_engine:
+    register_engine("replica", async_read_engine)
+    explain_engines[async_read_engine.sync_engine] = (
+        create_engine(READ_DATABASE_URL, poolclass=NullPool) if READ_DATABASE_URL else None
+    )
+for sync_engine, explain_engine in explain_engines.items():
+    instrument_engine(sync_engine)
+    slow_query_log.install(sync_engine, explain_engine=explain_engine)
 
 def get_db():
     """
@@ -28,3 +110,21 @@ def get_db():
         yield db
     finally:
         db.close()
+
+async def get_async_db():
+    """
+    Versión asíncrona de `get_db` usada por las rutas `async def`.
+    Siempre apunta a la base de datos principal: se usa para escrituras y
+    para las lecturas que deben ver una escritura recién hecha.
+    """
+    async with AsyncSessionLocal() as db:
+        yield db
+
+async def get_read_db():
+    """
+    Sesión para las rutas GET de solo lectura. Usa la réplica si
+    `ASYNC_READ_DATABASE_URL` está definida; puede ir algo por detrás de la
+    principal.
+    """
+    async with AsyncReadSessionLocal() as db:
+        yield db
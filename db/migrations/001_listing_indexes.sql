@@ -0,0 +1,6 @@
+-- Índices para el listado paginado de artículos y usuarios (keyset).
+CREATE INDEX ix_articles_type_id ON articles (type, id);
+CREATE INDEX ix_articles_type_price_id ON articles (type, price, id);
+CREATE INDEX ix_articles_price_id ON articles (price, id);
+CREATE INDEX ix_articles_create_at_id ON articles (create_at, id);
+CREATE INDEX ix_users_created_at_id ON users (created_at, id);
@@ -0,0 +1,9 @@
+-- Fecha de modificación de artículos y versiones por tabla (ETags).
+ALTER TABLE articles ADD COLUMN updated_at DATETIME(6) NULL;
+UPDATE articles SET updated_at = create_at WHERE updated_at IS NULL;
+
+CREATE TABLE table_versions (
+    name VARCHAR(64) NOT NULL PRIMARY KEY,
+    version INT NOT NULL DEFAULT 0,
+    updated_at DATETIME(6) NULL
+);
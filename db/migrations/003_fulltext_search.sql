@@ -0,0 +1,2 @@
+-- Índice de texto completo para la búsqueda de artículos.
+CREATE FULLTEXT INDEX ft_articles_text ON articles (name, type, description);
@@ -0,0 +1,16 @@
+-- Refresh tokens rotativos (solo se guarda el hash del token).
+CREATE TABLE refresh_tokens (
+    id INT NOT NULL AUTO_INCREMENT PRIMARY KEY,
+    token_hash VARCHAR(64) NOT NULL,
+    family_id VARCHAR(32) NOT NULL,
+    user_id INT NOT NULL,
+    expires_at DATETIME NOT NULL,
+    created_at DATETIME NOT NULL,
+    rotated_at DATETIME NULL,
+    revoked_at DATETIME NULL,
+    UNIQUE KEY uq_refresh_tokens_token_hash (token_hash),
+    KEY ix_refresh_tokens_family_id (family_id),
+    KEY ix_refresh_tokens_user_id (user_id),
+    KEY ix_refresh_tokens_revoked_expires (revoked_at, expires_at),
+    CONSTRAINT fk_refresh_tokens_user FOREIGN KEY (user_id) REFERENCES users (id) ON DELETE CASCADE
+);
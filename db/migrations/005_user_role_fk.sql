@@ -0,0 +1,5 @@
+-- Clave foránea users.roleId -> roles.id e índice para listar usuarios por rol.
+-- Antes de aplicarla, no debe haber usuarios con un rol inexistente:
+--   SELECT id, roleId FROM users WHERE roleId NOT IN (SELECT id FROM roles);
+CREATE INDEX ix_users_roleId_id ON users (roleId, id);
+ALTER TABLE users ADD CONSTRAINT fk_users_role FOREIGN KEY (roleId) REFERENCES roles (id);
@@ -0,0 +1,2 @@
+-- Versión de cada artículo (ETag y actualizaciones condicionales con If-Match).
+ALTER TABLE articles ADD COLUMN version INT NOT NULL DEFAULT 1;
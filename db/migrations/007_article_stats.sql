@@ -0,0 +1,13 @@
+-- Resumen del inventario por tipo para /articles/stats, cargado con los datos actuales.
+CREATE TABLE article_stats (
+    type VARCHAR(255) NOT NULL PRIMARY KEY,
+    article_count INT NOT NULL DEFAULT 0,
+    total_stock BIGINT NOT NULL DEFAULT 0,
+    inventory_value DECIMAL(20, 2) NOT NULL DEFAULT 0,
+    updated_at DATETIME(6) NULL
+);
+
+INSERT INTO article_stats (type, article_count, total_stock, inventory_value, updated_at)
+SELECT type, COUNT(*), SUM(available_quantity), SUM(price * available_quantity), UTC_TIMESTAMP(6)
+FROM articles
+GROUP BY type;
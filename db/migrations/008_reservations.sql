@@ -0,0 +1,11 @@
+-- Reservas de inventario: lo que descontó cada una, para liberarla una sola vez.
+CREATE TABLE reservations (
+    id INT NOT NULL AUTO_INCREMENT PRIMARY KEY,
+    user_id INT NOT NULL,
+    items JSON NOT NULL,
+    status VARCHAR(16) NOT NULL DEFAULT 'active',
+    created_at DATETIME NOT NULL,
+    released_at DATETIME NULL,
+    KEY ix_reservations_user_id (user_id),
+    CONSTRAINT fk_reservations_user FOREIGN KEY (user_id) REFERENCES users (id) ON DELETE CASCADE
+);
@@ -1,8 +1,32 @@
-from sqlalchemy.ext.declarative import declarative_base
+from datetime import datetime, timezone
+from sqlalchemy import DateTime
+from sqlalchemy.dialects import sqlite
+from sqlalchemy.orm import declarative_base
 
+# Registro único de los modelos: `Base.metadata` contiene todas las tablas
+# (la usan las migraciones, `create_all` y el benchmark).
 Base = declarative_base()
 
+def utcnow():
+    """
+    Fecha y hora actual en UTC sin zona horaria, como se guarda en DATETIME.
+    """
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+def server_timestamp():
+    """
+    Tipo de las fechas de creación que rellena la base de datos (`now()`).
+    En SQLite `CURRENT_TIMESTAMP` se guarda como texto sin microsegundos; los
+    valores enlazados con este tipo (los cursores del keyset) usan el mismo
+    formato, porque SQLite los compara como cadenas.
+    """
+    return DateTime(timezone=True).with_variant(sqlite.DATETIME(truncate_microseconds=True), "sqlite")
+
 # Importa todos los modelos para que sean reconocidos por los metadatos de SQLAlchemy.
 from . import article_model
 from . import user_model
-from . import rol_model
\ No newline at end of file
+from . import rol_model
+from . import version_model
+from . import refresh_token_model
+from . import article_stats_model
+from . import reservation_model
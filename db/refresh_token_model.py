@@ -0,0 +1,29 @@
+from sqlalchemy import Column, DateTime, ForeignKey, Index, Integer, String
+from .models import Base, utcnow
+
+class RefreshToken(Base):
+    """
+    SQLAlchemy model for the 'refresh_tokens' table.
+
+    Solo se guarda el SHA-256 del token. Todos los tokens que salen de un
+    mismo login comparten `family_id`: cada refresh marca el token usado como
+    rotado y emite otro de la misma familia, y revocar la familia invalida
+    la sesión completa.
+    """
+    __tablename__ = "refresh_tokens"
+
+    id = Column(Integer, primary_key=True)
+    token_hash = Column(String(64), nullable=False, unique=True)
+    family_id = Column(String(32), nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    expires_at = Column(DateTime, nullable=False)
+    created_at = Column(DateTime, nullable=False, default=utcnow)
+    rotated_at = Column(DateTime, nullable=True)
+    revoked_at = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        Index("ix_refresh_tokens_family_id", "family_id"),
+        Index("ix_refresh_tokens_user_id", "user_id"),
+        # Para cargar las familias revocadas vigentes al arrancar
+        Index("ix_refresh_tokens_revoked_expires", "revoked_at", "expires_at"),
+    )
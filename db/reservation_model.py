@@ -0,0 +1,24 @@
+from sqlalchemy import JSON, Column, DateTime, ForeignKey, Index, Integer, String
+from .models import Base, utcnow
+
+class Reservation(Base):
+    """
+    SQLAlchemy model for the 'reservations' table.
+
+    Guarda lo que descontó cada reserva (`items`, lista de
+    `{"article_id", "quantity"}`) para que al liberarla se devuelva
+    exactamente eso, una sola vez y solo por el usuario que la hizo.
+    """
+    __tablename__ = "reservations"
+
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    items = Column(JSON, nullable=False)
+    # "active" o "released"
+    status = Column(String(16), nullable=False, default="active")
+    created_at = Column(DateTime, nullable=False, default=utcnow)
+    released_at = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        Index("ix_reservations_user_id", "user_id"),
+    )
@@ -1,5 +1,5 @@
 from sqlalchemy import Column, Integer, String, DateTime, func
-from db.database import Base
+from .models import Base
 
 # ====================================================================
 # Modelo de la tabla de roles
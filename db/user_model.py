@@ -1,6 +1,7 @@
-from sqlalchemy import Column, Integer, String, DateTime
+from sqlalchemy import Column, ForeignKey, Integer, String, Index
+from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
-from .models import Base
+from .models import Base, server_timestamp
 
 class User(Base):
     """
@@ -12,5 +13,15 @@ class User(Base):
     name = Column(String(255), nullable=False)
     email = Column(String(255), unique=True, nullable=False)
     password = Column(String(255), nullable=False)
-    roleId = Column(Integer, nullable=False)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    roleId = Column(Integer, ForeignKey("roles.id", name="fk_users_role"), nullable=False)
+    created_at = Column(server_timestamp(), server_default=func.now())
+
+    # Solo se carga de forma explícita (`selectinload`), nunca una consulta por fila
+    role = relationship("Rol", lazy="raise")
+
+    # Índices para el listado paginado ordenado por fecha de creación y para
+    # listar los usuarios de un rol
+    __table_args__ = (
+        Index("ix_users_created_at_id", "created_at", "id"),
+        Index("ix_users_roleId_id", "roleId", "id"),
+    )
@@ -0,0 +1,14 @@
+from sqlalchemy import Column, Integer, String, DateTime
+from sqlalchemy.dialects import mysql
+from .models import Base
+
+class TableVersion(Base):
+    """
+    Versión por tabla. Cada escritura incrementa el contador de su tabla en
+    la misma transacción, lo que permite construir ETags sin leer las filas.
+    """
+    __tablename__ = "table_versions"
+
+    name = Column(String(64), primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True).with_variant(mysql.DATETIME(fsp=6), "mysql"), nullable=True)
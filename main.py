@@ -1,8 +1,14 @@
 import logging
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 from fastapi.security import OAuth2PasswordBearer
-from routers import articles, users, roles
+from db.database import async_engine, async_read_engine
+from routers import admin, articles, health, users, roles
+from utils import article_stats, hashing, metrics, rate_limit, startup
+from utils.invalidation import channel as invalidation_channel
+from utils.slow_queries import slow_query_log
 
 # Configuración básica de logging
 logging.basicConfig(level=logging.INFO,
@@ -10,11 +16,42 @@ logging.basicConfig(level=logging.INFO,
                     datefmt='%Y-%m-%d %H:%M:%S')
 logger = logging.getLogger(__name__)
 
+# ====================================================================
+# Ciclo de vida de la aplicación
+# ====================================================================
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Al arrancar: conecta el canal de invalidación, calienta pools, cachés y
+    consultas (ver `utils/startup.py`), lanza la reconciliación periódica de
+    las estadísticas de artículos si está configurada y marca el worker como
+    preparado (`/health/ready`).
+    Al detenerse: deja de estar preparado y libera los recursos (tareas,
+    canal, conexiones, procesos de bcrypt, backend del limitador).
+    """
+    await invalidation_channel.start()
+    await startup.warm_up()
+    article_stats.start_reconciler()
+    startup.mark_ready()
+    try:
+        yield
+    finally:
+        startup.mark_not_ready()
+        await article_stats.stop_reconciler()
+        await invalidation_channel.stop()
+        await async_engine.dispose()
+        if async_read_engine is not async_engine:
+            await async_read_engine.dispose()
+        hashing.shutdown_executor()
+        slow_query_log.shutdown()
+        await rate_limit.backend.close()
+
 # Inicializa la aplicación FastAPI
 app = FastAPI(
     title="Gela API",
     description="Una API simple con FastAPI y MySQL para gestionar usuarios y artículos.",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan,
 )
 
 # Configurar CORS para permitir solicitudes desde cualquier origen
@@ -26,6 +63,10 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Métricas por ruta (duración, códigos, consultas SQL) expuestas en /metrics.
+# Se añade después de CORS para que quede por fuera y mida la petición completa.
+app.add_middleware(metrics.MetricsMiddleware)
+
 # Configurar el esquema de seguridad para que Swagger UI pida "email"
 # en lugar de "username"
 oauth2_scheme = OAuth2PasswordBearer(
@@ -40,6 +81,8 @@ oauth2_scheme = OAuth2PasswordBearer(
 app.include_router(articles.router)
 app.include_router(users.router)
 app.include_router(roles.router)
+app.include_router(admin.router)
+app.include_router(health.router)
 
 # ====================================================================
 # Rutas de la API
@@ -50,3 +93,10 @@ def read_root():
     Ruta de prueba que retorna un mensaje de bienvenida.
     """
     return {"message": "¡Bienvenido a la Gela API!"}
+
+@app.get("/metrics", summary="Métricas en formato Prometheus", tags=["General"], include_in_schema=False)
+def read_metrics():
+    """
+    Expone las métricas de la API para que las recoja Prometheus.
+    """
+    return PlainTextResponse(metrics.render(), media_type=metrics.CONTENT_TYPE)
@@ -0,0 +1,72 @@
+from fastapi import APIRouter, Depends, Query, status
+from typing import Dict, List, Literal
+
+from schemas.admin import ArticleStatsReconciliation, ResponseCacheStats, SlowQuery
+from utils.article_stats import reconcile_article_stats
+from utils.auth import require_admin
+from utils.db_pool import all_pool_stats
+from utils.response_cache import all_cache_stats, invalidate_all
+from utils.slow_queries import slow_query_log
+
+router = APIRouter(
+    prefix="/admin",
+    tags=["Admin"],
+    dependencies=[Depends(require_admin)]
+)
+
+# ====================================================================
+# Rutas de diagnóstico
+# ====================================================================
+
+@router.get("/slow-queries", response_model=List[SlowQuery], summary="Consultas lentas más costosas")
+async def get_slow_queries(
+    limit: int = Query(20, ge=1, le=500),
+    order_by: Literal["total_ms", "max_ms", "count"] = Query("total_ms"),
+):
+    """
+    Lista las huellas de consultas lentas registradas desde el arranque,
+    ordenadas por tiempo total, tiempo máximo o número de ejecuciones.
+    Incluye el plan de `EXPLAIN` cuando se ha capturado.
+    """
+    return slow_query_log.top(limit, order_by)
+
+@router.delete("/slow-queries", status_code=status.HTTP_204_NO_CONTENT, summary="Vaciar el registro de consultas lentas")
+async def reset_slow_queries():
+    """
+    Vacía la tabla de consultas lentas (por ejemplo, tras añadir un índice).
+    """
+    slow_query_log.reset()
+
+@router.get("/pool", response_model=Dict[str, Dict[str, object]], summary="Estado de los pools de conexiones")
+async def get_pool_stats():
+    """
+    Conexiones en uso, desbordamiento y tiempo de espera de cada pool
+    (principal, réplica de lectura y motor síncrono).
+    """
+    return all_pool_stats()
+
+@router.post("/article-stats/reconcile", response_model=ArticleStatsReconciliation,
+             summary="Recalcular las estadísticas del inventario")
+async def reconcile_stats():
+    """
+    Recalcula desde cero el resumen de `/articles/stats` (recorre todos los
+    artículos) y devuelve los tipos que se habían desajustado.
+    """
+    return await reconcile_article_stats()
+
+@router.get("/response-cache", response_model=Dict[str, ResponseCacheStats],
+            summary="Estado de las cachés de respuestas")
+async def get_response_cache_stats():
+    """
+    Entradas, memoria, tasa de aciertos y bytes ahorrados de cada caché de
+    listados ya comprimidos.
+    """
+    return all_cache_stats()
+
+@router.delete("/response-cache", status_code=status.HTTP_204_NO_CONTENT,
+               summary="Vaciar las cachés de respuestas")
+async def clear_response_caches():
+    """
+    Vacía las cachés de respuestas de este worker.
+    """
+    invalidate_all()
@@ -1,13 +1,35 @@
 import logging
-from typing import List, Optional
-from fastapi import APIRouter, HTTPException, Depends, status
-from sqlalchemy.orm import Session
+import os
+from typing import List, Literal, Optional
+from fastapi import APIRouter, HTTPException, Depends, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.dialects.mysql import match as mysql_match
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.exc import SQLAlchemyError
 
-from db.database import get_db
-from schemas.article import Article as ArticleSchema, ArticleBase
+from db.database import get_async_db, get_read_db
+from schemas.article import (Article as ArticleSchema, ArticleBase, ArticlePage, ArticleBatchDelete,
+                             ArticleBatchUpdateItem, ArticleSearchPage, ArticleStats as ArticleStatsSchema,
+                             ArticleUpdate, BatchItemResult, BatchResult, Reservation as ReservationSchema,
+                             ReservationItem, ReservationRequest)
 from db.article_model import Article as DBArticle
+from db.models import utcnow
+from db.reservation_model import Reservation as DBReservation
+from db.user_model import User as DBUser
+from utils.article_changes import ArticleChangeSet, publish_article_changes
+from utils.article_stats import STATS_FIELDS, ArticleStatsDelta, read_article_stats
 from utils.auth import get_current_user
+from utils.change_feed import SSE_HEADERS, article_feed
+from utils.conditional import (has_conditional_headers, if_match_versions, is_not_modified, make_etag,
+                               not_modified_response, set_validators, validator_headers, version_etag)
+from utils.export import ExportFormat, export_response
+from utils.fast_response import encode, media_type, negotiate, rows_to_dicts, schema_columns
+from utils.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, apply_keyset, build_page
+from utils.patching import patch_row
+from utils.response_cache import article_list_cache
+from utils.search import search_index
+from utils.versioning import ARTICLES_TABLE, bump_table_version, get_table_version
 
 # Configuración básica de logging
 logging.basicConfig(level=logging.INFO,
@@ -25,60 +47,582 @@ router = APIRouter(
 # Rutas para la gestión de artículos (protegidas)
 # ====================================================================
 
-@router.get("/", response_model=List[ArticleSchema], summary="Get all articles")
-def get_articles(db: Session = Depends(get_db)):
-    articles = db.query(DBArticle).all()
-    return articles
+@router.get("/", response_model=ArticlePage, summary="List articles (paginated)")
+async def get_articles(
+    request: Request,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = Query(None, description="Token `next_cursor` de la página anterior"),
+    order_by: Literal["id", "create_at"] = Query("id"),
+    type: Optional[str] = Query(None, max_length=255),
+    min_price: Optional[float] = Query(None, ge=0),
+    max_price: Optional[float] = Query(None, ge=0),
+    in_stock: bool = Query(False, description="Solo artículos con `available_quantity > 0`"),
+    db: AsyncSession = Depends(get_read_db),
+):
+    """
+    Lista los artículos página a página. Con `Accept: application/msgpack` o
+    `FAST_LIST_RESPONSES` activo se usa el camino rápido (solo las columnas
+    necesarias, sin revalidar con pydantic).
+
+    Cada página se guarda ya codificada y comprimida en `article_list_cache`
+    hasta la siguiente escritura de artículos.
+    """
+    fmt = negotiate(request)
+
+    # La versión se lee antes que los datos: si una escritura ocurre entre
+    # ambas lecturas, el ETag queda "viejo" y el cliente volverá a descargar.
+    version, last_modified = await get_table_version(db, ARTICLES_TABLE)
+    etag = make_etag(ARTICLES_TABLE, version, request.url.query, *(("msgpack",) if fmt == "msgpack" else ()))
+    if is_not_modified(request, etag, last_modified):
+        return not_modified_response(etag, last_modified)
+
+    # El ETag identifica versión, consulta y formato: sirve de clave de la caché
+    cache_key = (fmt, etag)
+    cached = article_list_cache.get(cache_key)
+    if cached is not None:
+        return article_list_cache.respond(request, cached)
+
+    query = select(*schema_columns(DBArticle, ArticleSchema, order_by)) if fmt else select(DBArticle)
+    if type is not None:
+        query = query.where(DBArticle.type == type)
+    if min_price is not None:
+        query = query.where(DBArticle.price >= min_price)
+    if max_price is not None:
+        query = query.where(DBArticle.price <= max_price)
+    if in_stock:
+        query = query.where(DBArticle.available_quantity > 0)
+
+    statement = apply_keyset(query, DBArticle, order_by, cursor, limit)
+    if fmt:
+        rows, next_cursor = build_page((await db.execute(statement)).all(), order_by, limit)
+        body = encode({"items": rows_to_dicts(rows, ArticleSchema), "next_cursor": next_cursor}, fmt)
+    else:
+        rows = (await db.scalars(statement)).all()
+        items, next_cursor = build_page(rows, order_by, limit)
+        page = ArticlePage.model_validate({"items": items, "next_cursor": next_cursor}, from_attributes=True)
+        body = page.model_dump_json().encode()
+
+    entry = article_list_cache.put(cache_key, body, media_type(fmt), validator_headers(etag, last_modified))
+    return article_list_cache.respond(request, entry)
+
+@router.get("/stats", response_model=ArticleStatsSchema, summary="Inventory statistics per article type")
+async def get_article_stats(request: Request, response: Response, db: AsyncSession = Depends(get_read_db)):
+    """
+    Número de artículos, stock total y valor del inventario (`price *
+    available_quantity`) por tipo y en total. Se lee del resumen que
+    mantienen las escrituras, sin recorrer los artículos.
+    Admite peticiones condicionales, igual que el listado.
+    """
+    version, last_modified = await get_table_version(db, ARTICLES_TABLE)
+    etag = make_etag("article_stats", version)
+    if is_not_modified(request, etag, last_modified):
+        return not_modified_response(etag, last_modified)
+    set_validators(response, etag, last_modified)
+    return await read_article_stats(db)
+
+@router.get("/export", summary="Export all articles as NDJSON or CSV (protected)")
+async def export_articles(format: ExportFormat = Query("ndjson"), current_user: str = Depends(get_current_user)):
+    return export_response(DBArticle, ArticleSchema, format, "articles")
+
+# ====================================================================
+# Búsqueda de texto
+# ====================================================================
+
+# Límite del desplazamiento: más allá, la paginación por relevancia es cara
+SEARCH_MAX_OFFSET = 1000
+
+@router.get("/search", response_model=ArticleSearchPage, summary="Full-text search over articles")
+async def search_articles(
+    q: str = Query(..., min_length=1, max_length=255),
+    type: Optional[str] = Query(None, max_length=255),
+    min_price: Optional[float] = Query(None, ge=0),
+    max_price: Optional[float] = Query(None, ge=0),
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0, le=SEARCH_MAX_OFFSET),
+    db: AsyncSession = Depends(get_read_db),
+):
+    """
+    Busca en nombre, tipo y descripción y devuelve los resultados ordenados
+    por relevancia. En MySQL usa el índice FULLTEXT; en otros motores
+    (SQLite en desarrollo/pruebas) usa el índice invertido en memoria.
+    """
+    if db.bind.dialect.name == "mysql":
+        score = mysql_match(DBArticle.name, DBArticle.type, DBArticle.description, against=q).in_natural_language_mode()
+        query = select(DBArticle, score.label("score")).where(score > 0)
+        if type is not None:
+            query = query.where(DBArticle.type == type)
+        if min_price is not None:
+            query = query.where(DBArticle.price >= min_price)
+        if max_price is not None:
+            query = query.where(DBArticle.price <= max_price)
+        query = query.order_by(score.desc(), DBArticle.id).offset(offset).limit(limit + 1)
+        hits = [(article, score_value) for article, score_value in (await db.execute(query)).all()]
+    else:
+        # El índice se construye desde la principal para no partir de una réplica atrasada
+        await search_index.ensure_loaded()
+        ranked = search_index.search(q, type=type, min_price=min_price, max_price=max_price)[offset:offset + limit + 1]
+        articles = {}
+        if ranked:
+            rows = await db.scalars(select(DBArticle).where(DBArticle.id.in_([article_id for article_id, _ in ranked])))
+            articles = {article.id: article for article in rows}
+        hits = [(articles[article_id], score_value) for article_id, score_value in ranked if article_id in articles]
+
+    items = [
+        dict(ArticleSchema.model_validate(article, from_attributes=True).model_dump(), score=float(score_value))
+        for article, score_value in hits[:limit]
+    ]
+    next_offset = offset + limit if len(hits) > limit and offset + limit <= SEARCH_MAX_OFFSET else None
+    return {"items": items, "next_offset": next_offset}
+
+# ====================================================================
+# Operaciones por lotes (protegidas)
+# ====================================================================
+
+# Tamaño máximo de un lote y número de filas por sentencia/transacción
+ARTICLE_BATCH_MAX_SIZE = int(os.getenv("ARTICLE_BATCH_MAX_SIZE", "1000"))
+ARTICLE_BATCH_CHUNK_SIZE = int(os.getenv("ARTICLE_BATCH_CHUNK_SIZE", "200"))
+
+BatchMode = Literal["all_or_nothing", "partial"]
+
+_BATCH_OK = {"created", "updated", "deleted", "unchanged"}
+_BATCH_CHANGED = {"created", "updated", "deleted"}
+
+def _check_batch_size(size: int):
+    if size > ARTICLE_BATCH_MAX_SIZE:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Batch too large (max {ARTICLE_BATCH_MAX_SIZE} items)"
+        )
+
+async def _insert_chunk(db: AsyncSession, chunk, changes: ArticleChangeSet) -> List[BatchItemResult]:
+    now = utcnow()
+    rows = [dict(item.model_dump(), updated_at=now) for _, item in chunk]
+    if db.bind.dialect.insert_executemany_returning_sort_by_parameter_order:
+        # Un único INSERT multi-fila que devuelve los IDs en el orden enviado
+        statement = insert(DBArticle).returning(DBArticle.id, sort_by_parameter_order=True)
+        ids = (await db.scalars(statement, rows)).all()
+    else:
+        # Sin RETURNING (MySQL) el ORM necesita insertar fila a fila para conocer los IDs
+        objects = [DBArticle(**row) for row in rows]
+        db.add_all(objects)
+        await db.flush()
+        ids = [obj.id for obj in objects]
+    changes.upserted.extend(dict(row, id=article_id) for row, article_id in zip(rows, ids))
+    for row in rows:
+        changes.stats.add(row)
+    return [BatchItemResult(index=index, id=article_id, status="created")
+            for (index, _), article_id in zip(chunk, ids)]
+
+async def _lock_for_stats(db: AsyncSession, ids) -> dict:
+    """
+    Bloquea las filas y lee los valores que cuentan en las estadísticas,
+    para calcular la diferencia que deja la escritura.
+    """
+    rows = await db.execute(
+        select(DBArticle.id, *(getattr(DBArticle, field) for field in STATS_FIELDS))
+        .where(DBArticle.id.in_(ids)).with_for_update()
+    )
+    return {row.id: row for row in rows}
+
+async def _update_chunk(db: AsyncSession, chunk, changes: ArticleChangeSet) -> List[BatchItemResult]:
+    ids = [item.id for _, item in chunk]
+    existing = await _lock_for_stats(db, ids)
+    now = utcnow()
+    results, rows = [], []
+    for index, item in chunk:
+        # Mismo criterio que PATCH /articles/{id}: un null no modifica el campo
+        values = item.patch.model_dump(exclude_none=True)
+        if item.id not in existing:
+            results.append(BatchItemResult(index=index, id=item.id, status="not_found"))
+        elif not values:
+            results.append(BatchItemResult(index=index, id=item.id, status="unchanged"))
+        else:
+            rows.append(dict(values, id=item.id, updated_at=now))
+            results.append(BatchItemResult(index=index, id=item.id, status="updated"))
+    if rows:
+        # UPDATE por clave primaria agrupado por conjunto de columnas (executemany)
+        # y un único UPDATE para incrementar la versión de todo el trozo
+        await db.execute(update(DBArticle), rows)
+        await db.execute(
+            update(DBArticle).where(DBArticle.id.in_([row["id"] for row in rows]))
+            .values(version=DBArticle.version + 1)
+            .execution_options(synchronize_session=False)
+        )
+        updated = (await db.scalars(
+            select(DBArticle).where(DBArticle.id.in_([row["id"] for row in rows]))
+            .execution_options(populate_existing=True)
+        )).all()
+        changes.upserted.extend(updated)
+        for article in updated:
+            changes.stats.replace(existing[article.id], article)
+    return results
+
+async def _delete_chunk(db: AsyncSession, chunk, changes: ArticleChangeSet) -> List[BatchItemResult]:
+    ids = [article_id for _, article_id in chunk]
+    existing = await _lock_for_stats(db, ids)
+    if existing:
+        await db.execute(
+            delete(DBArticle).where(DBArticle.id.in_(existing)).execution_options(synchronize_session=False)
+        )
+        changes.deleted.extend(existing)
+        for row in existing.values():
+            changes.stats.remove(row)
+    # Un ID repetido en el lote también figura como borrado: el resultado
+    # describe el estado final, y con all_or_nothing no debe deshacer el lote
+    return [
+        BatchItemResult(index=index, id=article_id, status="deleted" if article_id in existing else "not_found")
+        for index, article_id in chunk
+    ]
+
+async def _run_batch(db: AsyncSession, items, mode: BatchMode, apply_chunk, response: Response) -> BatchResult:
+    """
+    Aplica un lote en trozos de `ARTICLE_BATCH_CHUNK_SIZE` elementos.
+
+    - all_or_nothing: una sola transacción; si algún elemento falla se
+      deshace todo y se responde 409.
+    - partial: una transacción por trozo; si un trozo falla se reintenta
+      elemento a elemento para aislar los que dan error.
+    """
+    indexed = list(enumerate(items))
+    chunks = [indexed[i:i + ARTICLE_BATCH_CHUNK_SIZE] for i in range(0, len(indexed), ARTICLE_BATCH_CHUNK_SIZE)]
+    results: List[BatchItemResult] = []
+
+    if mode == "all_or_nothing":
+        changes = ArticleChangeSet()
+        try:
+            for chunk in chunks:
+                results.extend(await apply_chunk(db, chunk, changes))
+            committed = all(result.status in _BATCH_OK for result in results)
+            if committed:
+                changes.version = await bump_table_version(db, ARTICLES_TABLE)
+                await changes.stats.apply(db)
+                await db.commit()
+                await changes.publish()
+            else:
+                await db.rollback()
+                for result in results:
+                    if result.status in _BATCH_OK:
+                        result.status = "rolled_back"
+                response.status_code = status.HTTP_409_CONFLICT
+        except SQLAlchemyError as e:
+            await db.rollback()
+            logger.error(f"Error applying article batch: {e}")
+            raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Error applying batch, no changes were made")
+    else:
+        for chunk in chunks:
+            changes = ArticleChangeSet()
+            try:
+                chunk_results = await apply_chunk(db, chunk, changes)
+                if any(result.status in _BATCH_CHANGED for result in chunk_results):
+                    changes.version = await bump_table_version(db, ARTICLES_TABLE)
+                    await changes.stats.apply(db)
+                await db.commit()
+                await changes.publish()
+                results.extend(chunk_results)
+            except SQLAlchemyError as e:
+                await db.rollback()
+                logger.warning(f"Article batch chunk failed, retrying item by item: {e}")
+                for single in chunk:
+                    changes = ArticleChangeSet()
+                    try:
+                        single_results = await apply_chunk(db, [single], changes)
+                        if any(result.status in _BATCH_CHANGED for result in single_results):
+                            changes.version = await bump_table_version(db, ARTICLES_TABLE)
+                            await changes.stats.apply(db)
+                        await db.commit()
+                        await changes.publish()
+                        results.extend(single_results)
+                    except SQLAlchemyError as item_error:
+                        await db.rollback()
+                        results.append(BatchItemResult(index=single[0], status="error", detail=str(item_error.__class__.__name__)))
+        committed = True
+
+    succeeded = sum(1 for result in results if result.status in _BATCH_OK)
+    return BatchResult(mode=mode, committed=committed, succeeded=succeeded,
+                       failed=len(results) - succeeded, results=results)
+
+@router.post("/batch", response_model=BatchResult, summary="Create articles in batch (protected)")
+async def create_articles_batch(
+    articles: List[ArticleBase],
+    response: Response,
+    mode: BatchMode = Query("all_or_nothing"),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: str = Depends(get_current_user),
+):
+    _check_batch_size(len(articles))
+    return await _run_batch(db, articles, mode, _insert_chunk, response)
+
+@router.patch("/batch", response_model=BatchResult, summary="Update articles in batch (protected)")
+async def update_articles_batch(
+    items: List[ArticleBatchUpdateItem],
+    response: Response,
+    mode: BatchMode = Query("all_or_nothing"),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: str = Depends(get_current_user),
+):
+    _check_batch_size(len(items))
+    return await _run_batch(db, items, mode, _update_chunk, response)
+
+@router.post("/batch/delete", response_model=BatchResult, summary="Delete articles in batch (protected)")
+async def delete_articles_batch(
+    body: ArticleBatchDelete,
+    response: Response,
+    mode: BatchMode = Query("all_or_nothing"),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: str = Depends(get_current_user),
+):
+    _check_batch_size(len(body.ids))
+    return await _run_batch(db, body.ids, mode, _delete_chunk, response)
+
+# ====================================================================
+# Reserva de inventario (protegida)
+# ====================================================================
+
+def _merge_reservation_items(items: List[ReservationItem]) -> List[ReservationItem]:
+    """
+    Agrupa las líneas repetidas y las ordena por ID de artículo.
+    Bloquear las filas siempre en el mismo orden evita interbloqueos entre
+    reservas concurrentes que comparten artículos.
+    """
+    totals = {}
+    for item in items:
+        totals[item.article_id] = totals.get(item.article_id, 0) + item.quantity
+    return [ReservationItem(article_id=article_id, quantity=totals[article_id]) for article_id in sorted(totals)]
+
+async def _update_stock(db: AsyncSession, items: List[ReservationItem], changes: ArticleChangeSet,
+                        reserve: bool) -> Optional[ReservationItem]:
+    """
+    Aplica un UPDATE condicional por línea y guarda en `changes` las filas
+    resultantes, para anunciarlas tras el commit (con RETURNING cuando se
+    puede; si no, con una sola lectura al final).
+    Al reservar, retorna la primera línea que no se pudo aplicar, o `None`.
+    Al liberar, las líneas de artículos ya borrados simplemente se omiten.
+    """
+    returning = db.bind.dialect.update_returning
+    for item in items:
+        statement = update(DBArticle).where(DBArticle.id == item.article_id)
+        if reserve:
+            statement = statement.where(DBArticle.available_quantity >= item.quantity).values(
+                available_quantity=DBArticle.available_quantity - item.quantity)
+        else:
+            statement = statement.values(available_quantity=DBArticle.available_quantity + item.quantity)
+        statement = (statement.values(version=DBArticle.version + 1, updated_at=utcnow())
+                     .execution_options(synchronize_session=False))
+        if returning:
+            row = (await db.execute(statement.returning(*_ARTICLE_RETURNING))).first()
+            if row is not None:
+                changes.upserted.append(row)
+            elif reserve:
+                return item
+        elif (await db.execute(statement)).rowcount == 0 and reserve:
+            return item
+    if not returning:
+        ids = [item.article_id for item in items]
+        changes.upserted.extend((await db.execute(select(*_ARTICLE_RETURNING).where(DBArticle.id.in_(ids)))).all())
+    quantities = {item.article_id: -item.quantity if reserve else item.quantity for item in items}
+    for row in changes.upserted:
+        changes.stats.adjust_stock(row, quantities[row.id])
+    return None
+
+async def _current_user_id(db: AsyncSession, email: str) -> int:
+    user_id = await db.scalar(select(DBUser.id).where(DBUser.email == email))
+    if user_id is None:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Could not validate credentials")
+    return user_id
+
+@router.post("/reservations", response_model=ReservationSchema, summary="Reserve stock for several articles (protected)")
+async def reserve_stock(reservation: ReservationRequest, db: AsyncSession = Depends(get_async_db), current_user: str = Depends(get_current_user)):
+    """
+    Descuenta `available_quantity` de forma atómica para todas las líneas en
+    una sola transacción. Cada línea es un UPDATE condicional, así que el
+    stock nunca queda negativo aunque haya compras concurrentes.
+    Si alguna línea no tiene stock suficiente no se reserva nada (409).
+    La reserva se guarda con lo descontado; su `id` sirve para liberarla.
+    """
+    items = _merge_reservation_items(reservation.items)
+    changes = ArticleChangeSet()
+    try:
+        user_id = await _current_user_id(db, current_user)
+        failed = await _update_stock(db, items, changes, reserve=True)
+        if failed is not None:
+            await db.rollback()
+            if await db.get(DBArticle, failed.article_id) is None:
+                raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Article {failed.article_id} not found")
+            raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=f"Insufficient stock for article {failed.article_id}")
+        db_reservation = DBReservation(user_id=user_id, items=[item.model_dump() for item in items], status="active")
+        db.add(db_reservation)
+        changes.version = await bump_table_version(db, ARTICLES_TABLE)
+        await changes.stats.apply(db)
+        await db.commit()
+        await changes.publish()
+        return {"id": db_reservation.id, "status": db_reservation.status, "items": items}
+    except SQLAlchemyError as e:
+        await db.rollback()
+        logger.error(f"Error reserving stock: {e}")
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Error reserving stock")
+
+@router.post("/reservations/{reservation_id}/release", response_model=ReservationSchema,
+             summary="Release a stock reservation (protected)")
+async def release_stock(reservation_id: int, db: AsyncSession = Depends(get_async_db), current_user: str = Depends(get_current_user)):
+    """
+    Devuelve al inventario lo que descontó la reserva, en una sola
+    transacción. Solo puede liberarla quien la hizo y solo una vez: el
+    cambio de estado es un UPDATE condicional, así que dos liberaciones
+    simultáneas no devuelven el stock dos veces (la segunda recibe 409).
+    """
+    changes = ArticleChangeSet()
+    try:
+        user_id = await _current_user_id(db, current_user)
+        result = await db.execute(
+            update(DBReservation)
+            .where(DBReservation.id == reservation_id, DBReservation.user_id == user_id,
+                   DBReservation.status == "active")
+            .values(status="released", released_at=utcnow())
+            .execution_options(synchronize_session=False)
+        )
+        if result.rowcount == 0:
+            owner = await db.scalar(select(DBReservation.user_id).where(DBReservation.id == reservation_id))
+            await db.rollback()
+            if owner != user_id:
+                raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Reservation not found")
+            raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Reservation already released")
+        stored = await db.scalar(select(DBReservation.items).where(DBReservation.id == reservation_id))
+        items = [ReservationItem(**item) for item in stored]
+        await _update_stock(db, items, changes, reserve=False)
+        if changes.upserted:
+            changes.version = await bump_table_version(db, ARTICLES_TABLE)
+            await changes.stats.apply(db)
+        await db.commit()
+        await changes.publish()
+        return {"id": reservation_id, "status": "released", "items": items}
+    except SQLAlchemyError as e:
+        await db.rollback()
+        logger.error(f"Error releasing stock: {e}")
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Error releasing stock")
+
+# ====================================================================
+# Flujo de cambios (Server-Sent Events)
+# ====================================================================
+
+@router.get("/changes", summary="Stream article changes (Server-Sent Events)",
+            response_class=StreamingResponse, responses={200: {"content": {"text/event-stream": {}}}})
+async def stream_article_changes(
+    request: Request,
+    last_event_id: Optional[str] = Query(None, description="Alternativa a la cabecera `Last-Event-ID`"),
+):
+    """
+    Envía un evento `changes` por cada escritura con las filas creadas o
+    modificadas (`upserted`) y los IDs eliminados (`deleted`), en lugar de
+    volver a consultar `GET /articles/` periódicamente.
+    Al reconectar con `Last-Event-ID` se reciben los eventos perdidos; si ya
+    no están disponibles llega un evento `reset` y hay que recargar el listado.
+    """
+    article_feed.check_capacity()
+    resume_from = request.headers.get("last-event-id") or last_event_id
+    return StreamingResponse(article_feed.stream(resume_from), media_type="text/event-stream", headers=SSE_HEADERS)
 
 @router.get("/{article_id}", response_model=ArticleSchema, summary="Get an article by ID")
-def get_article(article_id: int, db: Session = Depends(get_db)):
-    article = db.query(DBArticle).filter(DBArticle.id == article_id).first()
+async def get_article(article_id: int, request: Request, response: Response, db: AsyncSession = Depends(get_read_db)):
+    # Con cabeceras condicionales se consultan solo `version` y `updated_at`
+    # para poder responder 304 sin cargar la fila completa
+    if has_conditional_headers(request):
+        row = (await db.execute(
+            select(DBArticle.version, DBArticle.updated_at).where(DBArticle.id == article_id)
+        )).first()
+        if row is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Article not found")
+        etag = version_etag(row.version)
+        if is_not_modified(request, etag, row.updated_at):
+            return not_modified_response(etag, row.updated_at)
+
+    article = await db.get(DBArticle, article_id)
     if article is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Article not found")
+    set_validators(response, version_etag(article.version), article.updated_at)
     return article
 
 @router.post("/", response_model=ArticleSchema, status_code=status.HTTP_201_CREATED, summary="Create a new article (protected)")
-def create_article(article: ArticleBase, db: Session = Depends(get_db), current_user: str = Depends(get_current_user)):
+async def create_article(article: ArticleBase, db: AsyncSession = Depends(get_async_db), current_user: str = Depends(get_current_user)):
     try:
         db_article = DBArticle(**article.dict())
         db.add(db_article)
-        db.commit()
-        db.refresh(db_article)
+        stats = ArticleStatsDelta()
+        stats.add(db_article)
+        version = await bump_table_version(db, ARTICLES_TABLE)
+        await stats.apply(db)
+        await db.commit()
+        await db.refresh(db_article)
+        await publish_article_changes(upserted=[db_article], version=version)
         return db_article
     except SQLAlchemyError as e:
-        db.rollback()
+        await db.rollback()
         logger.error(f"Error creating article: {e}")
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Error creating article")
 
-@router.put("/{article_id}", response_model=ArticleSchema, summary="Update an article (protected)")
-def update_article(article_id: int, article: ArticleBase, db: Session = Depends(get_db), current_user: str = Depends(get_current_user)):
-    db_article = db.query(DBArticle).filter(DBArticle.id == article_id).first()
-    if db_article is None:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Article not found")
-    
-    for key, value in article.dict().items():
-        setattr(db_article, key, value)
-    
+# Columnas que devuelven las actualizaciones: las del esquema más las del ETag
+_ARTICLE_RETURNING = schema_columns(DBArticle, ArticleSchema, "version", "updated_at")
+
+async def _write_article(db: AsyncSession, article_id: int, values: dict, request: Request, response: Response):
+    """
+    Actualiza un artículo con un único UPDATE (respetando `If-Match`), hace
+    commit y anuncia el cambio.
+    """
+    versions = if_match_versions(request)
+    stats = ArticleStatsDelta()
     try:
-        db.commit()
-        db.refresh(db_article)
-        return db_article
+        # Solo si cambian tipo, precio o stock hace falta leer antes la fila
+        previous = await _lock_for_stats(db, [article_id]) if set(values) & set(STATS_FIELDS) else {}
+        row = await patch_row(db, DBArticle, article_id, values, _ARTICLE_RETURNING,
+                              not_found="Article not found", versions=versions)
+        if article_id in previous:
+            stats.replace(previous[article_id], row)
+        if values:
+            version = await bump_table_version(db, ARTICLES_TABLE)
+            await stats.apply(db)
+            await db.commit()
+            await publish_article_changes(upserted=[row], version=version)
     except SQLAlchemyError as e:
-        db.rollback()
+        await db.rollback()
         logger.error(f"Error updating article: {e}")
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Error updating article")
+    set_validators(response, version_etag(row.version), row.updated_at)
+    return row
+
+@router.put("/{article_id}", response_model=ArticleSchema, summary="Update an article (protected)")
+async def update_article(article_id: int, article: ArticleBase, request: Request, response: Response,
+                         db: AsyncSession = Depends(get_async_db), current_user: str = Depends(get_current_user)):
+    """
+    Reemplaza todos los campos del artículo. Con `If-Match` (el ETag de
+    `GET /articles/{id}`) solo se aplica si nadie lo ha modificado desde
+    entonces; si no, responde 412.
+    """
+    return await _write_article(db, article_id, article.model_dump(), request, response)
+
+@router.patch("/{article_id}", response_model=ArticleSchema, summary="Partially update an article (protected)")
+async def patch_article(article_id: int, patch: ArticleUpdate, request: Request, response: Response,
+                        db: AsyncSession = Depends(get_async_db), current_user: str = Depends(get_current_user)):
+    """
+    Actualiza solo los campos enviados, en una única sentencia. Admite
+    `If-Match` igual que `PUT`.
+    """
+    return await _write_article(db, article_id, patch.model_dump(exclude_none=True), request, response)
 
 @router.delete("/{article_id}", status_code=status.HTTP_200_OK, summary="Delete an article (protected)")
-def delete_article(article_id: int, db: Session = Depends(get_db), current_user: str = Depends(get_current_user)):
-    db_article = db.query(DBArticle).filter(DBArticle.id == article_id).first()
+async def delete_article(article_id: int, db: AsyncSession = Depends(get_async_db), current_user: str = Depends(get_current_user)):
+    db_article = await db.get(DBArticle, article_id, with_for_update=True)
     if db_article is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Article not found")
     
     try:
-        db.delete(db_article)
-        db.commit()
+        stats = ArticleStatsDelta()
+        stats.remove(db_article)
+        await db.delete(db_article)
+        version = await bump_table_version(db, ARTICLES_TABLE)
+        await stats.apply(db)
+        await db.commit()
+        await publish_article_changes(deleted=[article_id], version=version)
         return {"message": "Article deleted successfully."}
     except SQLAlchemyError as e:
-        db.rollback()
+        await db.rollback()
         logger.error(f"Error deleting article: {e}")
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Error deleting article")
@@ -0,0 +1,34 @@
+from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+
+from utils import startup
+
+router = APIRouter(
+    prefix="/health",
+    tags=["Health"]
+)
+
+# ====================================================================
+# Sondas para el orquestador (Kubernetes, balanceador...)
+# ====================================================================
+
+@router.get("/live", summary="Liveness probe")
+async def liveness():
+    """
+    El proceso está vivo y atiende peticiones. No consulta la base de datos:
+    una caída de la base de datos no se arregla reiniciando el worker.
+    """
+    return {"status": "alive"}
+
+@router.get("/ready", summary="Readiness probe")
+async def readiness():
+    """
+    El worker terminó el calentamiento, no se está apagando y llega a la
+    base de datos. Responde 503 en caso contrario, para que no reciba tráfico.
+    """
+    if not startup.is_ready():
+        return JSONResponse({"status": "starting", "database": None}, status_code=503)
+    database_ok = await startup.check_database()
+    if not database_ok:
+        return JSONResponse({"status": "unavailable", "database": False}, status_code=503)
+    return {"status": "ready", "database": True}
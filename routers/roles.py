@@ -1,78 +1,133 @@
-from fastapi import APIRouter, HTTPException, Depends, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, HTTPException, Depends, Request, status
+from pydantic import TypeAdapter
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
 
-from db.database import get_db
+from db.database import get_async_db
 from db.rol_model import Rol as DBRol
+from db.user_model import User as DBUser
 from schemas.rol import Rol as RolSchema, RolBase, RolUpdate
+from utils.conditional import is_not_modified, not_modified_response, validator_headers
+from utils.fast_response import JSON_MEDIA_TYPE, schema_columns
+from utils.patching import patch_row
+from utils.response_cache import role_list_cache
+from utils.role_cache import role_cache
+from utils.versioning import ROLES_TABLE, bump_table_version
 
 router = APIRouter(
     prefix="/roles",
     tags=["Roles"]
 )
 
+_ROLE_LIST = TypeAdapter(List[RolSchema])
+
 # ====================================================================
 # Rutas para la gestión de roles
 # ====================================================================
 
 @router.get("/", response_model=List[RolSchema], summary="Obtener todos los roles")
-def get_all_roles(db: Session = Depends(get_db)):
+async def get_all_roles(request: Request):
     """
-    Obtiene una lista de todos los roles disponibles en la base de datos.
+    Obtiene una lista de todos los roles disponibles.
+    Se sirven desde la caché en memoria; solo se consulta la base de datos
+    (la principal, para ver la última escritura) si la caché está vacía o
+    fue invalidada. La lista ya serializada se guarda en `role_list_cache`.
+    Admite peticiones condicionales (`If-None-Match` / `If-Modified-Since`).
     """
-    roles = db.query(DBRol).all()
-    return roles
+    snapshot = await role_cache.snapshot()
+    if is_not_modified(request, snapshot.etag, snapshot.last_modified):
+        return not_modified_response(snapshot.etag, snapshot.last_modified)
+    entry = role_list_cache.get(snapshot.etag)
+    if entry is None:
+        body = _ROLE_LIST.dump_json(list(snapshot.roles.values()))
+        entry = role_list_cache.put(snapshot.etag, body, JSON_MEDIA_TYPE,
+                                    validator_headers(snapshot.etag, snapshot.last_modified))
+    return role_list_cache.respond(request, entry)
 
 @router.get("/{rol_id}", response_model=RolSchema, summary="Obtener un rol por ID")
-def get_rol_by_id(rol_id: int, db: Session = Depends(get_db)):
+async def get_rol_by_id(rol_id: int):
     """
     Obtiene un rol específico a partir de su ID.
     """
-    rol = db.query(DBRol).filter(DBRol.id == rol_id).first()
+    rol = await role_cache.get(rol_id)
     if not rol:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Rol not found")
     return rol
 
 @router.post("/", response_model=RolSchema, status_code=status.HTTP_201_CREATED, summary="Crear un nuevo rol")
-def create_new_rol(rol: RolBase, db: Session = Depends(get_db)):
+async def create_new_rol(rol: RolBase, db: AsyncSession = Depends(get_async_db)):
     """
     Crea un nuevo rol en la base de datos.
     """
     db_rol = DBRol(**rol.model_dump())
     db.add(db_rol)
     try:
-        db.commit()
-        db.refresh(db_rol)
+        await bump_table_version(db, ROLES_TABLE)
+        await db.commit()
+        await db.refresh(db_rol)
+        await role_cache.invalidate()
         return db_rol
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"Error al crear el rol: {e}")
 
 @router.put("/{rol_id}", response_model=RolSchema, summary="Actualizar un rol")
-def update_rol(rol_id: int, rol: RolUpdate, db: Session = Depends(get_db)):
+async def update_rol(rol_id: int, rol: RolUpdate, db: AsyncSession = Depends(get_async_db)):
     """
     Actualiza la información de un rol existente.
     """
-    db_rol = db.query(DBRol).filter(DBRol.id == rol_id).first()
+    db_rol = await db.get(DBRol, rol_id)
     if not db_rol:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Rol not found")
 
     if rol.rol:
         db_rol.rol = rol.rol
     
-    db.commit()
-    db.refresh(db_rol)
+    try:
+        await bump_table_version(db, ROLES_TABLE)
+        await db.commit()
+    except IntegrityError:
+        await db.rollback()
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Rol already exists")
+    await db.refresh(db_rol)
+    await role_cache.invalidate()
     return db_rol
 
+@router.patch("/{rol_id}", response_model=RolSchema, summary="Actualizar parcialmente un rol")
+async def patch_rol(rol_id: int, rol: RolUpdate, db: AsyncSession = Depends(get_async_db)):
+    """
+    Actualiza solo los campos enviados con un único UPDATE, sin leer antes el rol.
+    Responde 409 si ya existe otro rol con ese nombre.
+    """
+    values = rol.model_dump(exclude_none=True)
+    try:
+        row = await patch_row(db, DBRol, rol_id, values, schema_columns(DBRol, RolSchema), not_found="Rol not found")
+        if values:
+            await bump_table_version(db, ROLES_TABLE)
+            await db.commit()
+    except IntegrityError:
+        await db.rollback()
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Rol already exists")
+    if values:
+        await role_cache.invalidate()
+    return row
+
 @router.delete("/{rol_id}", status_code=status.HTTP_204_NO_CONTENT, summary="Eliminar un rol")
-def delete_rol(rol_id: int, db: Session = Depends(get_db)):
+async def delete_rol(rol_id: int, db: AsyncSession = Depends(get_async_db)):
     """
     Elimina un rol de la base de datos.
+    Responde 409 si algún usuario todavía tiene asignado el rol.
     """
-    db_rol = db.query(DBRol).filter(DBRol.id == rol_id).first()
+    db_rol = await db.get(DBRol, rol_id)
     if not db_rol:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Rol not found")
+    if await db.scalar(select(DBUser.id).where(DBUser.roleId == rol_id).limit(1)) is not None:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Rol is assigned to users")
 
-    db.delete(db_rol)
-    db.commit()
+    await db.delete(db_rol)
+    await bump_table_version(db, ROLES_TABLE)
+    await db.commit()
+    await role_cache.invalidate()
     return
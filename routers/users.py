@@ -1,15 +1,27 @@
 import logging
-from typing import List, Optional
-from fastapi import APIRouter, HTTPException, Depends, status
+from typing import Literal, Optional, Union
+from fastapi import APIRouter, HTTPException, Depends, Query, Request, Response, status
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
-from sqlalchemy.exc import SQLAlchemyError
-from passlib.hash import bcrypt
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
 
-from db.database import get_db
+from db.database import get_async_db, get_read_db
+from db.rol_model import Rol as DBRol
 from db.user_model import User as DBUser
-from schemas.user import User as UserSchema, UserCreate, UserUpdate
-from utils.auth import create_access_token, Token, get_current_user
+from schemas.rol import Rol as RolSchema
+from schemas.user import User as UserSchema, UserCreate, UserUpdate, UserPage, UserExpandedPage, RefreshRequest
+from utils.auth import Token, get_current_user
+from utils.hashing import hash_password, verify_password
+from utils.export import ExportFormat, export_response
+from utils.fast_response import fast_response, negotiate, rows_to_dicts, schema_columns
+from utils.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, apply_keyset, build_page
+from utils.patching import patch_row
+from utils.rate_limit import LOGIN_RULE, SIGNUP_RULE, enforce_rate_limit
+from utils.role_cache import role_cache
+from utils.refresh_tokens import (issue_refresh_token, revoke_refresh_token, revoke_user_sessions,
+                                  rotate_refresh_token, token_response)
 
 # Configuración básica de logging
 logging.basicConfig(level=logging.INFO,
@@ -27,72 +39,184 @@ router = APIRouter(
 # Rutas para la gestión de usuarios
 # ====================================================================
 
-@router.get("/", response_model=List[UserSchema], summary="Get all users")
-def get_users(db: Session = Depends(get_db), current_user: str = Depends(get_current_user)):
+async def ensure_role_exists(rol_id: int):
     """
-    Recupera todos los usuarios de la base de datos.
+    Comprueba el rol en la caché de roles (sin consultar la base de datos) y
+    responde 400 si no existe, antes de que la clave foránea rechace el INSERT.
+    """
+    if await role_cache.get(rol_id) is None:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Role not found")
+
+
+@router.get("/", response_model=Union[UserPage, UserExpandedPage], summary="List users (paginated)")
+async def get_users(
+    request: Request,
+    response: Response,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = Query(None, description="Token `next_cursor` de la página anterior"),
+    order_by: Literal["id", "created_at"] = Query("id"),
+    role_id: Optional[int] = Query(None, description="Solo los usuarios de este rol"),
+    expand: Optional[Literal["role"]] = Query(None, description="`role` incluye el rol de cada usuario"),
+    db: AsyncSession = Depends(get_read_db),
+    current_user: str = Depends(get_current_user),
+):
+    """
+    Recupera los usuarios página a página, ordenados por ID o fecha de creación.
+    Para obtener la página siguiente se envía el `next_cursor` recibido.
+    Con `expand=role` cada usuario incluye su rol, cargado para toda la
+    página a la vez (sin una petición a `/roles/{id}` por usuario).
     Ahora requiere autenticación.
+    Admite el camino rápido (`Accept: application/msgpack` o `FAST_LIST_RESPONSES`).
+    """
+    fmt = negotiate(request)
+    if fmt:
+        columns = schema_columns(DBUser, UserSchema, order_by)
+        role_fields = list(RolSchema.model_fields)
+        query = select(*columns)
+        if expand == "role":
+            # Un único JOIN con los roles
+            role_columns = [getattr(DBRol, field).label(f"role_{field}") for field in role_fields]
+            query = select(*columns, *role_columns).outerjoin(DBRol, DBRol.id == DBUser.roleId)
+        if role_id is not None:
+            query = query.where(DBUser.roleId == role_id)
+        rows, next_cursor = build_page((await db.execute(apply_keyset(query, DBUser, order_by, cursor, limit))).all(),
+                                       order_by, limit)
+        items = rows_to_dicts(rows, UserSchema)
+        if expand == "role":
+            for item, row in zip(items, rows):
+                role = dict(zip(role_fields, row[len(columns):]))
+                item["role"] = role if role["id"] is not None else None
+        return fast_response({"items": items, "next_cursor": next_cursor}, fmt)
+
+    query = select(DBUser)
+    if expand == "role":
+        # Una sola consulta adicional (IN) para los roles de toda la página
+        query = query.options(selectinload(DBUser.role))
+    if role_id is not None:
+        query = query.where(DBUser.roleId == role_id)
+    rows = (await db.scalars(apply_keyset(query, DBUser, order_by, cursor, limit))).all()
+    items, next_cursor = build_page(rows, order_by, limit)
+    response.headers["Vary"] = "Accept"
+    if expand == "role":
+        return UserExpandedPage.model_validate({"items": items, "next_cursor": next_cursor}, from_attributes=True)
+    return {"items": items, "next_cursor": next_cursor}
+
+@router.get("/export", summary="Export all users as NDJSON or CSV")
+async def export_users(format: ExportFormat = Query("ndjson"), current_user: str = Depends(get_current_user)):
     """
-    users = db.query(DBUser).all()
-    return users
+    Transmite todos los usuarios (sin contraseña) en NDJSON o CSV.
+    Requiere autenticación.
+    """
+    return export_response(DBUser, UserSchema, format, "users")
 
 @router.get("/me", summary="Get current user")
-def read_users_me(current_user: str = Depends(get_current_user)):
+async def read_users_me(current_user: str = Depends(get_current_user)):
     """
     Obtiene la información del usuario autenticado.
     """
     return {"email": current_user}
 
 @router.post("/login", response_model=Token, summary="User login")
-def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
+async def login(request: Request, form_data: OAuth2PasswordRequestForm = Depends(), db: AsyncSession = Depends(get_async_db)):
     """
-    Verifica las credenciales del usuario y genera un token JWT.
+    Verifica las credenciales del usuario y genera un token JWT de acceso
+    junto con un refresh token para renovarlo en `/users/refresh`.
     Use el email en el campo de username.
+    Limitado por IP y por email (429 con `Retry-After`).
     """
-    db_user = db.query(DBUser).filter(DBUser.email == form_data.username).first()
+    # Antes de tocar la base de datos o bcrypt
+    await enforce_rate_limit(request, LOGIN_RULE, email=form_data.username)
 
-    if not db_user or not bcrypt.verify(form_data.password, db_user.password):
+    db_user = await db.scalar(select(DBUser).where(DBUser.email == form_data.username))
+    if not db_user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password"
         )
 
-    access_token = create_access_token(data={"sub": db_user.email})
+    # bcrypt es costoso en CPU: se ejecuta en el pool de procesos dedicado
+    is_valid, needs_rehash = await verify_password(form_data.password, db_user.password)
+    if not is_valid:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Incorrect email or password"
+        )
 
-    return {"access_token": access_token, "token_type": "bearer"}
+    email = db_user.email
+    refresh_token, family_id = issue_refresh_token(db, db_user.id)
+
+    # Si el hash se generó con otro coste, se actualiza ahora que conocemos la contraseña
+    if needs_rehash:
+        try:
+            db_user.password = await hash_password(form_data.password)
+        except HTTPException:
+            # Pool saturado: se reintentará en el próximo login
+            pass
+
+    try:
+        await db.commit()
+    except SQLAlchemyError as error:
+        await db.rollback()
+        logger.error(f"Error al guardar el refresh token: {error}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Error creating session"
+        )
+
+    return token_response(email, refresh_token, family_id)
+
+@router.post("/refresh", response_model=Token, summary="Refresh an access token")
+async def refresh_access_token(body: RefreshRequest, db: AsyncSession = Depends(get_async_db)):
+    """
+    Canjea un refresh token por un token de acceso nuevo y otro refresh
+    token (el anterior deja de valer). No verifica la contraseña.
+    """
+    return await rotate_refresh_token(db, body.refresh_token)
+
+@router.post("/logout", status_code=status.HTTP_204_NO_CONTENT, summary="Revoke a session")
+async def logout(body: RefreshRequest, db: AsyncSession = Depends(get_async_db)):
+    """
+    Cierra la sesión del refresh token: se revocan sus refresh tokens y los
+    tokens de acceso emitidos con ellos.
+    """
+    await revoke_refresh_token(db, body.refresh_token)
 
 
 @router.post("/", response_model=UserSchema, status_code=status.HTTP_201_CREATED, summary="Create a new user")
-def create_user(user: UserCreate, db: Session = Depends(get_db)):
+async def create_user(user: UserCreate, request: Request, db: AsyncSession = Depends(get_async_db)):
     """
     Crea un nuevo usuario con la contraseña cifrada.
+    Limitado por IP (429 con `Retry-After`).
     """
+    await enforce_rate_limit(request, SIGNUP_RULE)
+
     try:
         # Revisa si el email ya existe
-        existing_user = db.query(DBUser).filter(DBUser.email == user.email).first()
+        existing_user = await db.scalar(select(DBUser.id).where(DBUser.email == user.email))
         if existing_user:
             raise HTTPException(
                 status_code=status.HTTP_409_CONFLICT,
                 detail="Email already registered"
             )
+        await ensure_role_exists(user.roleId)
         
         # Cifra la contraseña antes de guardarla
-        hashed_password = bcrypt.hash(user.password)
+        hashed_password = await hash_password(user.password)
 
         # Crea el nuevo objeto de usuario para la base de datos
         db_user = DBUser(name=user.name, email=user.email, password=hashed_password, roleId=user.roleId)
         
         # Agrega el nuevo usuario a la sesión y confirma los cambios
         db.add(db_user)
-        db.commit()
-        db.refresh(db_user)
+        await db.commit()
+        await db.refresh(db_user)
 
         # Retorna el usuario creado (excluyendo la contraseña)
         return db_user
     except HTTPException as http_exc:
         raise http_exc
     except SQLAlchemyError as error:
-        db.rollback()
+        await db.rollback()
         logger.error(f"Error al intentar agregar un nuevo usuario: {error}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -101,12 +225,12 @@ def create_user(user: UserCreate, db: Session = Depends(get_db)):
 
 
 @router.put("/{user_id}", response_model=UserSchema, summary="Update a user")
-def update_user(user_id: int, user_data: UserUpdate, db: Session = Depends(get_db), current_user: str = Depends(get_current_user)):
+async def update_user(user_id: int, user_data: UserUpdate, db: AsyncSession = Depends(get_async_db), current_user: str = Depends(get_current_user)):
     """
     Actualiza un usuario existente por su ID.
     Requiere autenticación.
     """
-    db_user = db.query(DBUser).filter(DBUser.id == user_id).first()
+    db_user = await db.get(DBUser, user_id)
     if not db_user:
         raise HTTPException(status_code=404, detail="User not found")
     
@@ -116,23 +240,53 @@ def update_user(user_id: int, user_data: UserUpdate, db: Session = Depends(get_d
     if user_data.email is not None:
         db_user.email = user_data.email
     if user_data.password is not None:
-        db_user.password = bcrypt.hash(user_data.password)
+        db_user.password = await hash_password(user_data.password)
     if user_data.roleId is not None:
+        await ensure_role_exists(user_data.roleId)
         db_user.roleId = user_data.roleId
 
-    db.commit()
-    db.refresh(db_user)
+    await db.commit()
+    await db.refresh(db_user)
+
+    # Un cambio de contraseña cierra las sesiones abiertas
+    if user_data.password is not None:
+        await revoke_user_sessions(db, user_id)
     return db_user
 
+@router.patch("/{user_id}", response_model=UserSchema, summary="Partially update a user")
+async def patch_user(user_id: int, user_data: UserUpdate, db: AsyncSession = Depends(get_async_db), current_user: str = Depends(get_current_user)):
+    """
+    Actualiza solo los campos enviados con un único UPDATE, sin leer antes
+    el usuario. Requiere autenticación.
+    """
+    values = user_data.model_dump(exclude_none=True)
+    if "roleId" in values:
+        await ensure_role_exists(values["roleId"])
+    if "password" in values:
+        values["password"] = await hash_password(values["password"])
+
+    try:
+        row = await patch_row(db, DBUser, user_id, values, schema_columns(DBUser, UserSchema), not_found="User not found")
+        await db.commit()
+    except IntegrityError:
+        await db.rollback()
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Email already registered")
+
+    # Un cambio de contraseña cierra las sesiones abiertas
+    if "password" in values:
+        await revoke_user_sessions(db, user_id)
+    return row
+
 @router.delete("/{user_id}", status_code=status.HTTP_204_NO_CONTENT, summary="Delete a user")
-def delete_user(user_id: int, db: Session = Depends(get_db), current_user: str = Depends(get_current_user)):
+async def delete_user(user_id: int, db: AsyncSession = Depends(get_async_db), current_user: str = Depends(get_current_user)):
     """
     Elimina un usuario por su ID.
     Requiere autenticación.
     """
-    db_user = db.query(DBUser).filter(DBUser.id == user_id).first()
+    db_user = await db.get(DBUser, user_id)
     if not db_user:
         raise HTTPException(status_code=404, detail="User not found")
-    db.delete(db_user)
-    db.commit()
+    await revoke_user_sessions(db, user_id)
+    await db.delete(db_user)
+    await db.commit()
     return
\ No newline at end of file
@@ -0,0 +1,45 @@
+from pydantic import BaseModel
+from typing import Any, Dict, List, Optional
+
+# ====================================================================
+# Esquemas de Pydantic para las rutas de administración
+# ====================================================================
+
+class SlowQuery(BaseModel):
+    """
+    Huella de una consulta lenta con sus estadísticas acumuladas.
+    """
+    fingerprint: str
+    statement: str
+    count: int
+    total_ms: float
+    avg_ms: float
+    max_ms: float
+    last_ms: float
+    last_seen: float
+    routes: Dict[str, int]
+    parameters: str
+    explain: Optional[List[Dict[str, Any]]] = None
+    explained_at: Optional[float] = None
+
+class ArticleStatsReconciliation(BaseModel):
+    """
+    Resultado de recalcular las estadísticas del inventario: número de tipos
+    y los que no cuadraban con el resumen (valores esperados y anteriores).
+    """
+    types: int
+    drift: List[Dict[str, Any]]
+
+class ResponseCacheStats(BaseModel):
+    """
+    Estado de una caché de respuestas: ocupación, aciertos y bytes ahorrados
+    por la compresión previa.
+    """
+    entries: int
+    bytes: int
+    max_bytes: int
+    hits: int
+    misses: int
+    hit_ratio: float
+    bytes_saved: int
+    encodings: List[str]
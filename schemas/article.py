@@ -1,11 +1,103 @@
-from pydantic import BaseModel, Field
+from decimal import ROUND_HALF_UP, Decimal
+from pydantic import AfterValidator, BaseModel, Field
+from typing import Annotated, List, Optional
+
+def round_price(value: float) -> float:
+    """
+    Redondea a céntimos (mitad hacia arriba, como DECIMAL(10,2) en MySQL),
+    para que la base de datos guarde exactamente el precio recibido y las
+    estadísticas incrementales cuadren con la tabla en cualquier motor.
+    """
+    rounded = Decimal(str(value)).quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
+    if rounded <= 0:
+        raise ValueError("Price must be at least 0.01")
+    return float(rounded)
+
+Price = Annotated[float, Field(gt=0), AfterValidator(round_price)]
 
 class ArticleBase(BaseModel):
     name: str = Field(..., max_length=255)
     type: str = Field(..., max_length=255)
     description: str = Field(...)
-    price: float = Field(..., gt=0)
+    price: Price
     available_quantity: int = Field(..., ge=0)
 
 class Article(ArticleBase):
-    id: int
\ No newline at end of file
+    id: int
+
+class ArticlePage(BaseModel):
+    items: List[Article]
+    next_cursor: Optional[str] = None
+
+class ArticleUpdate(BaseModel):
+    name: Optional[str] = Field(None, max_length=255)
+    type: Optional[str] = Field(None, max_length=255)
+    description: Optional[str] = None
+    price: Optional[Price] = None
+    available_quantity: Optional[int] = Field(None, ge=0)
+
+# ====================================================================
+# Esquemas para las estadísticas del inventario
+# ====================================================================
+
+class ArticleTypeStats(BaseModel):
+    type: str
+    article_count: int
+    total_stock: int
+    inventory_value: float
+
+class ArticleStats(BaseModel):
+    types: List[ArticleTypeStats]
+    article_count: int
+    total_stock: int
+    inventory_value: float
+
+# ====================================================================
+# Esquemas para las operaciones por lotes
+# ====================================================================
+
+class ArticleBatchUpdateItem(BaseModel):
+    id: int
+    patch: ArticleUpdate
+
+class ArticleBatchDelete(BaseModel):
+    ids: List[int]
+
+class BatchItemResult(BaseModel):
+    index: int
+    id: Optional[int] = None
+    status: str
+    detail: Optional[str] = None
+
+class BatchResult(BaseModel):
+    mode: str
+    committed: bool
+    succeeded: int
+    failed: int
+    results: List[BatchItemResult]
+
+# ====================================================================
+# Esquemas para la reserva de inventario
+# ====================================================================
+
+class ReservationItem(BaseModel):
+    article_id: int
+    quantity: int = Field(..., gt=0)
+
+class ReservationRequest(BaseModel):
+    items: List[ReservationItem] = Field(..., min_length=1)
+
+class Reservation(ReservationRequest):
+    id: int
+    status: str
+
+# ====================================================================
+# Esquemas para la búsqueda de artículos
+# ====================================================================
+
+class ArticleSearchHit(Article):
+    score: float
+
+class ArticleSearchPage(BaseModel):
+    items: List[ArticleSearchHit]
+    next_offset: Optional[int] = None
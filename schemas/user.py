@@ -2,6 +2,8 @@ from pydantic import BaseModel, Field, EmailStr
 from datetime import datetime
 from typing import Optional, List
 
+from schemas.rol import Rol as RolSchema
+
 # Esquema base para los campos de usuario
 class UserBase(BaseModel):
     name: str = Field(..., max_length=255)
@@ -40,10 +42,31 @@ class User(UserBase):
     class Config:
         orm_mode = True
 
+# Esquema para una página del listado de usuarios
+class UserPage(BaseModel):
+    items: List[User]
+    next_cursor: Optional[str] = None
+
+# Usuario con su rol incluido (`expand=role`)
+class UserWithRole(User):
+    role: Optional[RolSchema] = None
+
+# Página del listado con los roles incluidos. No hereda de `UserPage` para que
+# la respuesta se serialice con este esquema y no con el de la página simple.
+class UserExpandedPage(BaseModel):
+    items: List[UserWithRole]
+    next_cursor: Optional[str] = None
+
 # Esquema para el token de autenticación
 class Token(BaseModel):
     access_token: str
     token_type: str
+    refresh_token: Optional[str] = None
+    expires_in: Optional[int] = None
+
+# Esquema para renovar o revocar una sesión con el refresh token
+class RefreshRequest(BaseModel):
+    refresh_token: str = Field(..., min_length=1, max_length=255)
 
 # Esquema para el login del usuario
 class UserLogin(BaseModel):
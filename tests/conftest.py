@@ -0,0 +1,84 @@
+"""
+Configuración común de los tests: la API contra un SQLite temporal
+(aiosqlite para las rutas asíncronas).
+
+Las URLs de la base de datos se leen al importar `db.database`, así que se
+fijan aquí, antes de importar la aplicación. Con `GELA_TEST_REPLICA` se añade
+una réplica de lectura en otro fichero SQLite (ver `test_read_replica.py`).
+"""
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+_db_dir = Path(tempfile.mkdtemp(prefix="gela-tests-"))
+_db_path = _db_dir / "test.db"
+REPLICA = bool(os.getenv("GELA_TEST_REPLICA"))
+if REPLICA:
+    _replica_path = _db_dir / "replica.db"
+    os.environ.update(ASYNC_READ_DATABASE_URL=f"sqlite+aiosqlite:///{_replica_path}",
+                      READ_DATABASE_URL=f"sqlite:///{_replica_path}")
+os.environ.update(
+    DATABASE_URL=f"sqlite:///{_db_path}",
+    ASYNC_DATABASE_URL=f"sqlite+aiosqlite:///{_db_path}",
+    BCRYPT_ROUNDS="4",
+    PASSWORD_HASH_WORKERS="1",
+    PASSWORD_HASH_PREWARM="false",
+    RATE_LIMIT_ENABLED="false",
+    ADMIN_API_ENABLED="true",
+)
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+import main  # noqa: E402
+from db import database, models  # noqa: E402
+from utils.response_cache import invalidate_all  # noqa: E402
+from utils.role_cache import role_cache  # noqa: E402
+
+TEST_EMAIL = "tester@example.com"
+TEST_PASSWORD = "secret123"
+
+
+def replica_engine():
+    """
+    Motor síncrono de la réplica, o `None` si no hay réplica configurada.
+    """
+    return database.explain_engines.get(database.async_read_engine.sync_engine) if REPLICA else None
+
+
+@pytest.fixture
+def client():
+    """
+    Cliente con el ciclo de vida completo sobre una base de datos vacía.
+    """
+    for engine in filter(None, (database.engine, replica_engine())):
+        models.Base.metadata.drop_all(engine)
+        models.Base.metadata.create_all(engine)
+    # Las versiones de tabla vuelven a empezar: se vacían las cachés en memoria
+    invalidate_all()
+    with TestClient(main.app) as test_client:
+        test_client.portal.call(role_cache.invalidate)
+        yield test_client
+
+
+@pytest.fixture
+def auth_headers(client):
+    assert client.post("/roles/", json={"rol": "admin"}).status_code == 201
+    response = client.post("/users/", json={"name": "Tester", "email": TEST_EMAIL,
+                                            "password": TEST_PASSWORD, "roleId": 1})
+    assert response.status_code == 201, response.text
+    token = client.post("/users/login", data={"username": TEST_EMAIL, "password": TEST_PASSWORD}).json()
+    return {"Authorization": f"Bearer {token['access_token']}"}
+
+
+def article_payload(index: int = 0, **overrides):
+    payload = {"name": f"Article {index}", "type": "tool", "description": "Test article",
+               "price": 10.5, "available_quantity": 5}
+    payload.update(overrides)
+    return payload
@@ -0,0 +1,24 @@
+from utils import auth
+
+
+def _login(client, email):
+    client.post("/users/", json={"name": "User", "email": email, "password": "secret123", "roleId": 2})
+    token = client.post("/users/login", data={"username": email, "password": "secret123"}).json()
+    return {"Authorization": f"Bearer {token['access_token']}"}
+
+
+def test_admin_routes_require_the_admin_role(client, auth_headers):
+    client.post("/roles/", json={"rol": "customer"})
+    customer = _login(client, "customer@example.com")
+
+    for method, path in (("get", "/admin/slow-queries"), ("delete", "/admin/slow-queries"),
+                         ("delete", "/admin/response-cache"), ("post", "/admin/article-stats/reconcile")):
+        assert getattr(client, method)(path, headers=customer).status_code == 403
+    assert client.get("/admin/pool").status_code == 401
+    assert client.get("/admin/pool", headers=auth_headers).status_code == 200
+
+
+def test_admin_routes_are_off_unless_enabled(client, auth_headers, monkeypatch):
+    monkeypatch.setattr(auth, "ADMIN_API_ENABLED", False)
+
+    assert client.get("/admin/pool", headers=auth_headers).status_code == 404
@@ -0,0 +1,37 @@
+from conftest import article_payload
+from utils.article_stats import reconcile_article_stats
+
+
+def _stats(client):
+    response = client.get("/articles/stats")
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def test_stats_match_the_table_with_prices_beyond_cents(client, auth_headers):
+    # Precios con más de dos decimales: la columna los guarda redondeados a céntimos
+    prices = [1.005, 2.675, 0.125, 10.335, 3.3333]
+    ids = []
+    for i, price in enumerate(prices):
+        response = client.post("/articles/", json=article_payload(i, price=price, available_quantity=i + 1),
+                               headers=auth_headers)
+        assert response.status_code == 201, response.text
+        ids.append(response.json()["id"])
+    client.patch(f"/articles/{ids[0]}", json={"price": 4.445}, headers=auth_headers)
+
+    assert client.portal.call(reconcile_article_stats)["drift"] == []
+
+    for article_id in ids:
+        assert client.delete(f"/articles/{article_id}", headers=auth_headers).status_code in (200, 204)
+
+    stats = _stats(client)
+    assert stats["article_count"] == 0
+    assert stats["inventory_value"] == 0
+    assert client.portal.call(reconcile_article_stats)["drift"] == []
+
+
+def test_price_is_stored_rounded_half_up(client, auth_headers):
+    response = client.post("/articles/", json=article_payload(price=1.005), headers=auth_headers)
+
+    assert response.json()["price"] == 1.01
+    assert client.post("/articles/", json=article_payload(price=0.004), headers=auth_headers).status_code == 422
@@ -0,0 +1,73 @@
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from conftest import article_payload
+from db.database import async_engine, get_async_db, get_read_db
+
+
+def test_async_session_dependencies_use_aiosqlite(client):
+    async def check():
+        results = []
+        for dependency in (get_async_db, get_read_db):
+            sessions = dependency()
+            db = await sessions.__anext__()
+            assert isinstance(db, AsyncSession)
+            results.append((await db.execute(text("SELECT 1"))).scalar_one())
+            await sessions.aclose()
+        return results
+
+    assert async_engine.dialect.driver == "aiosqlite"
+    assert client.portal.call(check) == [1, 1]
+
+
+def test_article_crud(client, auth_headers):
+    created = client.post("/articles/", json=article_payload(), headers=auth_headers)
+    assert created.status_code == 201, created.text
+    article_id = created.json()["id"]
+
+    assert client.get(f"/articles/{article_id}").json()["name"] == "Article 0"
+
+    replaced = client.put(f"/articles/{article_id}", json=article_payload(name="Renamed"), headers=auth_headers)
+    assert replaced.status_code == 200
+    assert replaced.json()["name"] == "Renamed"
+
+    patched = client.patch(f"/articles/{article_id}", json={"available_quantity": 1}, headers=auth_headers)
+    assert patched.json()["available_quantity"] == 1
+    assert patched.json()["name"] == "Renamed"
+
+    assert client.delete(f"/articles/{article_id}", headers=auth_headers).status_code == 200
+    assert client.get(f"/articles/{article_id}").status_code == 404
+
+
+def test_writes_require_authentication(client):
+    assert client.post("/articles/", json=article_payload()).status_code == 401
+
+
+def test_role_crud(client):
+    role_id = client.post("/roles/", json={"rol": "editor"}).json()["id"]
+
+    assert client.put(f"/roles/{role_id}", json={"rol": "writer"}).json()["rol"] == "writer"
+    assert client.patch(f"/roles/{role_id}", json={"rol": "author"}).json()["rol"] == "author"
+    assert [role["rol"] for role in client.get("/roles/").json()] == ["author"]
+
+    assert client.delete(f"/roles/{role_id}").status_code == 204
+    assert client.get(f"/roles/{role_id}").status_code == 404
+
+
+def test_user_crud(client, auth_headers):
+    created = client.post("/users/", json={"name": "Ana", "email": "ana@example.com",
+                                           "password": "secret123", "roleId": 1})
+    assert created.status_code == 201, created.text
+    user_id = created.json()["id"]
+    assert "password" not in created.json()
+
+    updated = client.put(f"/users/{user_id}", json={"name": "Ana María"}, headers=auth_headers)
+    assert updated.status_code == 200, updated.text
+    assert updated.json()["name"] == "Ana María"
+
+    duplicate = client.patch(f"/users/{user_id}", json={"email": "tester@example.com"}, headers=auth_headers)
+    assert duplicate.status_code == 409
+
+    assert client.delete(f"/users/{user_id}", headers=auth_headers).status_code == 204
+    emails = [user["email"] for user in client.get("/users/", headers=auth_headers).json()["items"]]
+    assert emails == ["tester@example.com"]
@@ -0,0 +1,14 @@
+from conftest import TEST_EMAIL, TEST_PASSWORD
+
+
+def test_logout_rejects_a_cached_access_token(client):
+    client.post("/roles/", json={"rol": "admin"})
+    client.post("/users/", json={"name": "Tester", "email": TEST_EMAIL, "password": TEST_PASSWORD, "roleId": 1})
+    tokens = client.post("/users/login", data={"username": TEST_EMAIL, "password": TEST_PASSWORD}).json()
+    headers = {"Authorization": f"Bearer {tokens['access_token']}"}
+    # La primera petición deja los claims del token en la caché
+    assert client.get("/users/", headers=headers).status_code == 200
+
+    assert client.post("/users/logout", json={"refresh_token": tokens["refresh_token"]}).status_code in (200, 204)
+
+    assert client.get("/users/", headers=headers).status_code == 401
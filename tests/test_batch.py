@@ -0,0 +1,45 @@
+from conftest import article_payload
+
+
+def _create(client, headers, count):
+    response = client.post("/articles/batch", json=[article_payload(i) for i in range(count)], headers=headers)
+    assert response.status_code == 200, response.text
+    return [result["id"] for result in response.json()["results"]]
+
+
+def test_batch_delete_with_repeated_id(client, auth_headers):
+    first, second = _create(client, auth_headers, 2)
+
+    response = client.post("/articles/batch/delete", json={"ids": [first, first, second]}, headers=auth_headers)
+
+    assert response.status_code == 200, response.text
+    body = response.json()
+    assert body["committed"] is True
+    assert [result["status"] for result in body["results"]] == ["deleted", "deleted", "deleted"]
+    assert client.get(f"/articles/{first}").status_code == 404
+    assert client.get("/articles/stats").json()["article_count"] == 0
+
+
+def test_batch_delete_unknown_id_rolls_back(client, auth_headers):
+    (article_id,) = _create(client, auth_headers, 1)
+
+    response = client.post("/articles/batch/delete", json={"ids": [article_id, 9999]}, headers=auth_headers)
+
+    assert response.status_code == 409
+    assert [result["status"] for result in response.json()["results"]] == ["rolled_back", "not_found"]
+    assert client.get(f"/articles/{article_id}").status_code == 200
+
+
+def test_batch_update_ignores_nulls_like_single_patch(client, auth_headers):
+    first, second = _create(client, auth_headers, 2)
+
+    response = client.patch("/articles/batch", json=[
+        {"id": first, "patch": {"name": None, "price": 99.5}},
+        {"id": second, "patch": {"description": None}},
+    ], headers=auth_headers)
+
+    assert response.status_code == 200, response.text
+    assert [result["status"] for result in response.json()["results"]] == ["updated", "unchanged"]
+    article = client.get(f"/articles/{first}").json()
+    assert article["name"] == "Article 0"
+    assert article["price"] == 99.5
@@ -0,0 +1,88 @@
+import asyncio
+
+from conftest import article_payload
+from db.database import AsyncSessionLocal
+from utils.article_changes import ARTICLES_TOPIC
+from utils.change_feed import ChangeFeed
+from utils.invalidation import channel
+from utils.versioning import ARTICLES_TABLE, get_table_version
+
+TOPIC = "test-articles"
+
+
+async def _read(stream, count, timeout=2.0):
+    events = []
+    while len(events) < count:
+        chunk = await asyncio.wait_for(stream.__anext__(), timeout)
+        events.extend(block for block in chunk.split("\n\n") if block and not block.startswith(("retry", ":")))
+    return events
+
+
+def _ids(events):
+    return [line[4:] for event in events for line in event.split("\n") if line.startswith("id: ")]
+
+
+def _kinds(events):
+    return [line[7:] for event in events for line in event.split("\n") if line.startswith("event: ")]
+
+
+def test_event_ids_are_shared_across_workers():
+    async def scenario():
+        # Dos workers reciben los mismos avisos del canal
+        first, second = ChangeFeed(TOPIC), ChangeFeed(TOPIC)
+        for version in (1, 2, 3):
+            await channel.publish(TOPIC, {"version": version, "upserted": [], "deleted": [version]})
+        seen = await _read(first.stream(last_event_id="1"), 2)
+        # El cliente reanuda en el otro worker con el último ID que recibió
+        resumed = second.stream(last_event_id=_ids(seen)[-1])
+        await _read(resumed, 0)
+        await channel.publish(TOPIC, {"version": 4, "upserted": [], "deleted": [4]})
+        return seen, await _read(resumed, 1)
+
+    seen, resumed = asyncio.run(scenario())
+
+    assert _ids(seen) == ["2", "3"]
+    assert _kinds(resumed) == ["changes"]
+    assert _ids(resumed) == ["4"]
+
+
+def test_out_of_order_notices_are_delivered_in_version_order():
+    async def scenario():
+        feed = ChangeFeed(TOPIC)
+        await channel.publish(TOPIC, {"version": 1, "upserted": [], "deleted": []})
+        stream = feed.stream(last_event_id="1", gap_wait=1)
+        await _read(stream, 0)
+        await channel.publish(TOPIC, {"version": 3, "upserted": [], "deleted": []})
+        await channel.publish(TOPIC, {"version": 2, "upserted": [], "deleted": []})
+        return await _read(stream, 2)
+
+    assert _ids(asyncio.run(scenario())) == ["2", "3"]
+
+
+def test_missing_events_send_reset():
+    async def scenario():
+        feed = ChangeFeed(TOPIC)
+        await channel.publish(TOPIC, {"version": 5, "upserted": [], "deleted": []})
+        # El cliente vio la versión 2; el 3 y el 4 no están en este worker
+        return await _read(feed.stream(last_event_id="2", gap_wait=0.05), 1)
+
+    events = asyncio.run(scenario())
+
+    assert _kinds(events) == ["reset"]
+    assert _ids(events) == ["5"]
+
+
+async def _articles_version():
+    async with AsyncSessionLocal() as db:
+        return (await get_table_version(db, ARTICLES_TABLE))[0]
+
+
+def test_writes_publish_the_table_version(client, auth_headers):
+    feed = ChangeFeed(ARTICLES_TOPIC)
+    client.post("/articles/", json=article_payload(0), headers=auth_headers)
+    client.post("/articles/batch", json=[article_payload(1), article_payload(2)], headers=auth_headers)
+    client.patch("/articles/1", json={"name": "Renamed"}, headers=auth_headers)
+    client.delete("/articles/2", headers=auth_headers)
+
+    assert [version for version, _ in feed._events] == [1, 2, 3, 4]
+    assert client.portal.call(_articles_version) == 4
@@ -0,0 +1,111 @@
+import asyncio
+import json
+
+from utils.invalidation import RedisChannel
+from utils.role_cache import RoleCache
+
+CHANNEL = "test:invalidation"
+
+
+class FakeRedis:
+    """
+    Sustituto en memoria de `redis.asyncio.Redis`, con lo que usa `RedisChannel`.
+    `drop_connections` cierra las suscripciones abiertas, como un corte de red.
+    """
+
+    def __init__(self):
+        self.queues = []
+
+    async def publish(self, channel, message):
+        for queue in self.queues:
+            queue.put_nowait({"type": "message", "channel": channel, "data": message})
+
+    def pubsub(self):
+        return FakePubSub(self)
+
+    def drop_connections(self):
+        for queue in self.queues:
+            queue.put_nowait(ConnectionError("connection reset"))
+
+    async def aclose(self):
+        pass
+
+
+class FakePubSub:
+    def __init__(self, server):
+        self.server = server
+        self.queue = asyncio.Queue()
+
+    async def subscribe(self, channel):
+        self.server.queues.append(self.queue)
+
+    async def listen(self):
+        while True:
+            message = await self.queue.get()
+            if isinstance(message, Exception):
+                raise message
+            yield message
+
+    async def aclose(self):
+        if self.queue in self.server.queues:
+            self.server.queues.remove(self.queue)
+
+
+async def _settle():
+    for _ in range(20):
+        await asyncio.sleep(0.01)
+
+
+async def _two_workers(scenario):
+    server = FakeRedis()
+    channels = [RedisChannel("", CHANNEL, client=server, reconnect_delay=0.01) for _ in range(2)]
+    caches = [RoleCache(channel) for channel in channels]
+    for channel in channels:
+        await channel.start()
+    await _settle()
+    try:
+        return await scenario(server, caches)
+    finally:
+        for channel in channels:
+            await channel.stop()
+
+
+def _is_cached(cache):
+    return cache._snapshot is not None
+
+
+def test_publish_in_one_worker_invalidates_role_cache_in_another(client):
+    async def scenario(server, caches):
+        await caches[1].load()
+        await caches[0].invalidate()
+        await _settle()
+        return _is_cached(caches[1])
+
+    assert client.portal.call(_two_workers, scenario) is False
+
+
+def test_malformed_messages_do_not_stop_the_listener(client):
+    async def scenario(server, caches):
+        await caches[1].load()
+        await server.publish(CHANNEL, "not json")
+        await server.publish(CHANNEL, json.dumps({"payload": None}))
+        await caches[0].invalidate()
+        await _settle()
+        return _is_cached(caches[1])
+
+    assert client.portal.call(_two_workers, scenario) is False
+
+
+def test_reconnect_discards_local_caches_and_keeps_listening(client):
+    async def scenario(server, caches):
+        await caches[1].load()
+        # Un aviso publicado durante el corte se pierde; al reconectar se vacía la caché
+        server.drop_connections()
+        await _settle()
+        flushed = not _is_cached(caches[1])
+        await caches[1].load()
+        await caches[0].invalidate()
+        await _settle()
+        return flushed, _is_cached(caches[1])
+
+    assert client.portal.call(_two_workers, scenario) == (True, False)
@@ -0,0 +1,72 @@
+import base64
+import json
+
+import pytest
+
+from conftest import article_payload
+
+
+def _all_pages(client, path, headers=None, **params):
+    items, cursor = [], None
+    while True:
+        query = dict(params, **({"cursor": cursor} if cursor else {}))
+        response = client.get(path, params=query, headers=headers)
+        assert response.status_code == 200, response.text
+        page = response.json()
+        items.extend(page["items"])
+        cursor = page["next_cursor"]
+        if not cursor:
+            return items
+
+
+def test_keyset_by_creation_date_keeps_rows_sharing_a_second(client, auth_headers):
+    # Un solo lote: todas las filas tienen el mismo `create_at` (resolución de segundos en SQLite)
+    response = client.post("/articles/batch", json=[article_payload(i) for i in range(30)], headers=auth_headers)
+    assert response.status_code in (200, 201), response.text
+
+    by_date = _all_pages(client, "/articles/", limit=7, order_by="create_at")
+    by_id = _all_pages(client, "/articles/", limit=7, order_by="id")
+
+    assert len(by_id) == 30
+    assert [item["id"] for item in by_date] == [item["id"] for item in by_id]
+
+
+def test_users_keyset_by_creation_date(client, auth_headers):
+    for i in range(9):
+        client.post("/users/", json={"name": f"U{i}", "email": f"u{i}@example.com",
+                                     "password": "secret123", "roleId": 1})
+
+    users = _all_pages(client, "/users/", headers=auth_headers, limit=4, order_by="created_at")
+
+    assert len(users) == 10
+    assert len({user["id"] for user in users}) == 10
+
+
+def test_cursor_for_another_order_is_rejected(client, auth_headers):
+    client.post("/articles/batch", json=[article_payload(i) for i in range(3)], headers=auth_headers)
+    cursor = client.get("/articles/", params={"limit": 1}).json()["next_cursor"]
+
+    response = client.get("/articles/", params={"limit": 1, "order_by": "create_at", "cursor": cursor})
+
+    assert response.status_code == 400
+
+
+def _crafted_cursor(sort_field, values):
+    raw = json.dumps({"s": sort_field, "v": values}).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+@pytest.mark.parametrize("sort_field, values", [
+    ("id", [None, 1]),
+    ("id", [{"a": 1}, 1]),
+    ("id", ["abc", 1]),
+    ("id", [1, "abc"]),
+    ("id", [True, 1]),
+    ("create_at", ["2024-01-01T00:00:00", None]),
+    ("create_at", ["2024-01-01T00:00:00", [1]]),
+])
+def test_crafted_cursor_values_are_rejected(client, sort_field, values):
+    response = client.get("/articles/", params={"order_by": sort_field,
+                                                "cursor": _crafted_cursor(sort_field, values)})
+
+    assert response.status_code == 400
@@ -0,0 +1,80 @@
+"""
+Principal y réplica de lectura en dos ficheros SQLite.
+
+La réplica se configura al importar `db.database`, así que estos tests se
+ejecutan en un proceso de pytest aparte con `GELA_TEST_REPLICA=1`; en el
+proceso normal solo se lanza ese proceso y se comprueba que pasa.
+"""
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+from sqlalchemy import insert, select
+
+from conftest import REPLICA, article_payload, replica_engine
+from db import database
+from db.article_model import Article as DBArticle
+
+in_replica_process = pytest.mark.skipif(not REPLICA, reason="runs in the GELA_TEST_REPLICA process")
+
+
+@pytest.mark.skipif(REPLICA, reason="already in the replica process")
+def test_replica_scenarios():
+    result = subprocess.run(
+        [sys.executable, "-m", "pytest", "-q", "-p", "no:cacheprovider", __file__],
+        cwd=Path(__file__).resolve().parent.parent, env=dict(os.environ, GELA_TEST_REPLICA="1"),
+        capture_output=True, text=True, timeout=300,
+    )
+    assert result.returncode == 0, result.stdout + result.stderr
+    assert "3 passed" in result.stdout, result.stdout
+
+
+def _article_names(engine):
+    with engine.connect() as connection:
+        return connection.scalars(select(DBArticle.name).order_by(DBArticle.id)).all()
+
+
+@in_replica_process
+def test_reads_go_to_the_replica(client):
+    with replica_engine().begin() as connection:
+        connection.execute(insert(DBArticle).values(id=7, **article_payload(name="Only on replica")))
+
+    listing = client.get("/articles/")
+    single = client.get("/articles/7")
+
+    assert [item["name"] for item in listing.json()["items"]] == ["Only on replica"]
+    assert single.status_code == 200
+    assert single.json()["name"] == "Only on replica"
+    assert _article_names(database.engine) == []
+
+
+@in_replica_process
+def test_writes_and_read_after_write_use_the_primary(client, auth_headers):
+    created = client.post("/articles/", json=article_payload(name="Written"), headers=auth_headers)
+    assert created.status_code == 201, created.text
+    article_id = created.json()["id"]
+
+    # La escritura está en la principal y no en la réplica (aquí no se replica)
+    assert _article_names(database.engine) == ["Written"]
+    assert _article_names(replica_engine()) == []
+    assert client.get(f"/articles/{article_id}").status_code == 404
+
+    # PATCH lee y escribe en la principal; el login y los roles también la leen
+    patched = client.patch(f"/articles/{article_id}", json={"name": "Patched"}, headers=auth_headers)
+    assert patched.status_code == 200, patched.text
+    assert patched.json()["name"] == "Patched"
+    assert [role["rol"] for role in client.get("/roles/").json()] == ["admin"]
+
+
+@in_replica_process
+def test_admin_pool_reports_primary_and_replica(client, auth_headers):
+    client.get("/articles/")
+
+    response = client.get("/admin/pool", headers=auth_headers)
+
+    assert response.status_code == 200, response.text
+    pools = response.json()
+    assert {"primary", "replica", "sync"} <= set(pools)
+    assert pools["replica"]["checkouts"] > 0
@@ -0,0 +1,110 @@
+import asyncio
+
+import httpx
+
+import main
+from conftest import article_payload
+
+INITIAL_STOCK = 20
+CONCURRENT_RESERVATIONS = 60
+
+
+def _post_concurrently(client, headers, path, bodies):
+    """
+    Lanza todas las peticiones a la vez en el bucle de eventos de la
+    aplicación (el mismo que usa el pool de aiosqlite).
+    """
+    async def run():
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as async_client:
+            responses = await asyncio.gather(*(
+                async_client.post(path, json=body, headers=headers) for body in bodies
+            ))
+        return [response.status_code for response in responses]
+
+    return client.portal.call(run)
+
+
+def _reserve_concurrently(client, headers, bodies):
+    return _post_concurrently(client, headers, "/articles/reservations", bodies)
+
+
+def test_parallel_reservations_never_oversell(client, auth_headers):
+    article = client.post("/articles/", json=article_payload(available_quantity=INITIAL_STOCK),
+                          headers=auth_headers).json()
+    body = {"items": [{"article_id": article["id"], "quantity": 1}]}
+
+    codes = _reserve_concurrently(client, auth_headers, [body] * CONCURRENT_RESERVATIONS)
+
+    assert set(codes) <= {200, 409}
+    assert codes.count(200) == INITIAL_STOCK
+    stock = client.get(f"/articles/{article['id']}").json()["available_quantity"]
+    assert stock == 0
+
+
+def test_parallel_multi_article_reservations_are_all_or_nothing(client, auth_headers):
+    first = client.post("/articles/", json=article_payload(1, available_quantity=10), headers=auth_headers).json()
+    second = client.post("/articles/", json=article_payload(2, available_quantity=30), headers=auth_headers).json()
+    # Las líneas llegan en órdenes distintos: se bloquean siempre en el mismo orden
+    bodies = [
+        {"items": [{"article_id": first["id"], "quantity": 1}, {"article_id": second["id"], "quantity": 2}]},
+        {"items": [{"article_id": second["id"], "quantity": 2}, {"article_id": first["id"], "quantity": 1}]},
+    ] * 20
+
+    codes = _reserve_concurrently(client, auth_headers, bodies)
+
+    assert set(codes) <= {200, 409}
+    successes = codes.count(200)
+    first_stock = client.get(f"/articles/{first['id']}").json()["available_quantity"]
+    second_stock = client.get(f"/articles/{second['id']}").json()["available_quantity"]
+    assert first_stock >= 0 and second_stock >= 0
+    assert first_stock == 10 - successes
+    assert second_stock == 30 - 2 * successes
+    assert successes == 10
+
+
+def test_reservation_totals_match_inventory_stats(client, auth_headers):
+    article = client.post("/articles/", json=article_payload(available_quantity=INITIAL_STOCK),
+                          headers=auth_headers).json()
+    _reserve_concurrently(client, auth_headers, [{"items": [{"article_id": article["id"], "quantity": 3}]}] * 10)
+
+    stats = client.get("/articles/stats").json()
+
+    assert stats["total_stock"] == INITIAL_STOCK % 3
+    reconciliation = client.post("/admin/article-stats/reconcile", headers=auth_headers).json()
+    assert reconciliation["drift"] == []
+
+
+def _second_user_headers(client):
+    client.post("/users/", json={"name": "Other", "email": "other@example.com", "password": "secret123", "roleId": 1})
+    token = client.post("/users/login", data={"username": "other@example.com", "password": "secret123"}).json()
+    return {"Authorization": f"Bearer {token['access_token']}"}
+
+
+def test_release_returns_what_the_reservation_took_once(client, auth_headers):
+    article = client.post("/articles/", json=article_payload(available_quantity=10), headers=auth_headers).json()
+    reservation = client.post("/articles/reservations", json={"items": [{"article_id": article["id"], "quantity": 4}]},
+                              headers=auth_headers).json()
+    path = f"/articles/reservations/{reservation['id']}/release"
+
+    assert client.post(path, headers=_second_user_headers(client)).status_code == 404
+    released = client.post(path, headers=auth_headers)
+    again = client.post(path, headers=auth_headers)
+
+    assert released.status_code == 200, released.text
+    assert released.json()["status"] == "released"
+    assert again.status_code == 409
+    assert client.get(f"/articles/{article['id']}").json()["available_quantity"] == 10
+    assert client.post("/articles/reservations/999/release", headers=auth_headers).status_code == 404
+
+
+def test_parallel_releases_return_stock_once(client, auth_headers):
+    article = client.post("/articles/", json=article_payload(available_quantity=10), headers=auth_headers).json()
+    reservation = client.post("/articles/reservations", json={"items": [{"article_id": article["id"], "quantity": 6}]},
+                              headers=auth_headers).json()
+
+    codes = _post_concurrently(client, auth_headers, f"/articles/reservations/{reservation['id']}/release",
+                               [None] * 10)
+
+    assert sorted(codes) == [200] + [409] * 9
+    assert client.get(f"/articles/{article['id']}").json()["available_quantity"] == 10
@@ -0,0 +1,12 @@
+import pytest
+
+
+@pytest.mark.parametrize("method", ["patch", "put"])
+def test_renaming_a_role_to_an_existing_name_conflicts(client, auth_headers, method):
+    other = client.post("/roles/", json={"rol": "editor"}, headers=auth_headers).json()
+
+    response = getattr(client, method)(f"/roles/{other['id']}", json={"rol": "admin"}, headers=auth_headers)
+
+    assert response.status_code == 409
+    assert response.json()["detail"] == "Rol already exists"
+    assert client.get(f"/roles/{other['id']}").json()["rol"] == "editor"
@@ -0,0 +1,58 @@
+from typing import Any, Dict, Iterable, List, Mapping, Optional
+
+from schemas.article import Article as ArticleSchema
+from utils.article_stats import ArticleStatsDelta
+from utils.invalidation import channel
+
+# Tema del canal por el que se anuncian los cambios de artículos
+ARTICLES_TOPIC = "articles"
+
+
+def article_payload(article) -> Dict[str, Any]:
+    """
+    Representación serializable de un artículo para los avisos de cambios.
+    """
+    payload = ArticleSchema.model_validate(article, from_attributes=True).model_dump()
+    if isinstance(article, Mapping):
+        updated_at = article.get("updated_at")
+    else:
+        updated_at = getattr(article, "updated_at", None)
+    payload["updated_at"] = updated_at.isoformat() if updated_at is not None else None
+    return payload
+
+
+async def publish_article_changes(upserted: Iterable = (), deleted: Iterable[int] = (),
+                                  version: Optional[int] = None):
+    """
+    Anuncia, después del commit, los artículos creados/modificados y los IDs
+    eliminados. Los consumidores (índice de búsqueda, etc.) se suscriben al
+    tema `ARTICLES_TOPIC` del canal de invalidación.
+
+    `version` es la versión de `articles` que dejó la transacción (la que
+    devuelve `bump_table_version`); identifica el cambio en todos los workers.
+    """
+    payload = {
+        "version": version,
+        "upserted": [article_payload(article) for article in upserted],
+        "deleted": list(deleted),
+    }
+    if payload["upserted"] or payload["deleted"]:
+        await channel.publish(ARTICLES_TOPIC, payload)
+
+
+class ArticleChangeSet:
+    """
+    Acumula los cambios de una transacción para anunciarlos tras el commit.
+    Si la transacción se deshace, simplemente se descarta.
+    `stats` recoge sus diferencias para el resumen del inventario, que se
+    aplican antes del commit; `version`, la versión de la tabla tras el cambio.
+    """
+
+    def __init__(self):
+        self.upserted: List[Any] = []
+        self.deleted: List[int] = []
+        self.stats = ArticleStatsDelta()
+        self.version: Optional[int] = None
+
+    async def publish(self):
+        await publish_article_changes(self.upserted, self.deleted, self.version)
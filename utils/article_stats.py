@@ -0,0 +1,269 @@
+"""
+Estadísticas del inventario por tipo (`/articles/stats`), mantenidas de
+forma incremental en la tabla `article_stats`.
+
+Cada escritura de artículos acumula sus diferencias por tipo (número de
+artículos, stock y valor `price * available_quantity`) en un
+`ArticleStatsDelta` y las aplica con un único upsert antes del commit, en la
+misma transacción. Leer las estadísticas es leer unas pocas filas, sin
+recorrer `articles`.
+
+Cualquier escritura que no pase por la API (scripts, SQL a mano) desajusta
+el resumen; `reconcile_article_stats` lo recalcula desde cero, bajo demanda
+(`POST /admin/article-stats/reconcile`) o cada
+`ARTICLE_STATS_RECONCILE_INTERVAL` segundos.
+"""
+import asyncio
+import logging
+import os
+from decimal import ROUND_HALF_UP, Decimal
+from typing import Any, Dict, List, Mapping, Optional
+
+from sqlalchemy import delete, func, insert, select, update
+from sqlalchemy.dialects import mysql, postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from db.article_model import Article as DBArticle
+from db.article_stats_model import ArticleStats
+from db.database import AsyncSessionLocal
+from db.models import utcnow
+from utils.metrics import Counter
+from utils.versioning import ARTICLES_TABLE, bump_table_version, lock_table_version
+
+logger = logging.getLogger(__name__)
+
+# Segundos entre reconciliaciones automáticas (0 = solo bajo demanda)
+ARTICLE_STATS_RECONCILE_INTERVAL = float(os.getenv("ARTICLE_STATS_RECONCILE_INTERVAL", "0"))
+
+# Columnas de `articles` que afectan a las estadísticas
+STATS_FIELDS = ("type", "price", "available_quantity")
+
+ARTICLE_STATS_DRIFT = Counter("article_stats_drift_total",
+                              "Article types whose summary was corrected by reconciliation.")
+
+_CENT = Decimal("0.01")
+
+
+def _cents(value) -> Decimal:
+    return Decimal(str(value)).quantize(_CENT, rounding=ROUND_HALF_UP)
+
+
+def _value(price, quantity) -> Decimal:
+    # El precio se redondea como lo guarda la columna DECIMAL(10,2) antes de
+    # multiplicar: la diferencia debe ser la misma que verá la reconciliación
+    return _cents(price) * int(quantity)
+
+
+def _field(article, name: str):
+    return article[name] if isinstance(article, Mapping) else getattr(article, name)
+
+
+class ArticleStatsDelta:
+    """
+    Diferencias de una transacción, agrupadas por tipo.
+    """
+
+    def __init__(self):
+        self._deltas: Dict[str, List] = {}
+
+    def _delta(self, type: str) -> List:
+        return self._deltas.setdefault(type, [0, 0, Decimal(0)])
+
+    def add(self, article, sign: int = 1):
+        """
+        Suma un artículo (fila, objeto ORM o diccionario); `sign=-1` lo resta.
+        """
+        quantity = int(_field(article, "available_quantity"))
+        delta = self._delta(_field(article, "type"))
+        delta[0] += sign
+        delta[1] += sign * quantity
+        delta[2] += sign * _value(_field(article, "price"), quantity)
+
+    def remove(self, article):
+        self.add(article, sign=-1)
+
+    def replace(self, old, new):
+        self.remove(old)
+        self.add(new)
+
+    def adjust_stock(self, article, quantity: int):
+        """
+        Cambio de stock de `quantity` unidades (negativo al reservar) de un
+        artículo con el precio de `article`.
+        """
+        delta = self._delta(_field(article, "type"))
+        delta[1] += quantity
+        delta[2] += _value(_field(article, "price"), quantity)
+
+    def rows(self) -> List[Dict[str, Any]]:
+        # En orden de tipo, para que las transacciones concurrentes bloqueen
+        # las filas del resumen siempre en el mismo orden
+        return [
+            {"type": type, "article_count": count, "total_stock": stock, "inventory_value": value}
+            for type, (count, stock, value) in sorted(self._deltas.items())
+            if count or stock or value
+        ]
+
+    async def apply(self, db: AsyncSession):
+        """
+        Aplica las diferencias dentro de la transacción en curso (antes del commit).
+        """
+        rows = self.rows()
+        if not rows:
+            return
+        now = utcnow()
+        for row in rows:
+            row["updated_at"] = now
+        statement = _upsert(db.bind.dialect.name, rows)
+        if statement is not None:
+            await db.execute(statement)
+            return
+        # Otros motores: UPDATE y, si el tipo no existía, INSERT
+        for row in rows:
+            result = await db.execute(
+                update(ArticleStats).where(ArticleStats.type == row["type"]).values(**_increments(row))
+            )
+            if result.rowcount == 0:
+                await db.execute(insert(ArticleStats).values(**row))
+
+
+def _increments(values) -> Dict[str, Any]:
+    return {
+        "article_count": ArticleStats.article_count + values["article_count"],
+        "total_stock": ArticleStats.total_stock + values["total_stock"],
+        "inventory_value": ArticleStats.inventory_value + values["inventory_value"],
+        "updated_at": values["updated_at"],
+    }
+
+
+def _upsert(dialect_name: str, rows: List[Dict[str, Any]]):
+    """
+    INSERT multi-fila que suma las diferencias a las filas existentes, o
+    `None` si el motor no tiene upsert.
+    """
+    if dialect_name == "mysql":
+        statement = mysql.insert(ArticleStats).values(rows)
+        return statement.on_duplicate_key_update(**_increments(statement.inserted))
+    if dialect_name in ("sqlite", "postgresql"):
+        statement = (sqlite if dialect_name == "sqlite" else postgresql).insert(ArticleStats).values(rows)
+        return statement.on_conflict_do_update(index_elements=[ArticleStats.type],
+                                               set_=_increments(statement.excluded))
+    return None
+
+
+# ====================================================================
+# Lectura
+# ====================================================================
+async def read_article_stats(db: AsyncSession) -> Dict[str, Any]:
+    """
+    Estadísticas por tipo y totales, a partir de la tabla de resumen.
+    """
+    rows = (await db.scalars(
+        select(ArticleStats).where(ArticleStats.article_count > 0).order_by(ArticleStats.type)
+    )).all()
+    types = [
+        {"type": row.type, "article_count": row.article_count, "total_stock": int(row.total_stock),
+         "inventory_value": _cents(row.inventory_value)}
+        for row in rows
+    ]
+    return {
+        "types": types,
+        "article_count": sum(item["article_count"] for item in types),
+        "total_stock": sum(item["total_stock"] for item in types),
+        "inventory_value": sum((item["inventory_value"] for item in types), Decimal(0)),
+    }
+
+
+# ====================================================================
+# Reconciliación
+# ====================================================================
+def aggregate_query():
+    """
+    Recalcula el resumen recorriendo `articles` (solo para reconciliar).
+    """
+    return select(
+        DBArticle.type,
+        func.count().label("article_count"),
+        func.coalesce(func.sum(DBArticle.available_quantity), 0).label("total_stock"),
+        func.coalesce(func.sum(DBArticle.price * DBArticle.available_quantity), 0).label("inventory_value"),
+    ).group_by(DBArticle.type)
+
+
+def _summary(row) -> Dict[str, Any]:
+    return {"article_count": int(row.article_count), "total_stock": int(row.total_stock),
+            "inventory_value": _cents(row.inventory_value)}
+
+
+async def reconcile_article_stats(db: Optional[AsyncSession] = None) -> Dict[str, Any]:
+    """
+    Sustituye el resumen por el recalculado y devuelve los tipos que no
+    cuadraban. Las filas del resumen se bloquean antes de recalcular: las
+    escrituras concurrentes esperan y aplican su diferencia sobre el
+    resultado nuevo. Antes se bloquea la versión de `articles`, en el mismo
+    orden que las escrituras (versión y después resumen), para no provocar
+    interbloqueos con ellas.
+    """
+    if db is None:
+        async with AsyncSessionLocal() as session:
+            return await reconcile_article_stats(session)
+    try:
+        await lock_table_version(db, ARTICLES_TABLE)
+        current = {row.type: _summary(row)
+                   for row in (await db.scalars(select(ArticleStats).with_for_update())).all()
+                   if row.article_count or row.total_stock or row.inventory_value}
+        expected = {row.type: _summary(row) for row in (await db.execute(aggregate_query())).all()}
+        drift = [
+            {"type": type, "expected": expected.get(type), "actual": current.get(type)}
+            for type in sorted(set(current) | set(expected))
+            if current.get(type) != expected.get(type)
+        ]
+        now = utcnow()
+        await db.execute(delete(ArticleStats))
+        if expected:
+            await db.execute(insert(ArticleStats),
+                             [dict(summary, type=type, updated_at=now) for type, summary in expected.items()])
+        if drift:
+            # Cambia el ETag de /articles/stats
+            await bump_table_version(db, ARTICLES_TABLE)
+        await db.commit()
+    except Exception:
+        await db.rollback()
+        raise
+
+    if drift:
+        ARTICLE_STATS_DRIFT.inc(amount=len(drift))
+        logger.warning(f"Article stats drift corrected for {len(drift)} type(s): "
+                       f"{', '.join(item['type'] for item in drift[:10])}")
+    return {"types": len(expected), "drift": drift}
+
+
+_reconciler: Optional[asyncio.Task] = None
+
+
+async def _reconcile_periodically(interval: float):
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await reconcile_article_stats()
+        except Exception as e:
+            logger.error(f"Article stats reconciliation failed: {e}")
+
+
+def start_reconciler(interval: float = ARTICLE_STATS_RECONCILE_INTERVAL):
+    """
+    Lanza la reconciliación periódica si está configurada.
+    """
+    global _reconciler
+    if interval > 0 and _reconciler is None:
+        _reconciler = asyncio.create_task(_reconcile_periodically(interval))
+
+
+async def stop_reconciler():
+    global _reconciler
+    if _reconciler is not None:
+        _reconciler.cancel()
+        try:
+            await _reconciler
+        except (asyncio.CancelledError, Exception):
+            pass
+        _reconciler = None
@@ -1,15 +1,37 @@
+import hashlib
+import heapq
+import os
+import threading
+import time
+from collections import OrderedDict
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Dict, Optional, Tuple
 from jose import jwt, JWTError
 from fastapi import HTTPException, status, Depends
 from fastapi.security import OAuth2PasswordBearer
 from pydantic import BaseModel
+from sqlalchemy import select
+
+from db.database import AsyncSessionLocal
+from db.user_model import User as DBUser
+from utils.metrics import timed
+from utils.role_cache import role_cache
 
 # Este es el secret key, en una aplicación de producción debe ser una
 # variable de entorno o estar gestionada de forma segura.
 SECRET_KEY = "edgar321"
 ALGORITHM = "HS256"
-ACCESS_TOKEN_EXPIRE_MINUTES = 30
+# Los tokens de acceso son cortos; los clientes los renuevan con el refresh
+# token (POST /users/refresh) sin volver a enviar la contraseña.
+ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "15"))
+
+# Número máximo de tokens verificados que se guardan en memoria
+TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE", "10000"))
+
+# Rutas de administración (/admin): desactivadas por defecto (404). Activadas,
+# solo las pueden usar los usuarios con el rol ADMIN_ROLE_NAME.
+ADMIN_API_ENABLED = os.getenv("ADMIN_API_ENABLED", "false").lower() in ("1", "true", "yes")
+ADMIN_ROLE_NAME = os.getenv("ADMIN_ROLE_NAME", "admin")
 
 # OAuth2PasswordBearer se usa para obtener el token del header de la solicitud
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="users/login")
@@ -20,6 +42,110 @@ class Token(BaseModel):
     """
     access_token: str
     token_type: str
+    refresh_token: Optional[str] = None
+    expires_in: Optional[int] = None
+
+class TokenCache:
+    """
+    Caché LRU de tokens ya verificados.
+
+    La clave es el SHA-256 del token (no se guarda el token en claro) y cada
+    entrada caduca en el `exp` del propio token, así que un token expirado
+    nunca se da por válido desde la caché. Las sesiones revocadas no se
+    quitan de aquí: `get_current_user` comprueba `revoked_families` también
+    con los claims que vienen de la caché.
+    """
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, Tuple[float, Dict]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(token: str) -> str:
+        return hashlib.sha256(token.encode()).hexdigest()
+
+    def get(self, token: str) -> Optional[Dict]:
+        key = self._key(token)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, claims = entry
+            if expires_at <= time.time():
+                del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return claims
+
+    def put(self, token: str, claims: Dict):
+        expires_at = claims.get("exp")
+        if expires_at is None or self.max_size <= 0:
+            return
+        key = self._key(token)
+        with self._lock:
+            self._entries[key] = (float(expires_at), claims)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"size": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+token_cache = TokenCache(TOKEN_CACHE_SIZE)
+
+class ExpiringSet:
+    """
+    Conjunto en memoria cuyas claves caducan solas.
+
+    Se usa para las familias de tokens revocadas: basta con recordarlas
+    mientras pueda quedar vivo algún token de acceso emitido para ellas, así
+    que el conjunto se mantiene pequeño. La consulta no toma el lock.
+    """
+
+    def __init__(self):
+        self._expires: Dict[str, float] = {}
+        self._heap = []
+        self._lock = threading.Lock()
+
+    def add(self, key: str, expires_at: float):
+        with self._lock:
+            if expires_at <= self._expires.get(key, 0):
+                return
+            self._expires[key] = expires_at
+            heapq.heappush(self._heap, (expires_at, key))
+            self._purge(time.time())
+
+    def _purge(self, now: float):
+        while self._heap and self._heap[0][0] <= now:
+            expires_at, key = heapq.heappop(self._heap)
+            if self._expires.get(key) == expires_at:
+                del self._expires[key]
+
+    def __contains__(self, key) -> bool:
+        expires_at = self._expires.get(key)
+        return expires_at is not None and expires_at > time.time()
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._purge(time.time())
+            return len(self._expires)
+
+
+# Familias de refresh tokens revocadas (logout, reutilización de un token
+# rotado, cambio de contraseña). Ver utils/refresh_tokens.py.
+revoked_families = ExpiringSet()
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     """
@@ -31,10 +157,23 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     else:
         expire = datetime.utcnow() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     to_encode.update({"exp": expire})
-    encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
+    with timed("auth", "jwt_encode"):
+        encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
-def get_current_user(token: str = Depends(oauth2_scheme)):
+def decode_token(token: str) -> Dict:
+    """
+    Decodifica y verifica un token JWT, usando la caché de tokens verificados.
+    Lanza `JWTError` si el token no es válido.
+    """
+    with timed("auth", "jwt_decode"):
+        claims = token_cache.get(token)
+        if claims is None:
+            claims = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+            token_cache.put(token, claims)
+    return claims
+
+async def get_current_user(token: str = Depends(oauth2_scheme)):
     """
     Verifica un token JWT y retorna el correo del usuario si es válido.
     """
@@ -44,10 +183,30 @@ def get_current_user(token: str = Depends(oauth2_scheme)):
         headers={"WWW-Authenticate": "Bearer"},
     )
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        payload = decode_token(token)
         email: str = payload.get("sub")
         if email is None:
             raise credentials_exception
     except JWTError:
         raise credentials_exception
+    # Sesión cerrada o comprometida: sus tokens de acceso dejan de valer ya
+    family_id = payload.get("fam")
+    if family_id is not None and family_id in revoked_families:
+        raise credentials_exception
     return email
+
+async def require_admin(current_user: str = Depends(get_current_user)) -> str:
+    """
+    Dependencia de las rutas de administración: 404 si están desactivadas
+    (`ADMIN_API_ENABLED`) y 403 si el usuario no tiene el rol `ADMIN_ROLE_NAME`.
+    El rol del usuario se lee en cada llamada, así que retirarlo surte efecto
+    de inmediato aunque su token siga vigente.
+    """
+    if not ADMIN_API_ENABLED:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    async with AsyncSessionLocal() as db:
+        role_id = await db.scalar(select(DBUser.roleId).where(DBUser.email == current_user))
+    role = await role_cache.get(role_id) if role_id is not None else None
+    if role is None or role.rol != ADMIN_ROLE_NAME:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin role required")
+    return current_user
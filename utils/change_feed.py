@@ -0,0 +1,208 @@
+"""
+Flujo de cambios de artículos (Server-Sent Events) para `/articles/changes`.
+
+Los paneles que consultaban `GET /articles/` cada pocos segundos pueden
+suscribirse y recibir solo las filas que cambian. El flujo se alimenta de
+los avisos que las escrituras ya publican en el tema `articles` del canal
+de invalidación, así que con Redis cada worker ve los cambios de todos.
+
+- Cada aviso se serializa una sola vez y se guarda en un buffer circular de
+  `ARTICLE_CHANGES_BUFFER_SIZE` eventos.
+- Los suscriptores esperan a un `asyncio.Event` compartido que se sustituye
+  en cada aviso: un suscriptor inactivo es una corrutina dormida, sin cola
+  propia ni tareas.
+- Un cliente que se reconecta envía `Last-Event-ID` y recibe los eventos que
+  se perdió. El ID de cada evento es la versión de la tabla `articles` que
+  dejó la escritura (`bump_table_version`, en la misma transacción), así que
+  es el mismo en todos los workers y el cliente puede reanudar en cualquiera.
+- Las versiones son consecutivas: un salto indica eventos que este worker no
+  tiene (ya salieron del buffer, se perdieron con una caída de Redis o la
+  versión la subió la reconciliación de estadísticas). Tras esperar
+  `ARTICLE_CHANGES_GAP_WAIT` por si llegan desordenados, el cliente recibe un
+  evento `reset` y debe volver a cargar el listado.
+"""
+import asyncio
+import json
+import os
+from collections import deque
+from typing import AsyncIterator, Deque, Optional, Tuple
+
+from fastapi import HTTPException, status
+
+from utils.article_changes import ARTICLES_TOPIC
+from utils.invalidation import channel
+from utils.metrics import Gauge
+
+# Configuración (variables de entorno)
+# - ARTICLE_CHANGES_BUFFER_SIZE: eventos recientes que se guardan para reanudar.
+# - ARTICLE_CHANGES_HEARTBEAT: segundos entre comentarios de keep-alive; sirven
+#   para que los proxies no cierren la conexión y para detectar clientes caídos.
+# - ARTICLE_CHANGES_MAX_SUBSCRIBERS: conexiones simultáneas por worker (503 al superarlo).
+# - ARTICLE_CHANGES_MAX_AGE: segundos tras los que el servidor cierra el flujo y
+#   el cliente se reconecta con `Last-Event-ID`. Uvicorn espera a que terminen
+#   las conexiones abiertas antes de detenerse, así que esto acota lo que
+#   tarda un reinicio.
+# - ARTICLE_CHANGES_GAP_WAIT: segundos que se espera a un evento que falta
+#   (dos escrituras cuyos avisos llegan en otro orden) antes de enviar `reset`.
+ARTICLE_CHANGES_BUFFER_SIZE = int(os.getenv("ARTICLE_CHANGES_BUFFER_SIZE", "1000"))
+ARTICLE_CHANGES_HEARTBEAT = float(os.getenv("ARTICLE_CHANGES_HEARTBEAT", "15"))
+ARTICLE_CHANGES_MAX_SUBSCRIBERS = int(os.getenv("ARTICLE_CHANGES_MAX_SUBSCRIBERS", "10000"))
+ARTICLE_CHANGES_MAX_AGE = float(os.getenv("ARTICLE_CHANGES_MAX_AGE", "300"))
+ARTICLE_CHANGES_GAP_WAIT = float(os.getenv("ARTICLE_CHANGES_GAP_WAIT", "1"))
+
+# Milisegundos que el navegador espera antes de reconectar
+SSE_RETRY_MS = 3000
+
+SSE_HEADERS = {
+    "Cache-Control": "no-cache",
+    # Evita que nginx acumule el flujo en su buffer
+    "X-Accel-Buffering": "no",
+}
+
+CHANGE_FEED_SUBSCRIBERS = Gauge("article_changes_subscribers", "Open /articles/changes streams.")
+
+
+class ChangeFeed:
+    """
+    Buffer circular de eventos, ordenado por versión, y difusión a los
+    suscriptores de este worker. La posición de un suscriptor es la última
+    versión que recibió (0 = aún ninguna: acepta la siguiente que llegue).
+    """
+
+    def __init__(self, topic: str, buffer_size: int = ARTICLE_CHANGES_BUFFER_SIZE):
+        self._events: Deque[Tuple[int, str]] = deque(maxlen=buffer_size)
+        self._wakeup: Optional[asyncio.Event] = None
+        self.subscribers = 0
+        channel.subscribe(topic, self._on_change)
+
+    @property
+    def latest(self) -> int:
+        return self._events[-1][0] if self._events else 0
+
+    def _on_change(self, payload):
+        if not payload or not isinstance(payload.get("version"), int):
+            return
+        version = payload["version"]
+        data = json.dumps(payload, default=str, separators=(",", ":"))
+        if version > self.latest:
+            self._events.append((version, data))
+        else:
+            # Aviso que llega desordenado: se coloca en su sitio (o se ignora si ya estaba)
+            index = len(self._events)
+            while index and self._events[index - 1][0] > version:
+                index -= 1
+            if index and self._events[index - 1][0] == version:
+                return
+            full = len(self._events) == self._events.maxlen
+            if full and index == 0:
+                # Más antiguo que todo el buffer
+                return
+            if full:
+                self._events.popleft()
+                index -= 1
+            self._events.insert(index, (version, data))
+        # Despierta a todos los que esperan y deja un evento nuevo para la siguiente espera
+        wakeup, self._wakeup = self._wakeup, None
+        if wakeup is not None:
+            wakeup.set()
+
+    def _wait(self) -> asyncio.Event:
+        if self._wakeup is None:
+            self._wakeup = asyncio.Event()
+        return self._wakeup
+
+    def resume_point(self, last_event_id: Optional[str]) -> Optional[int]:
+        """
+        Versión a partir de la que se reanuda, o `None` si el ID no es válido
+        o sus eventos siguientes ya salieron del buffer (se envía `reset`).
+        Sin ID se empieza por los eventos nuevos.
+        """
+        if not last_event_id:
+            return self.latest
+        if not last_event_id.isdigit():
+            return None
+        version = int(last_event_id)
+        if self._events and version < self._events[0][0] - 1:
+            return None
+        return version
+
+    def _after(self, version: int):
+        # Eventos consecutivos a partir de `version`. Se recorre desde el
+        # final: normalmente solo faltan uno o dos eventos
+        pending = []
+        for event in reversed(self._events):
+            if event[0] <= version:
+                break
+            pending.append(event)
+        pending.reverse()
+        if version:
+            for index, (event_version, _) in enumerate(pending):
+                if event_version != version + index + 1:
+                    return pending[:index], True
+        return pending, False
+
+    @staticmethod
+    def _format(version: int, data: str) -> str:
+        return f"id: {version}\nevent: changes\ndata: {data}\n\n"
+
+    def _reset(self) -> Tuple[int, str]:
+        position = self.latest
+        event_id = f"id: {position}\n" if position else ""
+        return position, f"{event_id}event: reset\ndata: {{}}\n\n"
+
+    async def stream(self, last_event_id: Optional[str] = None, heartbeat: float = ARTICLE_CHANGES_HEARTBEAT,
+                     max_age: float = ARTICLE_CHANGES_MAX_AGE,
+                     gap_wait: float = ARTICLE_CHANGES_GAP_WAIT) -> AsyncIterator[str]:
+        """
+        Genera el flujo SSE de un suscriptor. Termina cuando el cliente se
+        desconecta (Starlette cancela el generador) o tras `max_age` segundos.
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + max_age
+        position = self.resume_point(last_event_id)
+        gap_deadline = None
+        self.subscribers += 1
+        CHANGE_FEED_SUBSCRIBERS.inc()
+        try:
+            yield f"retry: {SSE_RETRY_MS}\n\n"
+            if position is None:
+                position, event = self._reset()
+                yield event
+            while True:
+                pending, gap = self._after(position)
+                if pending:
+                    position = pending[-1][0]
+                    gap_deadline = None
+                    yield "".join(self._format(version, data) for version, data in pending)
+                    continue
+                if gap:
+                    if gap_deadline is None:
+                        gap_deadline = loop.time() + gap_wait
+                    elif loop.time() >= gap_deadline:
+                        # El evento que falta no va a llegar: no se puede saber qué se perdió
+                        position, event = self._reset()
+                        gap_deadline = None
+                        yield event
+                        continue
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    return
+                timeout = min(heartbeat, remaining)
+                if gap_deadline is not None:
+                    timeout = min(timeout, max(gap_deadline - loop.time(), 0))
+                try:
+                    await asyncio.wait_for(self._wait().wait(), timeout=timeout)
+                except asyncio.TimeoutError:
+                    if gap_deadline is None:
+                        yield ": ping\n\n"
+        finally:
+            self.subscribers -= 1
+            CHANGE_FEED_SUBSCRIBERS.dec()
+
+    def check_capacity(self):
+        if self.subscribers >= ARTICLE_CHANGES_MAX_SUBSCRIBERS:
+            raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                                detail="Too many change stream subscribers", headers={"Retry-After": "30"})
+
+
+article_feed = ChangeFeed(ARTICLES_TOPIC)
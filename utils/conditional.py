@@ -0,0 +1,99 @@
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Any, Dict, List, Optional
+
+from fastapi import HTTPException, Request, Response, status
+
+
+def make_etag(*parts: Any) -> str:
+    """
+    Construye un ETag fuerte a partir de los valores que identifican una
+    representación (tabla, versión, parámetros de la consulta...).
+    """
+    digest = hashlib.sha1("|".join(str(part) for part in parts).encode()).hexdigest()
+    return f'"{digest[:20]}"'
+
+
+def version_etag(version: int) -> str:
+    """
+    ETag de un recurso con columna `version`. Contiene la propia versión para
+    que `If-Match` se traduzca directamente en `WHERE version = ...`.
+    """
+    return f'"v{version}"'
+
+
+def if_match_versions(request: Request) -> Optional[List[int]]:
+    """
+    Versiones aceptadas por `If-Match`, o `None` si no hay precondición
+    (sin cabecera o `*`). Las etiquetas débiles o que no son de `version_etag`
+    nunca coinciden (comparación fuerte, RFC 9110), así que si no queda
+    ninguna se responde 412 directamente.
+    """
+    if_match = request.headers.get("if-match")
+    if if_match is None or if_match.strip() == "*":
+        return None
+    versions = []
+    for tag in if_match.split(","):
+        tag = tag.strip()
+        if tag.startswith('"v') and tag.endswith('"') and tag[2:-1].isdigit():
+            versions.append(int(tag[2:-1]))
+    if not versions:
+        raise HTTPException(status_code=status.HTTP_412_PRECONDITION_FAILED, detail="Precondition failed")
+    return versions
+
+
+def _to_utc(value: datetime) -> datetime:
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+def has_conditional_headers(request: Request) -> bool:
+    return "if-none-match" in request.headers or "if-modified-since" in request.headers
+
+
+def is_not_modified(request: Request, etag: str, last_modified: Optional[datetime] = None) -> bool:
+    """
+    Evalúa `If-None-Match` y, si no viene, `If-Modified-Since`.
+    """
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        if if_none_match.strip() == "*":
+            return True
+        # Comparación débil (RFC 9110): se ignora el prefijo W/
+        candidates = {tag.strip() for tag in if_none_match.split(",")}
+        return etag in candidates or f"W/{etag}" in candidates
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since is not None and last_modified is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        return _to_utc(last_modified).replace(microsecond=0) <= _to_utc(since)
+    return False
+
+
+def validator_headers(etag: str, last_modified: Optional[datetime] = None) -> Dict[str, str]:
+    """
+    Cabeceras `ETag` y `Last-Modified`.
+    `no-cache` obliga a revalidar siempre, con lo que el cliente envía el ETag.
+    """
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if last_modified is not None:
+        headers["Last-Modified"] = format_datetime(_to_utc(last_modified), usegmt=True)
+    return headers
+
+
+def set_validators(response: Response, etag: str, last_modified: Optional[datetime] = None):
+    """
+    Añade `ETag` y `Last-Modified` a la respuesta.
+    """
+    response.headers.update(validator_headers(etag, last_modified))
+
+
+def not_modified_response(etag: str, last_modified: Optional[datetime] = None) -> Response:
+    response = Response(status_code=status.HTTP_304_NOT_MODIFIED)
+    set_validators(response, etag, last_modified)
+    return response
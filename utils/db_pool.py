@@ -0,0 +1,107 @@
+"""
+Pools de conexiones con medición del tiempo de espera.
+
+SQLAlchemy informa del tamaño del pool y de las conexiones en uso, pero no
+de cuánto espera una petición a que quede una conexión libre. Las clases que
+crea `timed_pool_class` miden esa espera en cada checkout; `pool_stats`
+reúne ambos datos para `/admin/pool` y `/metrics`.
+"""
+import threading
+from time import perf_counter
+from typing import Dict
+
+from utils.metrics import QUERY_BUCKETS, CallbackGauge, Histogram
+
+# Motores registrados por nombre ("primary", "replica", "sync")
+_engines: Dict[str, object] = {}
+
+DB_POOL_WAIT = Histogram("db_pool_wait_seconds", "Time spent waiting for a pooled connection.",
+                         ("pool",), buckets=QUERY_BUCKETS)
+
+
+def timed_pool_class(base, name: str):
+    """
+    Devuelve una subclase de `base` (`QueuePool` o `AsyncAdaptedQueuePool`)
+    que mide la espera de cada checkout. Las estadísticas se guardan en la
+    clase, así que sobreviven a `engine.dispose()`, que crea un pool nuevo.
+    """
+
+    class TimedPool(base):
+        pool_name = name
+        waits = 0
+        wait_total = 0.0
+        wait_max = 0.0
+        timeouts = 0
+        _stats_lock = threading.Lock()
+
+        def _do_get(self):
+            start = perf_counter()
+            try:
+                return super()._do_get()
+            except Exception:
+                with self._stats_lock:
+                    type(self).timeouts += 1
+                raise
+            finally:
+                elapsed = perf_counter() - start
+                DB_POOL_WAIT.observe(elapsed, name)
+                cls = type(self)
+                with self._stats_lock:
+                    cls.waits += 1
+                    cls.wait_total += elapsed
+                    cls.wait_max = max(cls.wait_max, elapsed)
+
+    TimedPool.__name__ = TimedPool.__qualname__ = f"Timed{base.__name__}"
+    # Mismo espacio de logging que el pool original (`sqlalchemy.pool...`),
+    # para que respete el nivel de log configurado para SQLAlchemy
+    TimedPool._sqla_logger_namespace = f"{base.__module__}.{base.__name__}"
+    return TimedPool
+
+
+def pool_stats(engine) -> Dict:
+    """
+    Estado del pool de un motor (síncrono o `AsyncEngine`).
+    """
+    pool = getattr(engine, "sync_engine", engine).pool
+    stats = {"pool": type(pool).__name__}
+    if hasattr(pool, "checkedout"):
+        stats.update(
+            size=pool.size(),
+            checked_in=pool.checkedin(),
+            checked_out=pool.checkedout(),
+            overflow=max(pool.overflow(), 0),
+            max_overflow=pool._max_overflow,
+            timeout=pool.timeout(),
+        )
+    cls = type(pool)
+    if hasattr(cls, "waits"):
+        stats.update(
+            checkouts=cls.waits,
+            wait_total_ms=round(cls.wait_total * 1000, 3),
+            wait_avg_ms=round(cls.wait_total / cls.waits * 1000, 3) if cls.waits else 0.0,
+            wait_max_ms=round(cls.wait_max * 1000, 3),
+            checkout_errors=cls.timeouts,
+        )
+    return stats
+
+
+def register_engine(name: str, engine):
+    _engines[name] = engine
+
+
+def all_pool_stats() -> Dict[str, Dict]:
+    """
+    Estado de los pools de todos los motores registrados.
+    """
+    return {name: pool_stats(engine) for name, engine in _engines.items()}
+
+
+def _pool_gauge(field: str):
+    return lambda: [((name,), stats.get(field, 0)) for name, stats in all_pool_stats().items()]
+
+
+DB_POOL_CHECKED_OUT = CallbackGauge("db_pool_checked_out", "Connections currently checked out.",
+                                    ("pool",), _pool_gauge("checked_out"))
+DB_POOL_OVERFLOW = CallbackGauge("db_pool_overflow", "Connections open beyond pool_size.",
+                                 ("pool",), _pool_gauge("overflow"))
+DB_POOL_SIZE = CallbackGauge("db_pool_size", "Configured pool size.", ("pool",), _pool_gauge("size"))
@@ -0,0 +1,69 @@
+import csv
+import io
+from typing import AsyncIterator, Literal, Type
+
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+from sqlalchemy import select
+
+from db.database import AsyncReadSessionLocal
+
+# Número de filas que se leen del cursor del servidor en cada lote
+EXPORT_BATCH_SIZE = 1000
+
+ExportFormat = Literal["ndjson", "csv"]
+
+MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+}
+
+
+async def _iter_batches(model, schema: Type[BaseModel], batch_size: int) -> AsyncIterator[list]:
+    """
+    Recorre la tabla con un cursor del lado del servidor y devuelve lotes de
+    filas ya validadas con el esquema indicado.
+    La sesión se abre aquí porque la dependencia `get_async_db` se cierra antes de
+    que empiece a enviarse la respuesta.
+    """
+    fields = list(schema.model_fields)
+    statement = (
+        select(*(getattr(model, field) for field in fields))
+        .order_by(model.id)
+        .execution_options(yield_per=batch_size, stream_results=True)
+    )
+    async with AsyncReadSessionLocal() as db:
+        result = await db.stream(statement)
+        async for partition in result.mappings().partitions():
+            yield [schema.model_validate(dict(row)) for row in partition]
+
+
+async def _ndjson_chunks(model, schema: Type[BaseModel], batch_size: int) -> AsyncIterator[bytes]:
+    async for batch in _iter_batches(model, schema, batch_size):
+        yield b"".join(item.model_dump_json().encode() + b"\n" for item in batch)
+
+
+async def _csv_chunks(model, schema: Type[BaseModel], batch_size: int) -> AsyncIterator[bytes]:
+    fields = list(schema.model_fields)
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=fields)
+    writer.writeheader()
+    yield buffer.getvalue().encode()
+    async for batch in _iter_batches(model, schema, batch_size):
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows(item.model_dump(mode="json") for item in batch)
+        yield buffer.getvalue().encode()
+
+
+def export_response(model, schema: Type[BaseModel], fmt: ExportFormat, filename: str) -> StreamingResponse:
+    """
+    Construye una respuesta que transmite toda la tabla en NDJSON o CSV
+    lote a lote, sin cargarla completa en memoria.
+    """
+    chunks = _ndjson_chunks if fmt == "ndjson" else _csv_chunks
+    return StreamingResponse(
+        chunks(model, schema, EXPORT_BATCH_SIZE),
+        media_type=MEDIA_TYPES[fmt],
+        headers={"Content-Disposition": f'attachment; filename="{filename}.{fmt}"'},
+    )
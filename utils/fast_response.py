@@ -0,0 +1,112 @@
+"""
+Respuestas rápidas para los listados grandes.
+
+El camino normal carga objetos ORM, FastAPI los vuelve a validar con el
+`response_model` y los codifica con `json`. En el camino rápido la consulta
+selecciona solo las columnas del esquema, las filas se convierten en
+diccionarios sin pasar por pydantic y se codifican con orjson (o con
+MessagePack si el cliente lo pide en `Accept`).
+
+Se activa con `FAST_LIST_RESPONSES=true` para JSON; MessagePack siempre
+usa este camino. orjson y msgpack son opcionales: sin orjson se usa `json`,
+y sin msgpack las peticiones de MessagePack reciben 406.
+"""
+import json
+import os
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from typing import Any, Dict, List, Optional, Sequence, Type
+
+from fastapi import HTTPException, Request, Response, status
+from pydantic import BaseModel
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - dependencia opcional
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - dependencia opcional
+    msgpack = None
+
+# Usar el camino rápido también para JSON (MessagePack lo usa siempre)
+FAST_LIST_RESPONSES = os.getenv("FAST_LIST_RESPONSES", "false").lower() in ("1", "true", "yes")
+
+JSON_MEDIA_TYPE = "application/json"
+MSGPACK_MEDIA_TYPE = "application/msgpack"
+MSGPACK_MEDIA_TYPES = (MSGPACK_MEDIA_TYPE, "application/x-msgpack")
+
+
+def negotiate(request: Request) -> Optional[str]:
+    """
+    Decide el formato de la respuesta: `"msgpack"`, `"json"` (camino rápido)
+    o `None` para el camino normal con `response_model`.
+    """
+    accept = request.headers.get("accept", "")
+    if any(media_type in accept for media_type in MSGPACK_MEDIA_TYPES):
+        if msgpack is None:
+            raise HTTPException(status_code=status.HTTP_406_NOT_ACCEPTABLE, detail="MessagePack is not available")
+        return "msgpack"
+    return "json" if FAST_LIST_RESPONSES else None
+
+
+def schema_columns(model, schema: Type[BaseModel], *extra: str) -> List:
+    """
+    Columnas del modelo que necesita el esquema, más las `extra` (por ejemplo
+    la columna de orden, necesaria para el cursor aunque no se devuelva).
+    """
+    fields = list(schema.model_fields)
+    fields.extend(name for name in extra if name not in fields)
+    return [getattr(model, name) for name in fields]
+
+
+def rows_to_dicts(rows: Sequence[Any], schema: Type[BaseModel]) -> List[Dict[str, Any]]:
+    """
+    Convierte filas de `schema_columns` en diccionarios con los campos del
+    esquema, en su mismo orden. Las columnas vienen en ese orden, así que se
+    emparejan por posición (`row._mapping` crea un objeto por acceso); las
+    columnas extra del final se descartan.
+    """
+    fields = list(schema.model_fields)
+    return [dict(zip(fields, row)) for row in rows]
+
+
+def _isoformat(value) -> str:
+    # Mismo formato que pydantic: UTC se escribe como "Z"
+    text = value.isoformat()
+    if isinstance(value, datetime) and value.utcoffset() == timedelta(0):
+        text = text[:-6] + "Z"
+    return text
+
+
+def _default(value):
+    """
+    Tipos que los codificadores no conocen. `Decimal` se envía como número,
+    igual que los campos `float` de los esquemas.
+    """
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (datetime, date, time)):
+        return _isoformat(value)
+    raise TypeError(f"Type is not serializable: {type(value).__name__}")
+
+
+def encode(content: Any, fmt: str) -> bytes:
+    if fmt == "msgpack":
+        return msgpack.packb(content, default=_default, use_bin_type=True)
+    if orjson is not None:
+        return orjson.dumps(content, default=_default, option=orjson.OPT_UTC_Z)
+    return json.dumps(content, default=_default, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+def media_type(fmt: Optional[str]) -> str:
+    return MSGPACK_MEDIA_TYPE if fmt == "msgpack" else JSON_MEDIA_TYPE
+
+
+def fast_response(content: Any, fmt: str) -> Response:
+    """
+    Codifica `content` sin validación adicional. Las cabeceras de
+    validación (ETag...) se añaden sobre la respuesta devuelta.
+    """
+    return Response(content=encode(content, fmt), media_type=media_type(fmt), headers={"Vary": "Accept"})
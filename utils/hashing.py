@@ -0,0 +1,123 @@
+import asyncio
+import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional, Tuple
+
+from fastapi import HTTPException, status
+from passlib.hash import bcrypt
+
+from utils.metrics import timed
+
+logger = logging.getLogger(__name__)
+
+# Configuración del cifrado de contraseñas (variables de entorno)
+# - PASSWORD_HASH_WORKERS: procesos dedicados a bcrypt.
+# - PASSWORD_HASH_QUEUE_DEPTH: operaciones que pueden esperar turno antes de
+#   responder 503.
+# - BCRYPT_ROUNDS: factor de coste de los hashes nuevos.
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
+PASSWORD_HASH_QUEUE_DEPTH = int(os.getenv("PASSWORD_HASH_QUEUE_DEPTH", "32"))
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+
+# Segundos sugeridos al cliente en la cabecera Retry-After cuando hay saturación
+RETRY_AFTER_SECONDS = 1
+
+# Los procesos no se crean con `fork`: el pool arranca durante el
+# calentamiento, con hilos ya en marcha (aiosqlite, el threadpool), y un hijo
+# creado con fork puede heredar bloqueado un lock que tenía otro hilo (el del
+# logging, por ejemplo). `forkserver` los crea desde un proceso limpio.
+_MP_CONTEXT = multiprocessing.get_context(
+    "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+)
+
+_hasher = bcrypt.using(rounds=BCRYPT_ROUNDS)
+_executor: Optional[ProcessPoolExecutor] = None
+_in_flight = 0
+
+
+# Estas funciones se ejecutan en los procesos del pool, por eso son de
+# nivel de módulo (tienen que poder serializarse con pickle).
+def _hash(password: str, rounds: int) -> str:
+    return bcrypt.using(rounds=rounds).hash(password)
+
+
+def _verify(password: str, hashed: str) -> bool:
+    return bcrypt.verify(password, hashed)
+
+
+def _get_executor() -> ProcessPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor(max_workers=PASSWORD_HASH_WORKERS, mp_context=_MP_CONTEXT)
+    return _executor
+
+
+async def _submit(fn, *args):
+    """
+    Envía una operación al pool y la espera.
+    Si ya hay tantas operaciones en curso como procesos más cola, se rechaza
+    de inmediato con un 503 en lugar de acumular latencia.
+    """
+    global _in_flight
+    if _in_flight >= PASSWORD_HASH_WORKERS + PASSWORD_HASH_QUEUE_DEPTH:
+        logger.warning("Password hashing queue saturated, rejecting request")
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Server busy, try again later",
+            headers={"Retry-After": str(RETRY_AFTER_SECONDS)},
+        )
+    _in_flight += 1
+    try:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_get_executor(), fn, *args)
+    finally:
+        _in_flight -= 1
+
+
+async def hash_password(password: str) -> str:
+    """
+    Cifra una contraseña con el coste configurado en `BCRYPT_ROUNDS`.
+    """
+    with timed("hash", "hash"):
+        return await _submit(_hash, password, BCRYPT_ROUNDS)
+
+
+async def verify_password(password: str, hashed: str) -> Tuple[bool, bool]:
+    """
+    Verifica una contraseña contra su hash.
+    Retorna `(es_válida, necesita_rehash)`; el segundo valor indica que el
+    hash se generó con un coste distinto al configurado.
+    """
+    with timed("hash", "verify"):
+        is_valid = await _submit(_verify, password, hashed)
+    if not is_valid:
+        return False, False
+    return True, _hasher.needs_update(hashed)
+
+
+async def prewarm_executor() -> int:
+    """
+    Arranca todos los procesos del pool y carga bcrypt en cada uno, para que
+    el primer login no pague la creación del proceso. Se llama al arrancar.
+    """
+    loop = asyncio.get_running_loop()
+    executor = _get_executor()
+    # Una tarea por proceso, enviadas a la vez: el pool solo crea procesos
+    # nuevos cuando no tiene ninguno libre
+    await asyncio.gather(*(loop.run_in_executor(executor, _hash, "warm-up", 4)
+                           for _ in range(PASSWORD_HASH_WORKERS)))
+    return PASSWORD_HASH_WORKERS
+
+
+def shutdown_executor():
+    """
+    Detiene los procesos del pool. Se llama al apagar la aplicación.
+    Espera a que terminen: uvicorn sale relanzando la señal recibida, sin
+    pasar por `atexit`, y los procesos quedarían huérfanos.
+    """
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=True, cancel_futures=True)
+        _executor = None
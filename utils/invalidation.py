@@ -0,0 +1,180 @@
+import asyncio
+import inspect
+import json
+import logging
+import os
+import uuid
+from collections import defaultdict
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# URL del canal compartido entre workers. Vacío = canal local al proceso.
+# Ejemplo: INVALIDATION_CHANNEL_URL="redis://localhost:6379/0"
+INVALIDATION_CHANNEL_URL = os.getenv("INVALIDATION_CHANNEL_URL", "")
+REDIS_CHANNEL_NAME = os.getenv("INVALIDATION_CHANNEL_NAME", "gela:invalidation")
+# Espera (segundos) antes de reconectar con Redis tras perder la conexión; se
+# duplica en cada intento fallido hasta INVALIDATION_RECONNECT_MAX_DELAY.
+INVALIDATION_RECONNECT_DELAY = float(os.getenv("INVALIDATION_RECONNECT_DELAY", "0.5"))
+INVALIDATION_RECONNECT_MAX_DELAY = float(os.getenv("INVALIDATION_RECONNECT_MAX_DELAY", "30"))
+
+Callback = Callable[[Optional[Dict[str, Any]]], Any]
+
+
+class InvalidationChannel:
+    """
+    Canal de publicación/suscripción por temas (por ejemplo "roles").
+
+    `publish` notifica siempre a los suscriptores del propio proceso de forma
+    inmediata; las implementaciones compartidas además reenvían el mensaje al
+    resto de workers.
+
+    Si el canal compartido pierde la conexión, los avisos publicados mientras
+    tanto se pierden: al reconectar se llama a los `on_resync`, que deben
+    descartar (o recargar) su estado local.
+    """
+
+    def __init__(self):
+        self._subscribers: Dict[str, List[Callback]] = defaultdict(list)
+        self._resync_callbacks: List[Callable[[], Any]] = []
+
+    def subscribe(self, topic: str, callback: Callback):
+        self._subscribers[topic].append(callback)
+
+    def on_resync(self, callback: Callable[[], Any]):
+        self._resync_callbacks.append(callback)
+
+    @staticmethod
+    async def _call(callback, *args):
+        result = callback(*args)
+        if inspect.isawaitable(result):
+            await result
+
+    async def _dispatch(self, topic: str, payload: Optional[Dict[str, Any]]):
+        for callback in self._subscribers.get(topic, ()):
+            try:
+                await self._call(callback, payload)
+            except Exception as e:
+                logger.error(f"Error handling invalidation for '{topic}': {e}")
+
+    async def _resync(self):
+        for callback in self._resync_callbacks:
+            try:
+                await self._call(callback)
+            except Exception as e:
+                logger.error(f"Error resynchronizing after invalidation channel reconnect: {e}")
+
+    async def publish(self, topic: str, payload: Optional[Dict[str, Any]] = None):
+        await self._dispatch(topic, payload)
+
+    async def start(self):
+        pass
+
+    async def stop(self):
+        pass
+
+
+class LocalChannel(InvalidationChannel):
+    """
+    Canal en memoria: suficiente con un único worker y para pruebas.
+    """
+
+
+class RedisChannel(InvalidationChannel):
+    """
+    Canal basado en Redis pub/sub para mantener varios workers coherentes.
+    Requiere el paquete opcional `redis`, salvo que se pase un `client` ya
+    creado (con `publish`, `pubsub` y `aclose`, como `redis.asyncio.Redis`).
+
+    Si se cae la conexión, el listener reintenta con espera exponencial y,
+    al recuperarla, vacía el estado local (`on_resync`). Los mensajes mal
+    formados se descartan sin detener el listener.
+    """
+
+    def __init__(self, url: str, channel_name: str = REDIS_CHANNEL_NAME, client=None,
+                 reconnect_delay: float = INVALIDATION_RECONNECT_DELAY,
+                 max_reconnect_delay: float = INVALIDATION_RECONNECT_MAX_DELAY):
+        super().__init__()
+        if client is None:
+            try:
+                import redis.asyncio as redis
+            except ImportError:
+                raise RuntimeError("RedisChannel requires the 'redis' package (pip install redis)")
+            client = redis.from_url(url)
+        self._redis = client
+        self._channel_name = channel_name
+        self._origin = uuid.uuid4().hex
+        self._listener: Optional[asyncio.Task] = None
+        self._reconnect_delay = reconnect_delay
+        self._max_reconnect_delay = max_reconnect_delay
+
+    async def publish(self, topic: str, payload: Optional[Dict[str, Any]] = None):
+        await self._dispatch(topic, payload)
+        message = json.dumps({"origin": self._origin, "topic": topic, "payload": payload}, default=str)
+        try:
+            await self._redis.publish(self._channel_name, message)
+        except Exception as e:
+            logger.error(f"Error publishing invalidation for '{topic}': {e}")
+
+    async def _handle(self, message):
+        if message.get("type") != "message":
+            return
+        try:
+            data = json.loads(message["data"])
+            topic, payload, origin = data["topic"], data.get("payload"), data.get("origin")
+        except (ValueError, KeyError, TypeError) as e:
+            logger.warning(f"Ignoring malformed invalidation message: {e}")
+            return
+        # Los mensajes propios ya se despacharon al publicarlos
+        if origin != self._origin:
+            await self._dispatch(topic, payload)
+
+    async def _listen(self):
+        delay = self._reconnect_delay
+        connected_before = False
+        while True:
+            pubsub = self._redis.pubsub()
+            try:
+                await pubsub.subscribe(self._channel_name)
+                if connected_before:
+                    logger.warning("Invalidation channel reconnected; discarding local caches")
+                    await self._resync()
+                connected_before = True
+                delay = self._reconnect_delay
+                async for message in pubsub.listen():
+                    await self._handle(message)
+            except Exception as e:
+                logger.error(f"Invalidation channel connection lost: {e}; retrying in {delay:.1f}s")
+            finally:
+                try:
+                    await pubsub.aclose()
+                except Exception:
+                    pass
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, self._max_reconnect_delay)
+
+    async def start(self):
+        if self._listener is None:
+            self._listener = asyncio.create_task(self._listen())
+
+    async def stop(self):
+        if self._listener is not None:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except (asyncio.CancelledError, Exception):
+                pass
+            self._listener = None
+        await self._redis.aclose()
+
+
+def create_channel(url: str) -> InvalidationChannel:
+    """
+    Crea el canal adecuado según la URL configurada.
+    """
+    if url.startswith(("redis://", "rediss://", "unix://")):
+        return RedisChannel(url)
+    return LocalChannel()
+
+
+channel = create_channel(INVALIDATION_CHANNEL_URL)
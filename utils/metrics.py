@@ -0,0 +1,347 @@
+"""
+Métricas de la API en formato Prometheus y tiempos por petición.
+
+- `MetricsMiddleware` mide cada petición HTTP (duración y código por ruta) y,
+  si `SERVER_TIMING_ENABLED` está activo, añade la cabecera `Server-Timing`
+  con el desglose de la petición (db, auth, hash).
+- `instrument_engine` engancha los eventos de un motor de SQLAlchemy para
+  contar las consultas y su tiempo.
+- `timed(fase, operación)` mide un bloque de código (JWT, bcrypt...).
+
+No depende de `prometheus_client`: los contadores e histogramas son
+diccionarios en memoria protegidos por un lock, para que el coste por
+petición sea de unos pocos microsegundos y se pueda dejar activo en
+producción.
+"""
+import os
+import threading
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from time import perf_counter
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import event
+
+# Añadir la cabecera Server-Timing a las respuestas (desactivado por defecto,
+# expone tiempos internos al cliente)
+SERVER_TIMING_ENABLED = os.getenv("SERVER_TIMING_ENABLED", "false").lower() in ("1", "true", "yes")
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Límites de los histogramas, en segundos (o en número de consultas)
+REQUEST_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 50, 100)
+
+# Etiqueta de ruta para las peticiones que no coinciden con ninguna ruta
+UNMATCHED_ROUTE = "unmatched"
+
+
+# ====================================================================
+# Métricas
+# ====================================================================
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        _REGISTRY.append(self)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self._samples())
+        return lines
+
+    def _samples(self) -> Iterable[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name, documentation, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, *labels: str, amount: float = 1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def _samples(self):
+        with self._lock:
+            values = list(self._values.items())
+        for labels, value in values:
+            yield f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}"
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, *labels: str, amount: float = 1):
+        self.inc(*labels, amount=-amount)
+
+    def set(self, *labels: str, value: float):
+        with self._lock:
+            self._values[labels] = value
+
+
+class CallbackGauge(_Metric):
+    """
+    Gauge cuyo valor se calcula al exportar las métricas: `callback` devuelve
+    pares `(etiquetas, valor)`.
+    """
+    kind = "gauge"
+
+    def __init__(self, name, documentation, labelnames, callback):
+        super().__init__(name, documentation, labelnames)
+        self.callback = callback
+
+    def _samples(self):
+        for labels, value in self.callback():
+            yield f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}"
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets: Sequence[float] = REQUEST_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # etiquetas -> [conteos por cubo (no acumulados, el último es +Inf), suma]
+        self._values: Dict[Tuple[str, ...], list] = {}
+
+    def observe(self, value: float, *labels: str):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(labels)
+            if entry is None:
+                entry = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            entry[0][index] += 1
+            entry[1] += value
+
+    def _samples(self):
+        with self._lock:
+            values = [(labels, list(counts), total) for labels, (counts, total) in self._values.items()]
+        for labels, counts, total in values:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                bucket_labels = _format_labels(self.labelnames, labels, f'le="{_format_value(float(bound))}"')
+                yield f"{self.name}_bucket{bucket_labels} {cumulative}"
+            label_text = _format_labels(self.labelnames, labels)
+            yield f"{self.name}_sum{label_text} {_format_value(total)}"
+            yield f"{self.name}_count{label_text} {cumulative}"
+
+
+_REGISTRY: List[_Metric] = []
+
+
+def render() -> str:
+    """
+    Todas las métricas registradas en formato de texto de Prometheus.
+    """
+    lines = []
+    for metric in _REGISTRY:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+HTTP_REQUESTS = Counter("http_requests_total", "HTTP requests by route and status code.",
+                        ("method", "route", "status"))
+HTTP_DURATION = Histogram("http_request_duration_seconds", "HTTP request duration by route.",
+                          ("method", "route"))
+HTTP_IN_PROGRESS = Gauge("http_requests_in_progress", "HTTP requests currently being served.")
+HTTP_DB_QUERIES = Histogram("http_request_db_queries", "SQL statements executed per HTTP request.",
+                            ("method", "route"), buckets=QUERY_COUNT_BUCKETS)
+HTTP_DB_DURATION = Histogram("http_request_db_duration_seconds", "Time spent in SQL per HTTP request.",
+                             ("method", "route"), buckets=QUERY_BUCKETS)
+DB_QUERY_DURATION = Histogram("db_query_duration_seconds", "SQL statement duration by statement type.",
+                              ("statement",), buckets=QUERY_BUCKETS)
+DB_QUERY_ERRORS = Counter("db_query_errors_total", "SQL statements that raised an error.", ("statement",))
+OPERATION_DURATION = Histogram("app_operation_duration_seconds",
+                               "Duration of instrumented operations (JWT, bcrypt...).",
+                               ("phase", "operation"), buckets=QUERY_BUCKETS + (5.0,))
+
+
+# ====================================================================
+# Tiempos por petición
+# ====================================================================
+class RequestTimings:
+    """
+    Acumula, durante una petición, el tiempo gastado en cada fase
+    y el número de consultas SQL.
+    """
+    __slots__ = ("scope", "phases", "db_queries")
+
+    def __init__(self, scope=None):
+        self.scope = scope
+        self.phases: Dict[str, float] = {}
+        self.db_queries = 0
+
+    def add(self, phase: str, seconds: float):
+        self.phases[phase] = self.phases.get(phase, 0.0) + seconds
+
+    @property
+    def route(self) -> str:
+        """
+        Método y plantilla de la ruta de la petición (`GET /articles/{article_id}`).
+        """
+        if self.scope is None:
+            return UNMATCHED_ROUTE
+        return f"{self.scope['method']} {_route_label(self.scope)}"
+
+
+_current_timings: ContextVar[Optional[RequestTimings]] = ContextVar("request_timings", default=None)
+
+
+def current_timings() -> Optional[RequestTimings]:
+    """
+    Tiempos de la petición en curso, o `None` fuera de una petición HTTP.
+    """
+    return _current_timings.get()
+
+
+@contextmanager
+def timed(phase: str, operation: str):
+    """
+    Mide un bloque y lo suma a la fase `phase` de la petición en curso.
+    Funciona igual con código síncrono y con `await` dentro del bloque.
+    """
+    start = perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = perf_counter() - start
+        OPERATION_DURATION.observe(elapsed, phase, operation)
+        timings = _current_timings.get()
+        if timings is not None:
+            timings.add(phase, elapsed)
+
+
+# ====================================================================
+# Instrumentación de SQLAlchemy
+# ====================================================================
+_QUERY_START_KEY = "metrics_query_start"
+
+
+def _statement_type(statement: str) -> str:
+    keyword = statement.lstrip().split(None, 1)[:1]
+    return keyword[0].upper() if keyword else "OTHER"
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault(_QUERY_START_KEY, []).append(perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = perf_counter() - conn.info[_QUERY_START_KEY].pop()
+    DB_QUERY_DURATION.observe(elapsed, _statement_type(statement))
+    timings = _current_timings.get()
+    if timings is not None:
+        timings.db_queries += 1
+        timings.add("db", elapsed)
+
+
+def _handle_error(exception_context):
+    starts = exception_context.connection.info.get(_QUERY_START_KEY) if exception_context.connection else None
+    if starts:
+        starts.pop()
+    DB_QUERY_ERRORS.inc(_statement_type(exception_context.statement or ""))
+
+
+def instrument_engine(engine):
+    """
+    Registra los eventos que miden las consultas de un motor síncrono.
+    Para un motor asíncrono se pasa `async_engine.sync_engine`; las consultas
+    se ejecutan en el mismo contexto que la petición, así que se atribuyen
+    a ella igualmente.
+    """
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "handle_error", _handle_error)
+
+
+# ====================================================================
+# Middleware
+# ====================================================================
+def _route_label(scope) -> str:
+    # La ruta se guarda en el scope al enrutar; se usa la plantilla
+    # (`/articles/{article_id}`) para no crear una serie por cada id.
+    route = scope.get("route")
+    return getattr(route, "path", None) or UNMATCHED_ROUTE
+
+
+def _server_timing_header(timings: RequestTimings, total: float) -> bytes:
+    parts = [f"app;dur={total * 1000:.1f}"]
+    for phase, seconds in timings.phases.items():
+        if phase == "db":
+            parts.append(f'db;dur={seconds * 1000:.1f};desc="{timings.db_queries} queries"')
+        else:
+            parts.append(f"{phase};dur={seconds * 1000:.1f}")
+    return ", ".join(parts).encode("latin-1")
+
+
+class MetricsMiddleware:
+    """
+    Middleware ASGI puro (sin `BaseHTTPMiddleware`, que crea una tarea por
+    petición) que registra duración, código de estado y consultas SQL de
+    cada petición HTTP.
+    """
+
+    def __init__(self, app, server_timing: bool = SERVER_TIMING_ENABLED):
+        self.app = app
+        self.server_timing = server_timing
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timings = RequestTimings(scope)
+        token = _current_timings.set(timings)
+        start = perf_counter()
+        status_code = 500
+
+        async def send_with_metrics(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                if self.server_timing:
+                    headers = list(message.get("headers", []))
+                    headers.append((b"server-timing", _server_timing_header(timings, perf_counter() - start)))
+                    message = {**message, "headers": headers}
+            await send(message)
+
+        HTTP_IN_PROGRESS.inc()
+        try:
+            await self.app(scope, receive, send_with_metrics)
+        finally:
+            elapsed = perf_counter() - start
+            HTTP_IN_PROGRESS.dec()
+            method, route = scope["method"], _route_label(scope)
+            HTTP_REQUESTS.inc(method, route, str(status_code))
+            HTTP_DURATION.observe(elapsed, method, route)
+            HTTP_DB_QUERIES.observe(timings.db_queries, method, route)
+            HTTP_DB_DURATION.observe(timings.phases.get("db", 0.0), method, route)
+            _current_timings.reset(token)
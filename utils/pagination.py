@@ -0,0 +1,93 @@
+import base64
+import json
+from datetime import datetime
+from typing import Any, List, Optional, Sequence, Tuple
+
+from fastapi import HTTPException, status
+from sqlalchemy import literal, tuple_
+
+# Límites de tamaño de página para los listados paginados
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+
+def encode_cursor(sort_field: str, values: Sequence[Any]) -> str:
+    """
+    Codifica la posición de la última fila de una página en un token opaco.
+    """
+    payload = {
+        "s": sort_field,
+        "v": [value.isoformat() if isinstance(value, datetime) else value for value in values],
+    }
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def _is_id(value: Any) -> bool:
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def decode_cursor(cursor: str, sort_field: str) -> List[Any]:
+    """
+    Decodifica un token generado por `encode_cursor`.
+    Lanza un 400 si el token no es válido o pertenece a otro orden.
+    """
+    invalid_cursor = HTTPException(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        detail="Invalid cursor"
+    )
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        payload = json.loads(raw)
+        values = payload["v"]
+    except (ValueError, KeyError, TypeError):
+        raise invalid_cursor
+    if payload.get("s") != sort_field or not isinstance(values, list) or len(values) != 2:
+        raise invalid_cursor
+    # El id (y el valor de orden cuando se ordena por id) debe ser un entero:
+    # otro tipo llegaría tal cual a la consulta
+    if not _is_id(values[1]) or (sort_field == "id" and not _is_id(values[0])):
+        raise invalid_cursor
+    if sort_field != "id":
+        try:
+            values[0] = datetime.fromisoformat(values[0])
+        except (TypeError, ValueError):
+            raise invalid_cursor
+    return values
+
+
+def apply_keyset(statement, model, sort_field: str, cursor: Optional[str], limit: int):
+    """
+    Aplica el orden, la condición de keyset y el límite a una consulta.
+
+    Se pide una fila más de `limit` para saber si existe una página siguiente
+    sin necesidad de un COUNT.
+    """
+    sort_column = getattr(model, sort_field)
+    if sort_field == "id":
+        if cursor is not None:
+            last_value, _ = decode_cursor(cursor, sort_field)
+            statement = statement.where(model.id > last_value)
+        statement = statement.order_by(model.id)
+    else:
+        if cursor is not None:
+            last_value, last_id = decode_cursor(cursor, sort_field)
+            # Los valores se enlazan con el tipo de cada columna para que se
+            # comparen en el mismo formato en que están guardados (en SQLite,
+            # como texto)
+            statement = statement.where(tuple_(sort_column, model.id) > tuple_(
+                literal(last_value, type_=sort_column.type), literal(last_id, type_=model.id.type)))
+        statement = statement.order_by(sort_column, model.id)
+    return statement.limit(limit + 1)
+
+
+def build_page(rows: Sequence[Any], sort_field: str, limit: int) -> Tuple[List[Any], Optional[str]]:
+    """
+    Recorta la fila extra pedida por `apply_keyset` y genera el cursor siguiente.
+    """
+    items = list(rows[:limit])
+    next_cursor = None
+    if len(rows) > limit and items:
+        last = items[-1]
+        next_cursor = encode_cursor(sort_field, (getattr(last, sort_field), last.id))
+    return items, next_cursor
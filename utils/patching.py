@@ -0,0 +1,66 @@
+"""
+Actualizaciones parciales (PATCH) en una sola sentencia.
+
+En lugar de leer la fila, modificar el objeto ORM, hacer commit y volver a
+leerla con `refresh`, se envía un único `UPDATE ... WHERE id = :id` con solo
+las columnas recibidas. Con `RETURNING` (SQLite, PostgreSQL, MariaDB) la
+misma sentencia devuelve la fila; en MySQL se hace una lectura posterior
+dentro de la misma transacción.
+
+Si el modelo tiene columna de versión, la sentencia la incrementa y, con
+`If-Match`, solo actualiza si la versión coincide: dos clientes que editan
+a la vez no se pisan los cambios y no hace falta bloquear la fila.
+"""
+from typing import Any, Dict, List, Optional, Sequence
+
+from fastapi import HTTPException, status
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+async def patch_row(
+    db: AsyncSession,
+    model,
+    row_id: int,
+    values: Dict[str, Any],
+    columns: Sequence,
+    not_found: str = "Not found",
+    versions: Optional[List[int]] = None,
+):
+    """
+    Actualiza las `values` de la fila `row_id` y devuelve sus `columns`
+    después del cambio (sin hacer commit).
+
+    - `versions`: versiones aceptadas (de `If-Match`); el modelo debe tener
+      columna `version`, que se incrementa en cada actualización.
+    - Lanza 404 si la fila no existe y 412 si existe con otra versión.
+    """
+    conditions = [model.id == row_id]
+    if versions is not None:
+        conditions.append(model.version.in_(versions))
+
+    if not values:
+        # Nada que cambiar: se devuelve la fila actual, respetando If-Match
+        row = (await db.execute(select(*columns).where(*conditions))).first()
+    else:
+        values = dict(values)
+        if hasattr(model, "version"):
+            values["version"] = model.version + 1
+        statement = (
+            update(model).where(*conditions).values(**values)
+            .execution_options(synchronize_session=False)
+        )
+        if db.bind.dialect.update_returning:
+            row = (await db.execute(statement.returning(*columns))).first()
+        else:
+            result = await db.execute(statement)
+            row = None
+            if result.rowcount:
+                row = (await db.execute(select(*columns).where(model.id == row_id))).first()
+
+    if row is None:
+        # Solo en el caso de error se distingue si falta la fila o la versión
+        if versions is not None and await db.scalar(select(model.id).where(model.id == row_id)) is not None:
+            raise HTTPException(status_code=status.HTTP_412_PRECONDITION_FAILED, detail="Precondition failed")
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=not_found)
+    return row
@@ -0,0 +1,207 @@
+"""
+Limitador de peticiones (token bucket) para las rutas públicas que ejecutan
+bcrypt: `POST /users/login` y `POST /users/`.
+
+Cada regla tiene un cubo por IP de cliente y, opcionalmente, otro por email
+de destino. Se comprueba al principio del handler, antes de cualquier
+consulta o hash, y si se supera responde 429 con `Retry-After`.
+
+El estado vive en memoria (`MemoryBackend`, por worker) o en Redis
+(`RedisBackend`, compartido entre workers) según `RATE_LIMIT_BACKEND_URL`.
+Si el backend compartido falla, la petición se deja pasar: el limitador
+protege la CPU, no debe tumbar el login.
+"""
+import logging
+import math
+import os
+import time
+from typing import Dict, NamedTuple, Optional, Tuple
+
+from fastapi import HTTPException, Request, status
+
+from utils.metrics import Counter
+
+logger = logging.getLogger(__name__)
+
+# Configuración (variables de entorno)
+# - RATE_LIMIT_ENABLED: desactiva el limitador por completo si es "false".
+# - RATE_LIMIT_BACKEND_URL: vacío = en memoria; "redis://..." = compartido.
+# - RATE_LIMIT_TRUST_FORWARDED: tomar la IP de X-Forwarded-For (solo detrás
+#   de un proxy de confianza).
+# - Reglas con formato "peticiones/segundos" (ráfaga máxima / ventana):
+#   RATE_LIMIT_LOGIN_IP, RATE_LIMIT_LOGIN_EMAIL, RATE_LIMIT_SIGNUP_IP.
+RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "true").lower() in ("1", "true", "yes")
+RATE_LIMIT_BACKEND_URL = os.getenv("RATE_LIMIT_BACKEND_URL", "")
+RATE_LIMIT_TRUST_FORWARDED = os.getenv("RATE_LIMIT_TRUST_FORWARDED", "false").lower() in ("1", "true", "yes")
+RATE_LIMIT_MAX_KEYS = int(os.getenv("RATE_LIMIT_MAX_KEYS", "100000"))
+
+RATE_LIMITED = Counter("rate_limited_total", "Requests rejected by the rate limiter.", ("rule",))
+
+
+class Limit(NamedTuple):
+    """
+    Cubo de `capacity` fichas que se rellena a `rate` fichas por segundo.
+    """
+    capacity: float
+    rate: float
+
+    @classmethod
+    def parse(cls, value: str) -> "Limit":
+        requests, seconds = value.split("/")
+        return cls(float(requests), float(requests) / float(seconds))
+
+
+class RateLimitRule(NamedTuple):
+    name: str
+    per_ip: Optional[Limit]
+    per_email: Optional[Limit] = None
+
+
+LOGIN_RULE = RateLimitRule(
+    "login",
+    per_ip=Limit.parse(os.getenv("RATE_LIMIT_LOGIN_IP", "30/60")),
+    per_email=Limit.parse(os.getenv("RATE_LIMIT_LOGIN_EMAIL", "10/60")),
+)
+SIGNUP_RULE = RateLimitRule("signup", per_ip=Limit.parse(os.getenv("RATE_LIMIT_SIGNUP_IP", "10/60")))
+
+
+# ====================================================================
+# Backends
+# ====================================================================
+class RateLimitBackend:
+    async def hit(self, key: str, limit: Limit, cost: float = 1) -> Tuple[bool, float]:
+        """
+        Consume `cost` fichas del cubo `key`.
+        Retorna `(permitido, segundos hasta que haya fichas suficientes)`.
+        """
+        raise NotImplementedError
+
+    async def close(self):
+        pass
+
+
+class MemoryBackend(RateLimitBackend):
+    """
+    Cubos en un diccionario del proceso. Con varios workers cada uno limita
+    por separado (el límite efectivo se multiplica por el número de workers).
+    """
+
+    def __init__(self, max_keys: int = RATE_LIMIT_MAX_KEYS):
+        self.max_keys = max_keys
+        self._buckets: Dict[str, Tuple[float, float]] = {}
+
+    async def hit(self, key: str, limit: Limit, cost: float = 1) -> Tuple[bool, float]:
+        now = time.monotonic()
+        tokens, updated = self._buckets.pop(key, (limit.capacity, now))
+        tokens = min(limit.capacity, tokens + (now - updated) * limit.rate)
+        allowed = tokens >= cost
+        if allowed:
+            tokens -= cost
+        # Reinsertar deja las claves en orden de último uso: al llenarse se
+        # descarta la menos reciente
+        self._buckets[key] = (tokens, now)
+        if len(self._buckets) > self.max_keys:
+            del self._buckets[next(iter(self._buckets))]
+        return allowed, 0.0 if allowed else (cost - tokens) / limit.rate
+
+
+# Token bucket atómico en Redis; usa el reloj del servidor de Redis para que
+# todos los workers vean el mismo tiempo
+_REDIS_TOKEN_BUCKET = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or capacity
+local ts = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+local allowed = 0
+local retry_after = 0
+if tokens >= cost then
+    tokens = tokens - cost
+    allowed = 1
+else
+    retry_after = (cost - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 1)
+return {allowed, tostring(retry_after)}
+"""
+
+
+class RedisBackend(RateLimitBackend):
+    """
+    Cubos compartidos en Redis. Requiere el paquete opcional `redis`.
+    """
+
+    def __init__(self, url: str, prefix: str = "gela:ratelimit:"):
+        try:
+            import redis.asyncio as redis
+        except ImportError:
+            raise RuntimeError("RedisBackend requires the 'redis' package (pip install redis)")
+        self._redis = redis.from_url(url)
+        self._script = self._redis.register_script(_REDIS_TOKEN_BUCKET)
+        self._prefix = prefix
+
+    async def hit(self, key: str, limit: Limit, cost: float = 1) -> Tuple[bool, float]:
+        allowed, retry_after = await self._script(keys=[self._prefix + key],
+                                                  args=[limit.capacity, limit.rate, cost])
+        return bool(int(allowed)), float(retry_after)
+
+    async def close(self):
+        await self._redis.aclose()
+
+
+def create_backend(url: str) -> RateLimitBackend:
+    """
+    Crea el backend adecuado según la URL configurada.
+    """
+    if url.startswith(("redis://", "rediss://", "unix://")):
+        return RedisBackend(url)
+    return MemoryBackend()
+
+
+backend = create_backend(RATE_LIMIT_BACKEND_URL)
+
+
+# ====================================================================
+# Comprobación
+# ====================================================================
+def client_ip(request: Request) -> str:
+    if RATE_LIMIT_TRUST_FORWARDED:
+        forwarded = request.headers.get("x-forwarded-for")
+        if forwarded:
+            return forwarded.split(",")[0].strip()
+    return request.client.host if request.client else "unknown"
+
+
+async def _hit(key: str, limit: Limit) -> Tuple[bool, float]:
+    try:
+        return await backend.hit(key, limit)
+    except Exception as e:
+        logger.error(f"Rate limit backend error, allowing request: {e}")
+        return True, 0.0
+
+
+async def enforce_rate_limit(request: Request, rule: RateLimitRule, email: Optional[str] = None):
+    """
+    Consume una ficha de cada cubo de la regla y lanza 429 si alguno está vacío.
+    """
+    if not RATE_LIMIT_ENABLED:
+        return
+    checks = []
+    if rule.per_ip is not None:
+        checks.append((f"{rule.name}:ip:{client_ip(request)}", rule.per_ip))
+    if rule.per_email is not None and email:
+        checks.append((f"{rule.name}:email:{email.strip().lower()}", rule.per_email))
+    for key, limit in checks:
+        allowed, retry_after = await _hit(key, limit)
+        if not allowed:
+            RATE_LIMITED.inc(rule.name)
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Too many requests, try again later",
+                headers={"Retry-After": str(max(1, math.ceil(retry_after)))},
+            )
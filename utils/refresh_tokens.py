@@ -0,0 +1,196 @@
+"""
+Refresh tokens rotativos.
+
+El login emite un token de acceso corto y un refresh token opaco. Con el
+refresh token el cliente obtiene un par nuevo sin repetir bcrypt:
+
+- La renovación hace una sola consulta por índice (el hash del token, unida
+  al usuario por su clave primaria) y un UPDATE condicional que marca el
+  token como rotado, de modo que cada refresh token solo sirve una vez.
+- Si se presenta un token ya rotado (posible robo), se revoca toda su
+  familia, es decir, la sesión completa.
+- Las familias revocadas se guardan en `revoked_families`, un conjunto en
+  memoria que `get_current_user` consulta sin tocar la base de datos. Se
+  carga al arrancar y se sincroniza entre workers por el canal de
+  invalidación.
+"""
+import hashlib
+import logging
+import os
+import secrets
+import time
+from datetime import timedelta
+from typing import Optional, Tuple
+
+from fastapi import HTTPException, status
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from db.database import AsyncSessionLocal
+from db.models import utcnow
+from db.refresh_token_model import RefreshToken
+from db.user_model import User as DBUser
+from utils.auth import ACCESS_TOKEN_EXPIRE_MINUTES, create_access_token, revoked_families
+from utils.invalidation import channel
+
+logger = logging.getLogger(__name__)
+
+# Duración de cada refresh token (se renueva en cada rotación)
+REFRESH_TOKEN_EXPIRE_DAYS = int(os.getenv("REFRESH_TOKEN_EXPIRE_DAYS", "30"))
+
+TOKEN_REVOCATIONS_TOPIC = "token_revocations"
+
+# Una familia revocada se recuerda en memoria mientras pueda quedar vivo un
+# token de acceso suyo; los refresh tokens ya se rechazan en la base de datos.
+REVOCATION_TTL = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
+
+
+def _hash_token(token: str) -> str:
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+def _invalid_refresh_token() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Invalid refresh token",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+
+
+def issue_refresh_token(db: AsyncSession, user_id: int, family_id: Optional[str] = None) -> Tuple[str, str]:
+    """
+    Añade a la sesión un refresh token nuevo (el commit lo hace quien llama).
+    Sin `family_id` se abre una familia nueva (un login).
+    Retorna `(token, family_id)`.
+    """
+    token = secrets.token_urlsafe(32)
+    family_id = family_id or secrets.token_hex(16)
+    db.add(RefreshToken(
+        token_hash=_hash_token(token),
+        family_id=family_id,
+        user_id=user_id,
+        expires_at=utcnow() + timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS),
+    ))
+    return token, family_id
+
+
+def token_response(email: str, refresh_token: str, family_id: str) -> dict:
+    """
+    Cuerpo de respuesta con el token de acceso (ligado a la familia) y el
+    refresh token.
+    """
+    return {
+        "access_token": create_access_token(data={"sub": email, "fam": family_id}),
+        "token_type": "bearer",
+        "refresh_token": refresh_token,
+        "expires_in": ACCESS_TOKEN_EXPIRE_MINUTES * 60,
+    }
+
+
+async def rotate_refresh_token(db: AsyncSession, token: str) -> dict:
+    """
+    Canjea un refresh token por un par nuevo y hace commit.
+    Lanza 401 si el token no existe, caducó, fue revocado o ya se usó.
+    """
+    row = (await db.execute(
+        select(RefreshToken.id, RefreshToken.family_id, RefreshToken.user_id, RefreshToken.expires_at,
+               RefreshToken.revoked_at, DBUser.email)
+        .join(DBUser, DBUser.id == RefreshToken.user_id)
+        .where(RefreshToken.token_hash == _hash_token(token))
+    )).first()
+    now = utcnow()
+    if row is None or row.expires_at <= now or row.revoked_at is not None or row.family_id in revoked_families:
+        raise _invalid_refresh_token()
+
+    # Solo una petición puede rotar el token; si otra ya lo hizo, el token
+    # se está reutilizando y se revoca la sesión completa
+    result = await db.execute(
+        update(RefreshToken)
+        .where(RefreshToken.id == row.id, RefreshToken.rotated_at.is_(None))
+        .values(rotated_at=now)
+    )
+    if result.rowcount != 1:
+        await db.rollback()
+        logger.warning(f"Refresh token reuse detected, revoking family {row.family_id}")
+        await revoke_family(db, row.family_id)
+        raise _invalid_refresh_token()
+
+    new_token, family_id = issue_refresh_token(db, row.user_id, row.family_id)
+    await db.commit()
+    return token_response(row.email, new_token, family_id)
+
+
+async def _revoke(db: AsyncSession, condition) -> list:
+    families = (await db.scalars(
+        select(RefreshToken.family_id).where(condition, RefreshToken.revoked_at.is_(None)).distinct()
+    )).all()
+    if families:
+        await db.execute(
+            update(RefreshToken).where(RefreshToken.family_id.in_(families)).values(revoked_at=utcnow())
+        )
+    await db.commit()
+    expires_at = time.time() + REVOCATION_TTL.total_seconds()
+    for family_id in families:
+        await channel.publish(TOKEN_REVOCATIONS_TOPIC, {"family_id": family_id, "expires_at": expires_at})
+    return families
+
+
+async def revoke_family(db: AsyncSession, family_id: str):
+    """
+    Revoca una sesión: sus refresh tokens y, en todos los workers, sus
+    tokens de acceso vigentes.
+    """
+    await _revoke(db, RefreshToken.family_id == family_id)
+
+
+async def revoke_refresh_token(db: AsyncSession, token: str) -> bool:
+    """
+    Cierra la sesión a la que pertenece un refresh token (logout).
+    Retorna `False` si el token no existe.
+    """
+    family_id = await db.scalar(select(RefreshToken.family_id).where(RefreshToken.token_hash == _hash_token(token)))
+    if family_id is None:
+        return False
+    await revoke_family(db, family_id)
+    return True
+
+
+async def revoke_user_sessions(db: AsyncSession, user_id: int):
+    """
+    Revoca todas las sesiones de un usuario (por ejemplo, al cambiar la contraseña).
+    """
+    await _revoke(db, RefreshToken.user_id == user_id)
+
+
+async def load_revoked_families(db: Optional[AsyncSession] = None) -> int:
+    """
+    Carga en memoria las familias revocadas recientemente, cuyos tokens de
+    acceso aún podrían estar vigentes. Se llama al arrancar.
+    """
+    if db is None:
+        async with AsyncSessionLocal() as session:
+            return await load_revoked_families(session)
+    since = utcnow() - REVOCATION_TTL
+    rows = (await db.execute(
+        select(RefreshToken.family_id, RefreshToken.revoked_at)
+        .where(RefreshToken.revoked_at > since)
+        .distinct()
+    )).all()
+    for family_id, revoked_at in rows:
+        revoked_families.add(family_id, _timestamp(revoked_at + REVOCATION_TTL))
+    return len(rows)
+
+
+def _timestamp(value) -> float:
+    # Las fechas se guardan como UTC sin zona horaria
+    return (value - utcnow()).total_seconds() + time.time()
+
+
+def _on_revocation(payload):
+    if payload and payload.get("family_id"):
+        revoked_families.add(payload["family_id"], float(payload["expires_at"]))
+
+
+channel.subscribe(TOKEN_REVOCATIONS_TOPIC, _on_revocation)
+# Las revocaciones avisadas mientras el canal estaba caído se recuperan de la base de datos
+channel.on_resync(load_revoked_families)
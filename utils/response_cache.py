@@ -0,0 +1,239 @@
+"""
+Caché de respuestas ya codificadas y comprimidas para los listados más
+consultados (`GET /articles/` y `GET /roles/`).
+
+Su contenido solo cambia con las escrituras, así que se guarda el cuerpo
+final (JSON o MessagePack) junto con sus versiones comprimidas en gzip,
+brotli y zstd, calculadas una sola vez al guardar la entrada. Cada petición
+recibe la mejor codificación que admita según `Accept-Encoding`.
+
+- La clave incluye el ETag, que depende de la versión de la tabla: una
+  escritura nunca deja servir una entrada antigua, ni siquiera en otro
+  worker. Además, las escrituras vacían la caché a través del canal de
+  invalidación para liberar la memoria.
+- El tamaño total está acotado en bytes (LRU), no en número de entradas.
+- Solo se comprime por encima de `RESPONSE_CACHE_MIN_COMPRESS_SIZE` bytes.
+- brotli y zstd son opcionales (`pip install brotli zstandard`); sin ellos
+  se usa solo gzip.
+"""
+import gzip
+import os
+from collections import OrderedDict
+from typing import Dict, Hashable, List, Optional
+
+from fastapi import Request, Response
+
+from utils.article_changes import ARTICLES_TOPIC
+from utils.invalidation import channel
+from utils.metrics import CallbackGauge, Counter
+from utils.role_cache import ROLES_TOPIC
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - dependencia opcional
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - dependencia opcional
+    zstandard = None
+
+# Configuración (variables de entorno)
+# - RESPONSE_CACHE_MAX_BYTES: memoria máxima de cada caché (0 = desactivada).
+# - RESPONSE_CACHE_MIN_COMPRESS_SIZE: por debajo de este tamaño no se comprime.
+# - RESPONSE_CACHE_ENCODINGS: codificaciones a generar, en orden de preferencia.
+# - Niveles: RESPONSE_CACHE_GZIP_LEVEL, RESPONSE_CACHE_BROTLI_QUALITY, RESPONSE_CACHE_ZSTD_LEVEL.
+RESPONSE_CACHE_MAX_BYTES = int(os.getenv("RESPONSE_CACHE_MAX_BYTES", str(32 * 1024 * 1024)))
+RESPONSE_CACHE_MIN_COMPRESS_SIZE = int(os.getenv("RESPONSE_CACHE_MIN_COMPRESS_SIZE", "1024"))
+RESPONSE_CACHE_ENCODINGS = [name.strip() for name in os.getenv("RESPONSE_CACHE_ENCODINGS", "br,zstd,gzip").split(",")
+                            if name.strip()]
+RESPONSE_CACHE_GZIP_LEVEL = int(os.getenv("RESPONSE_CACHE_GZIP_LEVEL", "6"))
+RESPONSE_CACHE_BROTLI_QUALITY = int(os.getenv("RESPONSE_CACHE_BROTLI_QUALITY", "5"))
+RESPONSE_CACHE_ZSTD_LEVEL = int(os.getenv("RESPONSE_CACHE_ZSTD_LEVEL", "3"))
+
+IDENTITY = "identity"
+
+RESPONSE_CACHE_REQUESTS = Counter("response_cache_requests_total", "Response cache lookups.", ("cache", "result"))
+RESPONSE_CACHE_BYTES_SAVED = Counter("response_cache_bytes_saved_total",
+                                     "Bytes not sent thanks to pre-compressed responses.", ("cache", "encoding"))
+
+
+def _compressors() -> Dict:
+    available = {"gzip": lambda body: gzip.compress(body, compresslevel=RESPONSE_CACHE_GZIP_LEVEL, mtime=0)}
+    if brotli is not None:
+        available["br"] = lambda body: brotli.compress(body, quality=RESPONSE_CACHE_BROTLI_QUALITY)
+    if zstandard is not None:
+        available["zstd"] = zstandard.ZstdCompressor(level=RESPONSE_CACHE_ZSTD_LEVEL).compress
+    return {name: available[name] for name in RESPONSE_CACHE_ENCODINGS if name in available}
+
+
+COMPRESSORS = _compressors()
+
+
+def accepted_encodings(accept_encoding: str) -> Dict[str, float]:
+    """
+    Codificaciones de `Accept-Encoding` con su peso `q`.
+    """
+    accepted = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        if not name:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        accepted[name.strip().lower()] = q
+    return accepted
+
+
+def choose_encoding(accept_encoding: str, available) -> str:
+    """
+    La codificación preferida por el servidor entre las que el cliente acepta
+    (q > 0) y están disponibles para la entrada; si no hay ninguna, `identity`.
+    """
+    accepted = accepted_encodings(accept_encoding)
+    wildcard = accepted.get("*", 0.0)
+    for name in available:
+        if accepted.get(name, wildcard) > 0:
+            return name
+    return IDENTITY
+
+
+class CachedResponse:
+    """
+    Cuerpo de una respuesta en todas sus codificaciones, más su tipo y cabeceras.
+    """
+    __slots__ = ("variants", "media_type", "headers", "size")
+
+    def __init__(self, variants: Dict[str, bytes], media_type: str, headers: Dict[str, str]):
+        self.variants = variants
+        self.media_type = media_type
+        self.headers = headers
+        self.size = sum(len(body) for body in variants.values())
+
+    @property
+    def encodings(self) -> List[str]:
+        return [name for name in self.variants if name != IDENTITY]
+
+
+class ResponseCache:
+    """
+    LRU acotado en bytes de respuestas codificadas. Si se indica `topic`, se
+    vacía con cada aviso de ese tema del canal de invalidación.
+    """
+
+    def __init__(self, name: str, topic: Optional[str] = None, max_bytes: int = RESPONSE_CACHE_MAX_BYTES):
+        self.name = name
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[Hashable, CachedResponse]" = OrderedDict()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.bytes_saved = 0
+        _caches.append(self)
+        if topic is not None:
+            channel.subscribe(topic, self._on_invalidate)
+            channel.on_resync(self.invalidate)
+
+    def _on_invalidate(self, payload=None):
+        self.invalidate()
+
+    def invalidate(self):
+        self._entries.clear()
+        self.bytes = 0
+
+    def get(self, key: Hashable) -> Optional[CachedResponse]:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            RESPONSE_CACHE_REQUESTS.inc(self.name, "miss")
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        RESPONSE_CACHE_REQUESTS.inc(self.name, "hit")
+        return entry
+
+    def put(self, key: Hashable, body: bytes, media_type: str, headers: Dict[str, str]) -> CachedResponse:
+        """
+        Comprime y guarda una respuesta. Con la caché desactivada, o si la
+        entrada no cabe, se devuelve sin comprimir ni guardar.
+        """
+        if self.max_bytes <= 0 or len(body) > self.max_bytes // 4:
+            return CachedResponse({IDENTITY: body}, media_type, headers)
+        variants = {}
+        if len(body) >= RESPONSE_CACHE_MIN_COMPRESS_SIZE:
+            for name, compress in COMPRESSORS.items():
+                compressed = compress(body)
+                if len(compressed) < len(body):
+                    variants[name] = compressed
+        variants[IDENTITY] = body
+        entry = CachedResponse(variants, media_type, headers)
+
+        previous = self._entries.pop(key, None)
+        if previous is not None:
+            self.bytes -= previous.size
+        self._entries[key] = entry
+        self.bytes += entry.size
+        while self.bytes > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self.bytes -= evicted.size
+        return entry
+
+    def respond(self, request: Request, entry: CachedResponse) -> Response:
+        """
+        Respuesta con la codificación que prefiere el cliente.
+        """
+        encoding = choose_encoding(request.headers.get("accept-encoding", ""), entry.encodings)
+        headers = dict(entry.headers)
+        headers["Vary"] = "Accept, Accept-Encoding"
+        body = entry.variants[encoding]
+        if encoding != IDENTITY:
+            headers["Content-Encoding"] = encoding
+            # Cada codificación es una representación distinta: el ETag pasa
+            # a ser débil (If-None-Match ya los compara de forma débil)
+            if "ETag" in headers and not headers["ETag"].startswith("W/"):
+                headers["ETag"] = f"W/{headers['ETag']}"
+            saved = len(entry.variants[IDENTITY]) - len(body)
+            self.bytes_saved += saved
+            RESPONSE_CACHE_BYTES_SAVED.inc(self.name, encoding, amount=saved)
+        return Response(content=body, media_type=entry.media_type, headers=headers)
+
+    def stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self.bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "bytes_saved": self.bytes_saved,
+            "encodings": list(COMPRESSORS),
+        }
+
+
+_caches: List[ResponseCache] = []
+
+
+def all_cache_stats() -> Dict[str, Dict]:
+    return {cache.name: cache.stats() for cache in _caches}
+
+
+def invalidate_all():
+    for cache in _caches:
+        cache.invalidate()
+
+
+RESPONSE_CACHE_SIZE = CallbackGauge("response_cache_bytes", "Bytes held by the response cache.", ("cache",),
+                                    lambda: [((cache.name,), cache.bytes) for cache in _caches])
+RESPONSE_CACHE_ENTRIES = CallbackGauge("response_cache_entries", "Entries held by the response cache.", ("cache",),
+                                       lambda: [((cache.name,), len(cache._entries)) for cache in _caches])
+
+
+# Cachés de los listados; las escrituras de cada tabla ya publican su tema
+article_list_cache = ResponseCache("articles", topic=ARTICLES_TOPIC)
+role_list_cache = ResponseCache("roles", topic=ROLES_TOPIC)
@@ -0,0 +1,100 @@
+import asyncio
+import logging
+from datetime import datetime
+from typing import Dict, List, NamedTuple, Optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from db.database import AsyncSessionLocal
+from db.rol_model import Rol as DBRol
+from schemas.rol import Rol as RolSchema
+from utils.conditional import make_etag
+from utils.invalidation import InvalidationChannel, channel
+from utils.versioning import ROLES_TABLE, get_table_version
+
+logger = logging.getLogger(__name__)
+
+ROLES_TOPIC = "roles"
+
+
+class RoleSnapshot(NamedTuple):
+    roles: Dict[int, RolSchema]
+    etag: str
+    last_modified: Optional[datetime]
+
+
+class RoleCache:
+    """
+    Caché de lectura para la tabla `roles`, que es pequeña y casi no cambia.
+
+    Se carga completa de una vez, de modo que un ID ausente en la caché
+    significa que el rol no existe. Las escrituras la invalidan a través del
+    canal compartido y la siguiente lectura la vuelve a cargar.
+
+    Junto con los roles se guardan el ETag (derivado del contenido) y la
+    fecha de última modificación, para responder 304 sin tocar la base de datos.
+    """
+
+    def __init__(self, invalidation_channel: InvalidationChannel):
+        self._snapshot: Optional[RoleSnapshot] = None
+        self._generation = 0
+        self._lock = asyncio.Lock()
+        self._channel = invalidation_channel
+        invalidation_channel.subscribe(ROLES_TOPIC, self._on_invalidate)
+        invalidation_channel.on_resync(self._on_invalidate)
+
+    def _on_invalidate(self, payload=None):
+        self._generation += 1
+        self._snapshot = None
+
+    async def load(self, db: Optional[AsyncSession] = None) -> RoleSnapshot:
+        """
+        Carga todos los roles desde la base de datos.
+        Si llega una invalidación mientras se carga, el resultado se devuelve
+        pero no se guarda, para no servir datos obsoletos más adelante.
+        """
+        async with self._lock:
+            if self._snapshot is not None:
+                return self._snapshot
+            generation = self._generation
+            if db is None:
+                async with AsyncSessionLocal() as session:
+                    snapshot = await self._fetch(session)
+            else:
+                snapshot = await self._fetch(db)
+            if generation == self._generation:
+                self._snapshot = snapshot
+            return snapshot
+
+    @staticmethod
+    async def _fetch(db: AsyncSession) -> RoleSnapshot:
+        _, last_modified = await get_table_version(db, ROLES_TABLE)
+        rows = (await db.scalars(select(DBRol).order_by(DBRol.id))).all()
+        roles = {row.id: RolSchema.model_validate(row, from_attributes=True) for row in rows}
+        etag = make_etag(ROLES_TABLE, *(role.model_dump_json() for role in roles.values()))
+        return RoleSnapshot(roles, etag, last_modified)
+
+    async def snapshot(self, db: Optional[AsyncSession] = None) -> RoleSnapshot:
+        """
+        Devuelve los roles junto con su ETag y fecha de modificación.
+        """
+        snapshot = self._snapshot
+        if snapshot is None:
+            snapshot = await self.load(db)
+        return snapshot
+
+    async def all(self, db: Optional[AsyncSession] = None) -> List[RolSchema]:
+        return list((await self.snapshot(db)).roles.values())
+
+    async def get(self, rol_id: int, db: Optional[AsyncSession] = None) -> Optional[RolSchema]:
+        return (await self.snapshot(db)).roles.get(rol_id)
+
+    async def invalidate(self):
+        """
+        Invalida la caché en este worker y en el resto.
+        """
+        await self._channel.publish(ROLES_TOPIC)
+
+
+role_cache = RoleCache(channel)
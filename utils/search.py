@@ -0,0 +1,185 @@
+import asyncio
+import math
+import re
+import unicodedata
+from collections import Counter, defaultdict
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from db.article_model import Article as DBArticle
+from db.database import AsyncSessionLocal
+from utils.article_changes import ARTICLES_TOPIC
+from utils.invalidation import channel
+
+# Peso de cada campo al puntuar: una coincidencia en el nombre cuenta más
+# que una en la descripción
+FIELD_WEIGHTS = {"name": 3, "type": 2, "description": 1}
+
+# Parámetros de BM25
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Pasa a minúsculas, quita acentos y separa en palabras.
+    """
+    text = unicodedata.normalize("NFKD", text.lower())
+    text = "".join(char for char in text if not unicodedata.combining(char))
+    return _TOKEN_RE.findall(text)
+
+
+class _Document(NamedTuple):
+    type: str
+    price: float
+    length: int
+    terms: Dict[str, int]
+
+
+class InvertedIndex:
+    """
+    Índice invertido en memoria con ranking BM25.
+
+    Es la alternativa a FULLTEXT de MySQL para SQLite y pruebas. Se construye
+    completo en la primera búsqueda y después se mantiene al día con los
+    avisos de cambios de artículos (`utils.article_changes`).
+    """
+
+    def __init__(self):
+        self._documents: Dict[int, _Document] = {}
+        self._postings: Dict[str, Dict[int, int]] = defaultdict(dict)
+        self._total_length = 0
+        self._loaded = False
+        self._loading = False
+        self._pending: List[dict] = []
+        self._generation = 0
+        self._lock = asyncio.Lock()
+        channel.subscribe(ARTICLES_TOPIC, self._on_articles_changed)
+        # Si se perdieron avisos, el índice se reconstruye en la siguiente búsqueda
+        channel.on_resync(self.reset)
+
+    def __len__(self):
+        return len(self._documents)
+
+    def upsert(self, article_id: int, name: str, type: str, description: str, price: float):
+        self.remove(article_id)
+        terms = Counter()
+        for field, weight in FIELD_WEIGHTS.items():
+            for token in tokenize({"name": name, "type": type, "description": description}[field]):
+                terms[token] += weight
+        length = sum(terms.values())
+        self._documents[article_id] = _Document(type, float(price), length, dict(terms))
+        self._total_length += length
+        for term, frequency in terms.items():
+            self._postings[term][article_id] = frequency
+
+    def reset(self):
+        self._generation += 1
+        self._documents.clear()
+        self._postings.clear()
+        self._total_length = 0
+        self._loaded = False
+
+    def remove(self, article_id: int):
+        document = self._documents.pop(article_id, None)
+        if document is None:
+            return
+        self._total_length -= document.length
+        for term in document.terms:
+            postings = self._postings.get(term)
+            if postings is not None:
+                postings.pop(article_id, None)
+                if not postings:
+                    del self._postings[term]
+
+    def search(self, query: str, type: Optional[str] = None, min_price: Optional[float] = None,
+               max_price: Optional[float] = None) -> List[Tuple[int, float]]:
+        """
+        Devuelve `(id, puntuación)` de los artículos que contienen algún
+        término de la consulta, ordenados por relevancia.
+        """
+        if not self._documents:
+            return []
+        total_documents = len(self._documents)
+        average_length = self._total_length / total_documents or 1
+        scores: Dict[int, float] = defaultdict(float)
+        for term in set(tokenize(query)):
+            postings = self._postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (total_documents - len(postings) + 0.5) / (len(postings) + 0.5))
+            for article_id, frequency in postings.items():
+                length = self._documents[article_id].length
+                norm = BM25_K1 * (1 - BM25_B + BM25_B * length / average_length)
+                scores[article_id] += idf * frequency * (BM25_K1 + 1) / (frequency + norm)
+
+        hits = []
+        for article_id, score in scores.items():
+            document = self._documents[article_id]
+            if type is not None and document.type != type:
+                continue
+            if min_price is not None and document.price < min_price:
+                continue
+            if max_price is not None and document.price > max_price:
+                continue
+            hits.append((article_id, score))
+        hits.sort(key=lambda hit: (-hit[1], hit[0]))
+        return hits
+
+    async def ensure_loaded(self, db: Optional[AsyncSession] = None):
+        """
+        Construye el índice desde la base de datos si aún no existe.
+        Sin `db` se abre una sesión propia contra la base de datos principal.
+        """
+        if self._loaded:
+            return
+        async with self._lock:
+            if self._loaded:
+                return
+            self._loading = True
+            generation = self._generation
+            try:
+                if db is None:
+                    async with AsyncSessionLocal() as session:
+                        await self._load_rows(session)
+                else:
+                    await self._load_rows(db)
+                # Cambios que llegaron durante la carga (aplicarlos es idempotente)
+                for payload in self._pending:
+                    self._apply(payload)
+                # Si hubo un `reset` durante la carga, lo cargado puede estar incompleto
+                if generation == self._generation:
+                    self._loaded = True
+                else:
+                    self.reset()
+            finally:
+                self._loading = False
+                self._pending.clear()
+
+    async def _load_rows(self, db: AsyncSession):
+        statement = select(DBArticle.id, DBArticle.name, DBArticle.type, DBArticle.description, DBArticle.price)
+        result = await db.stream(statement.execution_options(yield_per=1000))
+        async for row in result:
+            self.upsert(row.id, row.name, row.type, row.description, row.price)
+
+    def _on_articles_changed(self, payload):
+        if not payload:
+            return
+        # Mientras no se haya construido no hay nada que mantener
+        if self._loading:
+            self._pending.append(payload)
+        elif self._loaded:
+            self._apply(payload)
+
+    def _apply(self, payload):
+        for article_id in payload.get("deleted", ()):
+            self.remove(article_id)
+        for article in payload.get("upserted", ()):
+            self.upsert(article["id"], article["name"], article["type"], article["description"], article["price"])
+
+
+search_index = InvertedIndex()
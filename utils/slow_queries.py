@@ -0,0 +1,245 @@
+"""
+Registro de consultas lentas.
+
+Cada consulta que supera `SLOW_QUERY_THRESHOLD_MS` se registra en el log con
+su huella (la sentencia normalizada, sin valores), la forma de los
+parámetros (tipos, nunca valores: hay emails y hashes de contraseñas), la
+duración y la ruta HTTP que la originó. Además:
+
+- se acumula en una tabla en memoria con las huellas más costosas, que se
+  consulta desde `GET /admin/slow-queries`;
+- una muestra de las consultas lentas (`SLOW_QUERY_EXPLAIN_SAMPLE_RATE`) se
+  pasa por `EXPLAIN` en un hilo aparte, con una conexión propia, y el plan
+  se guarda junto a la huella.
+"""
+import hashlib
+import logging
+import os
+import random
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from time import perf_counter
+from typing import Dict, List, Optional
+
+from sqlalchemy import event
+
+from utils.metrics import current_timings
+
+logger = logging.getLogger(__name__)
+
+# Configuración (variables de entorno)
+# - SLOW_QUERY_THRESHOLD_MS: a partir de cuántos ms una consulta es lenta.
+#   Un valor negativo desactiva el registro.
+# - SLOW_QUERY_EXPLAIN_SAMPLE_RATE: fracción de consultas lentas a las que se
+#   les captura el plan (0 desactiva EXPLAIN).
+# - SLOW_QUERY_EXPLAIN_INTERVAL: segundos mínimos entre dos EXPLAIN de la
+#   misma huella.
+# - SLOW_QUERY_MAX_FINGERPRINTS: huellas distintas que se guardan en memoria.
+SLOW_QUERY_THRESHOLD_MS = float(os.getenv("SLOW_QUERY_THRESHOLD_MS", "200"))
+SLOW_QUERY_EXPLAIN_SAMPLE_RATE = float(os.getenv("SLOW_QUERY_EXPLAIN_SAMPLE_RATE", "0.1"))
+SLOW_QUERY_EXPLAIN_INTERVAL = float(os.getenv("SLOW_QUERY_EXPLAIN_INTERVAL", "300"))
+SLOW_QUERY_MAX_FINGERPRINTS = int(os.getenv("SLOW_QUERY_MAX_FINGERPRINTS", "500"))
+
+# EXPLAIN pendientes como máximo; si el hilo va atrasado se descartan
+EXPLAIN_QUEUE_DEPTH = 16
+
+# Solo estas sentencias admiten EXPLAIN sin efectos secundarios en MySQL y SQLite
+EXPLAINABLE_STATEMENTS = ("SELECT", "UPDATE", "DELETE", "WITH")
+
+_STRING_LITERAL = re.compile(r"'(?:[^'\\]|\\.|'')*'")
+_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PLACEHOLDER_LIST = re.compile(r"\(\s*(?:\?|%s|%\(\w+\)s|:\w+)(?:\s*,\s*(?:\?|%s|%\(\w+\)s|:\w+))*\s*\)")
+_VALUES_LIST = re.compile(r"(VALUES\s*\(\.\.\.\))(?:\s*,\s*\(\.\.\.\))+", re.IGNORECASE)
+_WHITESPACE = re.compile(r"\s+")
+
+
+@lru_cache(maxsize=1024)
+def fingerprint(statement: str) -> str:
+    """
+    Normaliza una sentencia para agrupar las que solo difieren en valores:
+    quita literales, colapsa listas de parámetros (`IN (?, ?, ?)`, varios
+    `VALUES`) y espacios.
+    """
+    normalized = _STRING_LITERAL.sub("?", statement)
+    normalized = _NUMBER_LITERAL.sub("?", normalized)
+    normalized = _PLACEHOLDER_LIST.sub("(...)", normalized)
+    normalized = _VALUES_LIST.sub(r"\1", normalized)
+    return _WHITESPACE.sub(" ", normalized).strip()
+
+
+def _fingerprint_id(normalized: str) -> str:
+    return hashlib.sha1(normalized.encode()).hexdigest()[:12]
+
+
+def parameters_shape(parameters, executemany: bool = False) -> str:
+    """
+    Describe los parámetros por su tipo, sin incluir sus valores.
+    """
+    if executemany:
+        rows = list(parameters or [])
+        return f"{len(rows)} x {parameters_shape(rows[0]) if rows else '()'}"
+    if isinstance(parameters, dict):
+        return "{" + ", ".join(f"{key}: {type(value).__name__}" for key, value in parameters.items()) + "}"
+    if isinstance(parameters, (list, tuple)):
+        return "(" + ", ".join(type(value).__name__ for value in parameters) + ")"
+    return type(parameters).__name__
+
+
+class SlowQueryLog:
+    """
+    Tabla en memoria de las huellas de consultas lentas, ordenable por coste.
+    """
+
+    def __init__(self, threshold_ms: float = SLOW_QUERY_THRESHOLD_MS,
+                 explain_sample_rate: float = SLOW_QUERY_EXPLAIN_SAMPLE_RATE,
+                 max_fingerprints: int = SLOW_QUERY_MAX_FINGERPRINTS):
+        self.threshold_ms = threshold_ms
+        self.explain_sample_rate = explain_sample_rate
+        self.max_fingerprints = max_fingerprints
+        self._entries: Dict[str, dict] = {}
+        self._lock = threading.Lock()
+        self._explain_executor: Optional[ThreadPoolExecutor] = None
+        self._explain_pending = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.threshold_ms >= 0
+
+    # ----------------------------------------------------------------
+    # Instrumentación del motor
+    # ----------------------------------------------------------------
+    def install(self, engine, explain_engine=None):
+        """
+        Engancha los eventos de `engine`. Los EXPLAIN se ejecutan con
+        `explain_engine` (un motor síncrono), o no se capturan si es `None`.
+        """
+        start_key = f"slow_query_start_{id(self)}"
+
+        def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            conn.info.setdefault(start_key, []).append(perf_counter())
+
+        def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            elapsed_ms = (perf_counter() - conn.info[start_key].pop()) * 1000
+            if self.enabled and elapsed_ms >= self.threshold_ms:
+                self.record(statement, parameters, executemany, elapsed_ms, explain_engine)
+
+        def handle_error(exception_context):
+            starts = exception_context.connection.info.get(start_key) if exception_context.connection else None
+            if starts:
+                starts.pop()
+
+        event.listen(engine, "before_cursor_execute", before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", after_cursor_execute)
+        event.listen(engine, "handle_error", handle_error)
+
+    def record(self, statement: str, parameters, executemany: bool, elapsed_ms: float, explain_engine=None):
+        normalized = fingerprint(statement)
+        fingerprint_id = _fingerprint_id(normalized)
+        timings = current_timings()
+        route = timings.route if timings is not None else "-"
+        shape = parameters_shape(parameters, executemany)
+        logger.warning(f"Slow query {elapsed_ms:.1f} ms [{fingerprint_id}] route={route} "
+                       f"params={shape}: {normalized}")
+
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(fingerprint_id)
+            if entry is None:
+                if len(self._entries) >= self.max_fingerprints:
+                    # Se descarta la huella que menos tiempo acumula
+                    cheapest = min(self._entries, key=lambda key: self._entries[key]["total_ms"])
+                    del self._entries[cheapest]
+                entry = self._entries[fingerprint_id] = {
+                    "fingerprint": fingerprint_id, "statement": normalized, "count": 0, "total_ms": 0.0,
+                    "max_ms": 0.0, "last_ms": 0.0, "last_seen": now, "routes": {}, "parameters": shape,
+                    "explain": None, "explained_at": None,
+                }
+            entry["count"] += 1
+            entry["total_ms"] += elapsed_ms
+            entry["max_ms"] = max(entry["max_ms"], elapsed_ms)
+            entry["last_ms"] = elapsed_ms
+            entry["last_seen"] = now
+            entry["parameters"] = shape
+            entry["routes"][route] = entry["routes"].get(route, 0) + 1
+            wants_explain = self._should_explain(entry, statement, executemany, explain_engine, now)
+            if wants_explain:
+                entry["explained_at"] = now
+                self._explain_pending += 1
+
+        if wants_explain:
+            self._get_executor().submit(self._explain, fingerprint_id, explain_engine, statement, parameters)
+
+    def _should_explain(self, entry, statement, executemany, explain_engine, now) -> bool:
+        if explain_engine is None or executemany or self.explain_sample_rate <= 0:
+            return False
+        if not statement.lstrip()[:6].upper().startswith(EXPLAINABLE_STATEMENTS):
+            return False
+        if entry["explained_at"] is not None and now - entry["explained_at"] < SLOW_QUERY_EXPLAIN_INTERVAL:
+            return False
+        if self._explain_pending >= EXPLAIN_QUEUE_DEPTH:
+            return False
+        return random.random() < self.explain_sample_rate
+
+    # ----------------------------------------------------------------
+    # EXPLAIN en segundo plano
+    # ----------------------------------------------------------------
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._explain_executor is None:
+            self._explain_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="slow-query-explain")
+        return self._explain_executor
+
+    def _explain(self, fingerprint_id: str, explain_engine, statement: str, parameters):
+        """
+        Ejecuta el EXPLAIN con una conexión DBAPI directa: la sentencia y los
+        parámetros ya vienen en el formato del driver. Los motores síncrono y
+        asíncrono usan el mismo estilo de parámetros (pymysql/aiomysql y
+        sqlite/aiosqlite).
+        """
+        prefix = "EXPLAIN QUERY PLAN " if explain_engine.dialect.name == "sqlite" else "EXPLAIN "
+        try:
+            connection = explain_engine.raw_connection()
+            try:
+                cursor = connection.cursor()
+                cursor.execute(prefix + statement, parameters)
+                columns = [column[0] for column in cursor.description or ()]
+                plan = [dict(zip(columns, row)) for row in cursor.fetchall()]
+                cursor.close()
+            finally:
+                connection.close()
+        except Exception as e:
+            logger.warning(f"EXPLAIN failed for slow query [{fingerprint_id}]: {e}")
+            plan = [{"error": str(e)}]
+        with self._lock:
+            self._explain_pending -= 1
+            entry = self._entries.get(fingerprint_id)
+            if entry is not None:
+                entry["explain"] = plan
+
+    # ----------------------------------------------------------------
+    # Consulta de la tabla
+    # ----------------------------------------------------------------
+    def top(self, limit: int = 20, order_by: str = "total_ms") -> List[dict]:
+        """
+        Huellas más costosas según `order_by` (`total_ms`, `max_ms` o `count`).
+        """
+        with self._lock:
+            entries = [dict(entry, routes=dict(entry["routes"])) for entry in self._entries.values()]
+        entries.sort(key=lambda entry: entry[order_by], reverse=True)
+        for entry in entries:
+            entry["avg_ms"] = entry["total_ms"] / entry["count"]
+        return entries[:limit]
+
+    def reset(self):
+        with self._lock:
+            self._entries.clear()
+
+    def shutdown(self):
+        if self._explain_executor is not None:
+            self._explain_executor.shutdown(wait=False, cancel_futures=True)
+            self._explain_executor = None
+
+
+slow_query_log = SlowQueryLog()
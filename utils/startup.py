@@ -0,0 +1,177 @@
+"""
+Calentamiento al arrancar y estado de preparación (`/health/ready`).
+
+Sin calentar, las primeras peticiones tras un despliegue pagan la conexión a
+la base de datos, la configuración de los mappers del ORM, la compilación de
+las consultas, la carga de la caché de roles y la creación de los procesos de
+bcrypt. `warm_up` hace todo eso dentro del `lifespan`, antes de que el worker
+se declare preparado:
+
+- Abre a la vez `DB_POOL_WARMUP_CONNECTIONS` conexiones de cada pool.
+- Precarga la caché de roles y las sesiones revocadas.
+- Ejecuta una vez las consultas de los listados, con lo que quedan en la
+  caché de sentencias compiladas de SQLAlchemy.
+- Arranca los procesos de bcrypt (`PASSWORD_HASH_PREWARM`).
+
+Ningún paso es imprescindible: si falla, se registra y el worker arranca
+igualmente (como antes, la caché se carga en la primera lectura).
+"""
+import asyncio
+import logging
+import os
+import time
+from contextlib import AsyncExitStack
+from typing import Dict
+
+from sqlalchemy import select, text
+from sqlalchemy.orm import configure_mappers
+
+from db.article_model import Article as DBArticle
+from db.database import DB_POOL_SIZE, AsyncReadSessionLocal, async_engine, async_read_engine
+from db.user_model import User as DBUser
+from schemas.article import Article as ArticleSchema
+from schemas.user import User as UserSchema
+from utils import hashing
+from utils.article_stats import read_article_stats
+from utils.fast_response import schema_columns
+from utils.metrics import Gauge
+from utils.pagination import DEFAULT_PAGE_SIZE, apply_keyset
+from utils.refresh_tokens import load_revoked_families
+from utils.role_cache import role_cache
+from utils.versioning import ARTICLES_TABLE, ROLES_TABLE, get_table_version
+
+logger = logging.getLogger(__name__)
+
+# Configuración (variables de entorno)
+# - DB_POOL_WARMUP_CONNECTIONS: conexiones que se abren al arrancar en cada
+#   pool (como máximo DB_POOL_SIZE; 0 = ninguna).
+# - PASSWORD_HASH_PREWARM: arrancar los procesos de bcrypt al inicio.
+# - HEALTH_DB_TIMEOUT: segundos que espera `/health/ready` a la base de datos.
+DB_POOL_WARMUP_CONNECTIONS = int(os.getenv("DB_POOL_WARMUP_CONNECTIONS", str(DB_POOL_SIZE)))
+PASSWORD_HASH_PREWARM = os.getenv("PASSWORD_HASH_PREWARM", "true").lower() in ("1", "true", "yes")
+HEALTH_DB_TIMEOUT = float(os.getenv("HEALTH_DB_TIMEOUT", "2"))
+
+APP_READY = Gauge("app_ready", "1 once startup has finished and until shutdown begins.")
+
+# Momento de la importación de este módulo, como referencia del arranque
+_started_at = time.perf_counter()
+_ready = False
+
+
+def is_ready() -> bool:
+    return _ready
+
+
+def mark_ready():
+    global _ready
+    _ready = True
+    APP_READY.set(value=1)
+    logger.info(f"Application ready in {time.perf_counter() - _started_at:.2f}s")
+
+
+def mark_not_ready():
+    """
+    Al empezar el apagado: el balanceador deja de enviar peticiones nuevas
+    mientras terminan las que están en curso.
+    """
+    global _ready
+    _ready = False
+    APP_READY.set(value=0)
+
+
+# ====================================================================
+# Calentamiento
+# ====================================================================
+async def warm_pool(engine, connections: int = DB_POOL_WARMUP_CONNECTIONS) -> int:
+    """
+    Abre `connections` conexiones a la vez (para que el pool tenga que crearlas
+    todas) y las devuelve al pool. Retorna cuántas se abrieron.
+    """
+    pool = engine.sync_engine.pool
+    if hasattr(pool, "size"):
+        connections = min(connections, pool.size())
+    else:
+        # Pools sin tamaño (SQLite en memoria): basta con una
+        connections = min(connections, 1)
+    if connections <= 0:
+        return 0
+    async with AsyncExitStack() as stack:
+        opened = await asyncio.gather(*(stack.enter_async_context(engine.connect()) for _ in range(connections)))
+        for connection in opened:
+            await connection.execute(text("SELECT 1"))
+    return connections
+
+
+async def prime_statements() -> int:
+    """
+    Ejecuta las consultas de las rutas más usadas para compilarlas. La clave
+    de la caché de SQLAlchemy no depende de los valores de los parámetros,
+    así que las peticiones reales reutilizan lo compilado aquí.
+    """
+    configure_mappers()
+    statements = []
+    for model, schema, orders in ((DBArticle, ArticleSchema, ("id", "create_at")),
+                                  (DBUser, UserSchema, ("id", "created_at"))):
+        for order_by in orders:
+            # Camino normal (objetos ORM) y camino rápido (solo columnas)
+            statements.append(apply_keyset(select(model), model, order_by, None, DEFAULT_PAGE_SIZE))
+            statements.append(apply_keyset(select(*schema_columns(model, schema, order_by)), model, order_by,
+                                           None, DEFAULT_PAGE_SIZE))
+    async with AsyncReadSessionLocal() as db:
+        await get_table_version(db, ARTICLES_TABLE)
+        await get_table_version(db, ROLES_TABLE)
+        for statement in statements:
+            await db.execute(statement)
+        await read_article_stats(db)
+    return len(statements) + 3
+
+
+async def _step(name: str, coroutine, timings: Dict[str, float], level: int = logging.WARNING):
+    start = time.perf_counter()
+    try:
+        await coroutine
+    except Exception as e:
+        logger.log(level, f"Startup warm-up step '{name}' failed: {e}")
+    timings[name] = round((time.perf_counter() - start) * 1000, 1)
+
+
+async def warm_up() -> Dict[str, float]:
+    """
+    Ejecuta todos los pasos de calentamiento y devuelve lo que tardó cada uno (ms).
+    """
+    timings: Dict[str, float] = {}
+    # Los procesos de bcrypt arrancan mientras se calienta la base de datos
+    hashing_task = None
+    if PASSWORD_HASH_PREWARM:
+        hashing_task = asyncio.create_task(_step("password_hashing", hashing.prewarm_executor(), timings))
+
+    await _step("db_pool", warm_pool(async_engine), timings)
+    if async_read_engine is not async_engine:
+        await _step("db_pool_replica", warm_pool(async_read_engine), timings)
+    await _step("roles_cache", role_cache.load(), timings)
+    await _step("revoked_sessions", load_revoked_families(), timings, level=logging.ERROR)
+    await _step("statements", prime_statements(), timings)
+
+    if hashing_task is not None:
+        await hashing_task
+    logger.info("Startup warm-up: " + ", ".join(f"{name} {ms}ms" for name, ms in timings.items()))
+    return timings
+
+
+# ====================================================================
+# Comprobaciones
+# ====================================================================
+async def check_database(timeout: float = HEALTH_DB_TIMEOUT) -> bool:
+    """
+    `SELECT 1` contra la base de datos principal, con límite de tiempo.
+    """
+    async def ping():
+        async with async_engine.connect() as connection:
+            await connection.execute(text("SELECT 1"))
+
+    try:
+        await asyncio.wait_for(ping(), timeout)
+        return True
+    except Exception as e:
+        logger.warning(f"Readiness check: database unavailable: {e}")
+        return False
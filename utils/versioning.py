@@ -0,0 +1,59 @@
+from datetime import datetime
+from typing import Optional, Tuple
+
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from db.models import utcnow
+from db.version_model import TableVersion
+
+ARTICLES_TABLE = "articles"
+ROLES_TABLE = "roles"
+
+
+async def bump_table_version(db: AsyncSession, name: str) -> int:
+    """
+    Incrementa la versión de una tabla dentro de la transacción en curso y
+    devuelve la nueva. Debe llamarse antes del commit de la escritura
+    correspondiente; la fila queda bloqueada hasta el commit, así que las
+    versiones siguen el orden de los commits.
+    """
+    now = utcnow()
+    statement = (
+        update(TableVersion)
+        .where(TableVersion.name == name)
+        .values(version=TableVersion.version + 1, updated_at=now)
+    )
+    if db.bind.dialect.update_returning:
+        version = (await db.execute(statement.returning(TableVersion.version))).scalar()
+    else:
+        result = await db.execute(statement)
+        version = None
+        if result.rowcount:
+            version = await db.scalar(select(TableVersion.version).where(TableVersion.name == name))
+    if version is None:
+        db.add(TableVersion(name=name, version=1, updated_at=now))
+        version = 1
+    return version
+
+
+async def lock_table_version(db: AsyncSession, name: str):
+    """
+    Bloquea la fila de versión de una tabla hasta el final de la transacción.
+    Las escrituras la bloquean primero (`bump_table_version`); quien tenga que
+    bloquear también otras filas debe empezar por esta para no invertir el orden.
+    """
+    await db.execute(select(TableVersion.version).where(TableVersion.name == name).with_for_update())
+
+
+async def get_table_version(db: AsyncSession, name: str) -> Tuple[int, Optional[datetime]]:
+    """
+    Devuelve `(versión, fecha de última modificación)` de una tabla.
+    Una tabla sin escrituras registradas tiene versión 0.
+    """
+    row = (await db.execute(
+        select(TableVersion.version, TableVersion.updated_at).where(TableVersion.name == name)
+    )).first()
+    if row is None:
+        return 0, None
+    return row.version, row.updated_at